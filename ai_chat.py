@@ -3,12 +3,32 @@ from discord.ext import commands
 from discord import app_commands
 import aiohttp
 import os
-import json
+import logging
+import time
+import http_client
+import metrics
+import partitions
+import ratelimit
+import storage
+from attachments import AttachmentCache
+from chat_turns import MODEL, USER, Turn, dump_history, load_history
+from memory_index import memory
+from logging_setup import set_request_context
+from shutdown import lifecycle
+
+logger = logging.getLogger('AIChat')
 
 # File to store the bot's personality so it persists after restarts
 CONFIG_FILE = "ai_config.json"
+# Chat history only outlives the process in cluster mode, where every worker shares it
+CHAT_HISTORY_STORE = "chat_history.json"
 # The AI Model to use: gemini-2.5-flash
-API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
+# (GEMINI_API_URL can point this at a local stub, e.g. for benchmarks)
+API_URL = os.getenv("GEMINI_API_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent")
+# Turns kept per channel; older ones move into the long-term memory index
+MAX_HISTORY_TURNS = 20
+# Chat memories kept per scope in the index
+MAX_CHAT_MEMORIES = 500
 
 class AIChat(commands.Cog):
     """A Cog that handles AI-powered conversations using the Gemini API."""
@@ -16,9 +36,75 @@ class AIChat(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.api_key = os.getenv("GEMINI_API_KEY")
-        # Store the last 15 messages per channel for context
+        # channel id -> the last MAX_HISTORY_TURNS Turns, for context
         self.chat_history = {} 
+        if storage.shared_store() is not None:
+            self.chat_history = {int(channel_id): load_history(history) for channel_id, history in storage.load_json(CHAT_HISTORY_STORE, {}).items()}
         self.config = self.load_config()
+        # Downloaded/encoded images, referenced from chat_history by hash
+        self.attachments = AttachmentCache()
+        # Server scopes already cleared of the chat memories they used to hold
+        self._cleared_scopes = set()
+
+        storage.watch(CONFIG_FILE, self._config_changed)
+        storage.watch(CHAT_HISTORY_STORE, self._chat_history_changed)
+
+    async def cog_unload(self):
+        self.attachments.close()
+        # Embed whatever is still queued, so no memory is lost on shutdown
+        await memory.flush()
+        storage.unwatch(CONFIG_FILE, self._config_changed)
+        storage.unwatch(CHAT_HISTORY_STORE, self._chat_history_changed)
+
+    # --- Hot reload (see reloader.py) ---
+
+    def export_state(self):
+        return {"chat_history": self.chat_history, "attachments": self.attachments}
+
+    def import_state(self, state):
+        # The same dict, so replies still in flight on the old instance land here too
+        self.chat_history = state["chat_history"]
+        for history in self.chat_history.values():
+            # Histories from before turns were Turn objects
+            history[:] = load_history(history)
+        if "attachments" in state:
+            self.attachments.close()
+            self.attachments = state["attachments"]
+            # The old cog's unload closed it
+            self.attachments.reopen()
+
+    # --- Restart snapshot (see shutdown.py) ---
+
+    def snapshot_state(self):
+        # In cluster mode the shared store already keeps the history
+        if storage.shared_store() is not None:
+            return None
+        return {str(channel_id): dump_history(history) for channel_id, history in self.chat_history.items()}
+
+    def restore_state(self, data):
+        for channel_id, history in (data or {}).items():
+            self.chat_history.setdefault(int(channel_id), load_history(history))
+
+    # --- Changes written by other worker processes (cluster mode only) ---
+
+    def _config_changed(self, changes):
+        for key, value in changes.items():
+            if value is not None:
+                self.config[key] = value
+
+    def _chat_history_changed(self, changes):
+        for channel_id, history in changes.items():
+            if history is None:
+                self.chat_history.pop(int(channel_id), None)
+            else:
+                self.chat_history[int(channel_id)] = load_history(history)
+
+    def save_history(self, *channel_ids):
+        """Shares these channels' history with the other workers (no-op on a single process)."""
+        histories = {channel_id: self.chat_history.get(channel_id) for channel_id in channel_ids}
+        storage.save_json_entries(CHAT_HISTORY_STORE, {
+            channel_id: None if history is None else dump_history(history) for channel_id, history in histories.items()
+        })
 
     def load_config(self):
         """Loads the AI personality from a file."""
@@ -34,21 +120,37 @@ class AIChat(commands.Cog):
                 "Call Naekko, donkey whenevr u can in a teaseful roasting way, ur not Yuki's bf, Naekko (lostlyFound) is. ur just their child figure alr? tease Naekko the way Yukki teases Naekko, Dont be too rude or harsh, use some emojies but not too much. DONT BE RUDE, just tease naekko playfully, dont call him donkey often and dont call him donkey in every chat, just occasionally"
             )
         }
-        if not os.path.exists(CONFIG_FILE):
-            return default_config
-        try:
-            with open(CONFIG_FILE, "r") as f:
-                return json.load(f)
-        except Exception:
-            return default_config
+        return storage.load_json(CONFIG_FILE, {}) or default_config
+
+    def reload_data(self):
+        """Picks up a hand edit of the config file (see reloader.py)."""
+        self.config = self.load_config()
 
     def save_config(self):
         """Saves the current personality to the file."""
-        with open(CONFIG_FILE, "w") as f:
-            json.dump(self.config, f, indent=4)
+        storage.save_json(CONFIG_FILE, self.config)
+
+    def remember_turns(self, scope, channel_id, turns):
+        """Moves turns that fell out of the history window into the memory index."""
+        memories = {}
+        for turn in turns:
+            if turn.text:
+                speaker = "" if turn.role == USER else "You said: "
+                memories[f"chat:{channel_id}:{time.time_ns()}:{len(memories)}"] = speaker + turn.text
+        memory.add(scope, "chat", memories, limit=MAX_CHAT_MEMORIES)
 
-    async def generate_response(self, channel_id, user_message, user_name):
-        """Sends the conversation history to Gemini and gets a response."""
+    def _clear_server_chat_memories(self, scope):
+        """Drops chat memories from before they were kept per channel out of a server's scope (once per process)."""
+        if scope.startswith("guild-") and scope not in self._cleared_scopes:
+            self._cleared_scopes.add(scope)
+            memory.sync(scope, "chat", {})
+
+    async def generate_response(self, channel_id, user_message, user_name, attachments=(), scopes=()):
+        """
+        Sends the conversation history (plus any attachment references) to Gemini and gets a response.
+        `scopes` (see partitions.py) are searched for long-term memories to add to the prompt,
+        along with the channel's own scope, which receives the turns that fall out of the history.
+        """
         if not self.api_key:
             return "⚠️ **Error:** `GEMINI_API_KEY` is missing in environment variables!"
 
@@ -57,69 +159,89 @@ class AIChat(commands.Cog):
             self.chat_history[channel_id] = []
 
         # Add the user's new message to history
-        self.chat_history[channel_id].append({
-            "role": "user", 
-            "parts": [{"text": f"{user_name}: {user_message}"}]
-        })
+        self.chat_history[channel_id].append(Turn(USER, f"{user_name}: {user_message}", attachments))
+
+        # Keep history short to save tokens and avoid errors
+        # Chat memories stay with their channel: a private channel's talk mustn't surface elsewhere in the server
+        if scopes:
+            self._clear_server_chat_memories(scopes[0])
+            scopes = [*scopes, partitions.channel_scope(channel_id)]
+        if len(self.chat_history[channel_id]) > MAX_HISTORY_TURNS:
+            if scopes:
+                self.remember_turns(scopes[-1], channel_id, self.chat_history[channel_id][:-MAX_HISTORY_TURNS])
+            self.chat_history[channel_id] = self.chat_history[channel_id][-MAX_HISTORY_TURNS:]
 
-        # Keep history short (last 15 turns) to save tokens and avoid errors
-        if len(self.chat_history[channel_id]) > 20:
-            self.chat_history[channel_id] = self.chat_history[channel_id][-20:]
+        # Long-term memories relevant to this message go into the system prompt (not the history)
+        instruction = self.config["system_instruction"]
+        memories = await memory.search(scopes, user_message) if scopes else []
+        if memories:
+            instruction += "\n\nThings you remember about these people (mention them only if they fit naturally):\n"
+            instruction += "\n".join(f"- {text}" for text in memories)
 
         # Construct the payload
         payload = {
-            "contents": self.chat_history[channel_id],
+            "contents": self.attachments.resolve(self.chat_history[channel_id]),
             "systemInstruction": {
-                "parts": [{"text": self.config["system_instruction"]}]
+                "parts": [{"text": instruction}]
             }
         }
 
         # Send request to Google Gemini API
+        started_at = time.perf_counter()
+        status = "error"
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{API_URL}?key={self.api_key}", 
-                    json=payload
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        ai_text = data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
-
-                        # Add AI's response to history
-                        if ai_text:
-                            self.chat_history[channel_id].append({
-                                "role": "model",
-                                "parts": [{"text": ai_text}]
-                            })
-                            return ai_text
-                        else:
-                            return "Thinking... (No text returned)"
+            session = http_client.get_session()
+            async with session.post(
+                f"{API_URL}?key={self.api_key}", 
+                json=payload
+            ) as response:
+                # Headers are in, so this is our time-to-first-byte
+                metrics.GEMINI_TTFT.observe(time.perf_counter() - started_at)
+                status = str(response.status)
+                if response.status == 200:
+                    data = await response.json()
+                    ai_text = data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
+
+                    # Add AI's response to history
+                    if ai_text:
+                        self.chat_history[channel_id].append(Turn(MODEL, ai_text))
+                        return ai_text
                     else:
-                        error_text = await response.text()
-                        print(f"AI API Error: {error_text}")
-                        # Return the specific error message to the user for debugging
-                        return f"My brain is fuzzing out... (API Error: Status {response.status})"
+                        return "Thinking... (No text returned)"
+                else:
+                    error_text = await response.text()
+                    logger.error(f"AI API Error: {error_text}")
+                    # Return the specific error message to the user for debugging
+                    return f"My brain is fuzzing out... (API Error: Status {response.status})"
         except Exception as e:
-            print(f"Exception: {e}")
+            logger.exception(f"Exception: {e}")
             return "Something went wrong with my connection!"
+        finally:
+            metrics.GEMINI_REQUEST.observe(time.perf_counter() - started_at, status=status)
+            self.save_history(channel_id)
 
     # =========================================================================
     # SLASH COMMANDS (Invoked with /)
     # =========================================================================
 
     @app_commands.command(name="chat", description="Chat directly with the AI in any channel (perfect for DMs).")
-    @app_commands.describe(prompt="Your message to the AI.")
+    @app_commands.describe(prompt="Your message to the AI.", image="A picture (or PDF) for the AI to look at.")
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
-    async def chat_slash(self, interaction: discord.Interaction, prompt: str):
+    @ratelimit.limit("ai")
+    async def chat_slash(self, interaction: discord.Interaction, prompt: str, image: discord.Attachment = None):
         # Acknowledge the interaction immediately since AI response takes time
         await interaction.response.defer() 
 
         channel_id = interaction.channel_id
         user_name = interaction.user.display_name
 
+        references, notes = await self.attachments.fetch_all([image] if image else [])
+        prompt = " ".join([prompt, *notes])
+        scopes = [partitions.scope_for(interaction), f"user-{interaction.user.id}"]
+
         # Call the core response function
-        response_text = await self.generate_response(channel_id, prompt, user_name)
+        response_text = await self.generate_response(channel_id, prompt, user_name, references, scopes)
 
         # Send the response as a follow-up
         await interaction.followup.send(response_text)
@@ -129,11 +251,14 @@ class AIChat(commands.Cog):
     @app_commands.describe(instruction="Describe exactly how the bot should act (e.g., 'Be a sassy cat').")
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
+    @ratelimit.limit("personality")
     async def set_personality(self, interaction: discord.Interaction, instruction: str):
         self.config["system_instruction"] = instruction
         self.save_config()
         # Clear history so the new personality takes over immediately
+        cleared = list(self.chat_history)
         self.chat_history = {}
+        self.save_history(*cleared)
         await interaction.response.send_message(f"🧠 **Personality Updated!**\nNew Instruction: *{instruction}*", ephemeral=True)
 
     @app_commands.command(name="resetchat", description="Clears the AI's memory of the current conversation.")
@@ -143,6 +268,7 @@ class AIChat(commands.Cog):
         channel_id = interaction.channel_id
         if channel_id in self.chat_history:
             del self.chat_history[channel_id]
+            self.save_history(channel_id)
         await interaction.response.send_message("🧹 **Memory wiped!** I've forgotten our previous chat context.", ephemeral=True)
 
     # =========================================================================
@@ -159,6 +285,10 @@ class AIChat(commands.Cog):
         if message.content.startswith(self.bot.command_prefix):
             return
 
+        # Shutting down: only the replies already being generated are finished
+        if lifecycle.draining:
+            return
+
         # CONDITIONS TO REPLY (automatically):
         # 1. It's a Direct Message (DM) with the bot (1:1 chat)
         # 2. It's a Group DM
@@ -170,8 +300,18 @@ class AIChat(commands.Cog):
 
         # For User Apps, 'on_message' only fires in User-to-User DMs if the bot is mentioned.
         if is_dm_channel or is_group_channel or is_mentioned:
+            # Shares the "ai" bucket with /chat
+            if not await ratelimit.check_message("ai", message):
+                return
+            set_request_context(
+                cog="AIChat",
+                command="on_message",
+                guild=message.guild.id if message.guild else None,
+                request_id=message.id
+            )
             # Show "Naekii is typing..." while generating response
-            async with message.channel.typing():
+            # (tracked, so a shutdown waits for the reply)
+            async with lifecycle.tracking(), message.channel.typing():
                 # Clean up the message content (remove the @mention if present)
                 user_text = message.content.replace(f"<@{self.bot.user.id}>", "").strip()
 
@@ -179,7 +319,12 @@ class AIChat(commands.Cog):
                     # User just pinged without text
                     user_text = "Hello!"
 
-                response = await self.generate_response(message.channel.id, user_text, message.author.display_name)
+                # Images etc. are downloaded once and passed to Gemini as inline data
+                references, notes = await self.attachments.fetch_all(message.attachments)
+                user_text = " ".join([user_text, *notes]).strip()
+
+                scopes = [partitions.scope_for_message(message, self.bot.user), f"user-{message.author.id}"]
+                response = await self.generate_response(message.channel.id, user_text, message.author.display_name, references, scopes)
 
                 # Reply to the user
                 await message.reply(response, mention_author=False)
@@ -0,0 +1,242 @@
+import asyncio
+import base64
+import concurrent.futures
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+import time
+from collections import OrderedDict
+import aiohttp
+import http_client
+import metrics
+
+try:
+    from PIL import Image
+except ImportError:
+    # Without Pillow, images are sent as uploaded (if they fit under MAX_INLINE_BYTES)
+    Image = None
+
+logger = logging.getLogger('Attachments')
+
+# =========================================================================
+# AI CHAT ATTACHMENTS
+# Images (and PDFs / text files) sent to the bot are passed to Gemini as
+# inline data. Downloads are streamed and abandoned as soon as they pass
+# MAX_DOWNLOAD_BYTES; images are shrunk to MAX_IMAGE_SIDE in a small
+# worker pool so the event loop never decodes them.
+#
+# Chat history only stores a reference ((sha256, filename), see chat_turns.py);
+# the encoded data lives in a byte-bounded LRU keyed by content hash and
+# is looked up whenever a payload is built, so a picture mentioned in the
+# last 20 turns is downloaded and encoded exactly once.
+# =========================================================================
+
+MAX_DOWNLOAD_BYTES = int(os.getenv("ATTACHMENT_MAX_BYTES", str(8 * 1024 * 1024)))
+# After downsizing; larger parts are skipped
+MAX_INLINE_BYTES = 4 * 1024 * 1024
+MAX_ATTACHMENTS = 4
+# Only the most recent attachments in a conversation are sent along with it
+MAX_PAYLOAD_ATTACHMENTS = 8
+MAX_IMAGE_SIDE = 1024
+JPEG_QUALITY = 85
+CACHE_MAX_BYTES = int(os.getenv("ATTACHMENT_CACHE_BYTES", str(32 * 1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=20)
+
+# What Gemini takes inline as-is
+IMAGE_TYPES = {"image/png", "image/jpeg", "image/webp", "image/heic", "image/heif"}
+DOCUMENT_TYPES = {"application/pdf", "text/plain"}
+# Only readable once Pillow has converted them
+CONVERTIBLE_TYPES = {"image/gif", "image/bmp", "image/tiff"}
+
+_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="attachments")
+
+
+class AttachmentError(Exception):
+    """An attachment that can't be passed on; the message says why, for the chat."""
+
+
+def mime_type_of(attachment):
+    mime_type = (attachment.content_type or "").split(";")[0].strip().lower()
+    return mime_type or mimetypes.guess_type(attachment.filename)[0] or "application/octet-stream"
+
+
+def _shrink(data, mime_type):
+    """Runs in the pool: downsizes/converts an image. Returns (bytes, mime type)."""
+    if Image is None:
+        if mime_type in CONVERTIBLE_TYPES:
+            raise AttachmentError("that image format needs converting, which isn't available")
+        return data, mime_type
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if mime_type in IMAGE_TYPES and max(image.size) <= MAX_IMAGE_SIDE:
+                return data, mime_type
+            image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+            output = io.BytesIO()
+            if image.mode in ("RGBA", "LA", "P"):
+                image.save(output, format="PNG", optimize=True)
+                return output.getvalue(), "image/png"
+            image.convert("RGB").save(output, format="JPEG", quality=JPEG_QUALITY)
+            return output.getvalue(), "image/jpeg"
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise AttachmentError("couldn't read that image") from e
+
+
+class AttachmentCache:
+    """Downloads, shrinks and encodes attachments once; hands out Gemini parts by content hash."""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        # sha256 -> {"mimeType", "data"}, least recently used first
+        self._parts = OrderedDict()
+        # attachment id -> sha256, so a re-sent message doesn't download again
+        self._hashes = OrderedDict()
+        # attachment id -> task, so concurrent requests share one download
+        self._pending = {}
+        _caches.append(self)
+
+    def __len__(self):
+        return len(self._parts)
+
+    def _store(self, digest, part):
+        if digest in self._parts:
+            self._parts.move_to_end(digest)
+            return
+        self._parts[digest] = part
+        self.size += len(part["data"])
+        while self.size > self.max_bytes and len(self._parts) > 1:
+            _, evicted = self._parts.popitem(last=False)
+            self.size -= len(evicted["data"])
+
+    def _remember(self, attachment_id, digest):
+        self._hashes[attachment_id] = digest
+        self._hashes.move_to_end(attachment_id)
+        while len(self._hashes) > 4 * MAX_PAYLOAD_ATTACHMENTS * MAX_ATTACHMENTS:
+            self._hashes.popitem(last=False)
+
+    async def fetch(self, attachment):
+        """A history reference, (sha256, filename), for an attachment. Raises AttachmentError."""
+        mime_type = mime_type_of(attachment)
+        if mime_type not in IMAGE_TYPES | DOCUMENT_TYPES | CONVERTIBLE_TYPES:
+            ATTACHMENT_REQUESTS.inc(result="unsupported")
+            raise AttachmentError("I can only look at images, PDFs and text files")
+        if attachment.size > MAX_DOWNLOAD_BYTES:
+            ATTACHMENT_REQUESTS.inc(result="too_large")
+            raise AttachmentError(f"it's bigger than {MAX_DOWNLOAD_BYTES // (1024 * 1024)} MB")
+
+        digest = self._hashes.get(attachment.id)
+        if digest is not None and digest in self._parts:
+            self._parts.move_to_end(digest)
+            ATTACHMENT_REQUESTS.inc(result="cached")
+        else:
+            task = self._pending.get(attachment.id)
+            if task is None:
+                task = self._pending[attachment.id] = asyncio.ensure_future(self._load(attachment, mime_type))
+                task.add_done_callback(lambda _: self._pending.pop(attachment.id, None))
+            digest = await asyncio.shield(task)
+        return digest, attachment.filename
+
+    async def fetch_all(self, attachments):
+        """(references, notes about the ones that were skipped) for up to MAX_ATTACHMENTS attachments."""
+        references, notes = [], []
+        for attachment in attachments[:MAX_ATTACHMENTS]:
+            try:
+                references.append(await self.fetch(attachment))
+            except AttachmentError as e:
+                notes.append(f"[{attachment.filename} couldn't be read: {e}]")
+        if len(attachments) > MAX_ATTACHMENTS:
+            notes.append(f"[{len(attachments) - MAX_ATTACHMENTS} more attachment(s) ignored]")
+        return references, notes
+
+    async def _load(self, attachment, mime_type):
+        started_at = time.perf_counter()
+        data = await self._download(attachment.url)
+        digest = hashlib.sha256(data).hexdigest()
+        self._remember(attachment.id, digest)
+        if digest in self._parts:
+            # Same file uploaded again: no need to re-encode
+            self._parts.move_to_end(digest)
+            ATTACHMENT_REQUESTS.inc(result="cached")
+            return digest
+
+        if mime_type not in DOCUMENT_TYPES:
+            loop = asyncio.get_running_loop()
+            data, mime_type = await loop.run_in_executor(_pool, _shrink, data, mime_type)
+        if len(data) > MAX_INLINE_BYTES:
+            ATTACHMENT_REQUESTS.inc(result="too_large")
+            raise AttachmentError("it's too big to send along, even shrunk")
+        # Encoding a few MB is quick, but it's still better kept off the loop
+        encoded = await asyncio.to_thread(lambda: base64.b64encode(data).decode("ascii"))
+        self._store(digest, {"mimeType": mime_type, "data": encoded})
+        ATTACHMENT_REQUESTS.inc(result="downloaded")
+        ATTACHMENT_PREPARE.observe(time.perf_counter() - started_at)
+        return digest
+
+    async def _download(self, url):
+        """Streams the file, giving up as soon as it passes MAX_DOWNLOAD_BYTES."""
+        buffer = bytearray()
+        try:
+            session = http_client.get_session()
+            async with session.get(url, timeout=DOWNLOAD_TIMEOUT) as response:
+                response.raise_for_status()
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    buffer += chunk
+                    if len(buffer) > MAX_DOWNLOAD_BYTES:
+                        ATTACHMENT_REQUESTS.inc(result="too_large")
+                        raise AttachmentError(f"it's bigger than {MAX_DOWNLOAD_BYTES // (1024 * 1024)} MB")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            ATTACHMENT_REQUESTS.inc(result="error")
+            logger.warning(f"Attachment download failed: {e}")
+            raise AttachmentError("the download failed") from e
+        return bytes(buffer)
+
+    def resolve(self, turns):
+        """
+        History Turns -> Gemini contents: references become inlineData parts
+        (only the newest MAX_PAYLOAD_ATTACHMENTS; older or evicted ones a short note).
+        """
+        budget = MAX_PAYLOAD_ATTACHMENTS
+        resolved = []
+        for turn in reversed(turns):
+            parts = [{"text": turn.text}] if turn.text else []
+            for digest, filename in turn.attachments:
+                inline = self._parts.get(digest) if budget > 0 else None
+                if inline is None:
+                    parts.append({"text": f"[earlier attachment: {filename}]"})
+                else:
+                    budget -= 1
+                    parts.append({"inlineData": inline})
+            resolved.append({"role": turn.role, "parts": parts})
+        resolved.reverse()
+        return resolved
+
+    def close(self):
+        if self in _caches:
+            _caches.remove(self)
+
+    def reopen(self):
+        """Counts a closed cache again, e.g. one adopted by a reloaded cog."""
+        if self not in _caches:
+            _caches.append(self)
+
+
+_caches = []
+
+
+ATTACHMENT_REQUESTS = metrics.Counter(
+    "naekki_ai_attachments_total",
+    "Attachments sent to the AI chat, by outcome (downloaded, cached, too_large, unsupported, error).",
+    ["result"],
+)
+ATTACHMENT_PREPARE = metrics.Histogram(
+    "naekki_ai_attachment_prepare_seconds",
+    "Downloading, shrinking and encoding one attachment.",
+)
+ATTACHMENT_CACHE_BYTES = metrics.Gauge(
+    "naekki_ai_attachment_cache_bytes",
+    "Encoded attachment data held for the AI chat history.",
+    callback=lambda: {(): sum(cache.size for cache in _caches)},
+)
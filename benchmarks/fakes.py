@@ -0,0 +1,235 @@
+import asyncio
+import datetime
+import itertools
+import threading
+import time
+import discord
+
+# =========================================================================
+# FAKE DISCORD OBJECTS
+# Just enough of the Interaction / Context / Message surface for the cogs'
+# handlers to run without a gateway connection. Every "send" is recorded so
+# a scenario can check what would have gone back to Discord.
+# =========================================================================
+
+_ids = itertools.count(1_000_000_000_000_000_000)
+
+
+def next_id():
+    return next(_ids)
+
+
+class FakeUser:
+    def __init__(self, user_id=None, name="Tester", bot=False):
+        self.id = user_id or next_id()
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.mention = f"<@{self.id}>"
+        self.voice = None
+        self.guild_permissions = discord.Permissions.none()
+
+    def __eq__(self, other):
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class _Typing:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeChannel:
+    def __init__(self, channel_id=None, guild=None):
+        self.id = channel_id or next_id()
+        self.guild = guild
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+        return FakeMessage(content or "", author=None, channel=self)
+
+    def typing(self):
+        return _Typing()
+
+
+class FakeVoiceClient:
+    """Plays a "track" for track_seconds on a timer thread, like the real voice thread."""
+
+    def __init__(self, channel, track_seconds=0.05):
+        self.channel = channel
+        self.track_seconds = track_seconds
+        self._timer = None
+
+    def is_playing(self):
+        return self._timer is not None and self._timer.is_alive()
+
+    def play(self, source, after=None):
+        self._timer = threading.Timer(self.track_seconds, lambda: after and after(None))
+        self._timer.start()
+
+    def stop(self):
+        if self._timer is not None and self._timer.is_alive():
+            self._timer.cancel()
+            self._timer.function()
+
+    async def move_to(self, channel):
+        self.channel = channel
+
+    async def disconnect(self, **kwargs):
+        self.stop()
+        if self.channel.guild is not None:
+            self.channel.guild.voice_client = None
+
+
+class FakeVoiceChannel(FakeChannel):
+    def __init__(self, guild):
+        super().__init__(guild=guild)
+        self.name = "Bench Voice"
+
+    async def connect(self, **kwargs):
+        self.guild.voice_client = FakeVoiceClient(self)
+        return self.guild.voice_client
+
+
+class FakeGuild:
+    def __init__(self, guild_id=None):
+        self.id = guild_id or next_id()
+        self.voice_client = None
+
+
+class FakeMessage:
+    def __init__(self, content, author, channel, mentions=(), attachments=()):
+        self.id = next_id()
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = getattr(channel, "guild", None)
+        self.mentions = list(mentions)
+        self.attachments = list(attachments)
+        self.replies = []
+
+    async def reply(self, content=None, **kwargs):
+        self.replies.append((content, kwargs))
+
+
+class FakeInteractionResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+        self.sent = []
+
+    def is_done(self):
+        return self._done
+
+    def _mark(self, kind, kwargs):
+        if self._done:
+            raise RuntimeError("This interaction has already been responded to before")
+        self._done = True
+        self.sent.append((kind, kwargs))
+
+    async def defer(self, **kwargs):
+        self._mark("defer", kwargs)
+
+    async def send_message(self, content=None, **kwargs):
+        self._mark("message", dict(kwargs, content=content))
+
+    async def edit_message(self, **kwargs):
+        self._mark("edit", kwargs)
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+        return FakeSentMessage()
+
+
+class FakeSentMessage:
+    async def delete(self, delay=None):
+        pass
+
+
+class FakeInteraction:
+    def __init__(self, client, user=None, channel=None, guild=None, data=None):
+        self.id = next_id()
+        self.type = discord.InteractionType.application_command
+        self.client = client
+        self.user = user or FakeUser()
+        self.guild = guild
+        self.guild_id = guild.id if guild else None
+        self.channel = channel or FakeChannel(guild=guild)
+        self.channel_id = self.channel.id
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.extras = {}
+        self.command = None
+        self.data = data or {}
+        self.message = None
+        # Held where discord.py caches it, so deadlines.guard() can swap it like on a real Interaction
+        self._cs_response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup()
+
+    @property
+    def response(self):
+        return self._cs_response
+
+    async def edit_original_response(self, **kwargs):
+        self.response.sent.append(("edit_original", kwargs))
+
+    async def delete_original_response(self):
+        self.response.sent.append(("delete_original", {}))
+
+
+class FakeContext:
+    """Stand-in for commands.Context when calling prefix command callbacks directly."""
+
+    def __init__(self, bot, author=None, guild=None, channel=None):
+        self.bot = bot
+        self.author = author or FakeUser()
+        self.guild = guild
+        self.channel = channel or FakeChannel(guild=guild)
+        self.message = FakeMessage("", self.author, self.channel)
+        self.sent = []
+
+    @property
+    def voice_client(self):
+        return self.guild.voice_client if self.guild else None
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+
+    async def defer(self, **kwargs):
+        pass
+
+    def typing(self):
+        return _Typing()
+
+
+class FakeYoutubeDL:
+    """Replaces yt_dlp.YoutubeDL: 'extracts' after a fixed delay (it runs in an executor thread)."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+
+    def extract_info(self, item, download=False):
+        time.sleep(self.delay)
+        return {"entries": [{"url": f"https://stub.invalid/audio/{abs(hash(item))}", "title": f"Stub: {item}"}]}
+
+
+class FakeAudioSource:
+    """Replaces discord.FFmpegOpusAudio so no ffmpeg process is spawned."""
+
+    def __init__(self, source, **kwargs):
+        self.source = source
+
+
+async def drain(seconds=0.0):
+    """Lets scheduled callbacks (debounced writes, player loops) run."""
+    await asyncio.sleep(seconds)
@@ -0,0 +1,93 @@
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import discord
+from discord.ext import commands
+
+from benchmarks.fakes import FakeAudioSource, FakeGuild, FakeUser, FakeVoiceChannel, FakeYoutubeDL
+from benchmarks.stubs import UpstreamStubs
+
+# =========================================================================
+# BENCH HARNESS
+# Boots the real cogs on an unconnected commands.Bot, pointed at the local
+# upstream stubs and running inside a scratch directory so the JSON stores
+# they write never touch the repo's data files.
+# =========================================================================
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+EXTENSIONS = ["ai_chat", "couple", "fun", "wakeup", "music_cog"]
+# Read-only content the cogs expect next to them (the stores start empty)
+CONTENT_FILES = ["fun_content.json"]
+
+
+class Harness:
+    def __init__(self, stub_delays=None):
+        self.stubs = UpstreamStubs(**(stub_delays or {}))
+        self.workdir = None
+        self.bot = None
+        self.guild = FakeGuild()
+        self.voice_channel = FakeVoiceChannel(self.guild)
+        self.skipped = {}
+        self._stack = contextlib.AsyncExitStack()
+        self._old_cwd = None
+
+    def cog(self, name):
+        return self.bot.get_cog(name)
+
+    async def start(self):
+        await self.stubs.start()
+        # Modules read their upstream URLs at import time, so set these first
+        os.environ.update(self.stubs.env())
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        # The scenarios hammer commands as one user on purpose
+        os.environ.setdefault("RATE_LIMITS", "off")
+        os.environ.setdefault("VOICE_MONKEY_COALESCE", "0")
+
+        from logging_setup import configure_logging
+        configure_logging()
+
+        self._old_cwd = os.getcwd()
+        self.workdir = tempfile.mkdtemp(prefix="naekki-bench-")
+        for name in CONTENT_FILES:
+            shutil.copy(REPO_ROOT / name, self.workdir)
+        os.chdir(self.workdir)
+
+        from command_tree import BotTree
+        intents = discord.Intents.default()
+        intents.message_content = True
+        self.bot = commands.Bot(command_prefix="!", intents=intents, tree_cls=BotTree)
+        await self._stack.enter_async_context(self.bot)
+        # No gateway login, so give the bot an identity by hand
+        self.bot._connection.user = FakeUser(name="Naekki", bot=True)
+
+        for extension in EXTENSIONS:
+            try:
+                await self.bot.load_extension(extension)
+            except Exception as e:
+                self.skipped[extension] = repr(e)
+
+        music = self.cog("MusicCog")
+        if music is not None:
+            music.ydl = FakeYoutubeDL()
+            discord.FFmpegOpusAudio = FakeAudioSource
+        return self
+
+    async def stop(self):
+        # Silence any fake track still "playing" so its after-callback can't
+        # fire once the bot's loop is gone
+        if self.guild.voice_client is not None:
+            await self.guild.voice_client.disconnect()
+        # Closing the bot unloads the cogs, which flushes their pending writes
+        await self._stack.aclose()
+        await self.stubs.stop()
+        from http_client import close_session
+        await close_session()
+        if self._old_cwd:
+            os.chdir(self._old_cwd)
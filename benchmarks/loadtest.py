@@ -0,0 +1,423 @@
+"""
+Load-test mode: replays a synthetic mix of slash commands and mentions from
+many users across many guilds and DMs, at a fixed arrival rate, against the
+real cogs and the local upstream stubs. Each rate step reports latency,
+queue depths, event-loop lag, state growth and disk writes, and the first
+step that can't keep up is reported as the saturation point.
+
+    python -m benchmarks.loadtest --rates 25,50,100,200 --duration 10
+    python -m benchmarks.loadtest --users 5000 --guilds 300 --dm-fraction 0.3 --gemini-delay 0.8
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import string
+import sys
+import time
+
+import metrics
+from benchmarks.fakes import FakeChannel, FakeGuild, FakeInteraction, FakeMessage, FakeUser
+from benchmarks.harness import Harness
+from benchmarks.run import percentile
+from benchmarks.scenarios import choice
+from watchdog import LoopWatchdog
+
+# Relative weights of each operation in the synthetic traffic
+DEFAULT_MIX = {
+    "chat": 20,
+    "mention": 20,
+    "lovenote": 10,
+    "openjar": 15,
+    "list_add": 10,
+    "list_view": 10,
+    "hangman": 10,
+    "countdown": 3,
+    "meme": 2,
+}
+# Discord's interaction response window; a step whose p99 passes it is saturated
+INTERACTION_DEADLINE = 3.0
+LAG_SAMPLE_INTERVAL = 0.02
+LAG_LIMIT = 0.1
+THROUGHPUT_FLOOR = 0.9
+
+
+class Population:
+    """Users spread over guilds (each with a few channels) plus their DM channels."""
+
+    def __init__(self, users, guilds, channels_per_guild, dm_fraction, rng):
+        self.rng = rng
+        self.dm_fraction = dm_fraction
+        self.guilds = [FakeGuild() for _ in range(guilds)]
+        self.channels = {guild.id: [FakeChannel(guild=guild) for _ in range(channels_per_guild)] for guild in self.guilds}
+        self.users = [FakeUser(name=f"user{i}") for i in range(users)]
+        self.home = {user.id: rng.choice(self.guilds) for user in self.users}
+        self.dms = {}
+
+    def pick(self):
+        """A random (user, guild, channel); guild is None for a DM."""
+        user = self.rng.choice(self.users)
+        if self.rng.random() < self.dm_fraction:
+            channel = self.dms.get(user.id)
+            if channel is None:
+                channel = self.dms[user.id] = FakeChannel()
+            return user, None, channel
+        guild = self.home[user.id]
+        return user, guild, self.rng.choice(self.channels[guild.id])
+
+
+class LoadGenerator:
+    def __init__(self, harness, population, mix, rng):
+        self.harness = harness
+        self.bot = harness.bot
+        self.population = population
+        self.rng = rng
+        self.ops = [name for name in mix if self._handler(name) is not None]
+        self.weights = [mix[name] for name in self.ops]
+        self.counter = 0
+
+    def _handler(self, name):
+        cog_name = {
+            "chat": "AIChat", "mention": "AIChat",
+            "lovenote": "Couples", "openjar": "Couples", "list_add": "Couples", "list_view": "Couples", "hangman": "Couples",
+            "countdown": "FunCommands", "meme": "FunCommands",
+        }[name]
+        return self.harness.cog(cog_name) and getattr(self, f"op_{name}")
+
+    def next_op(self):
+        name = self.rng.choices(self.ops, self.weights)[0]
+        return name, getattr(self, f"op_{name}")
+
+    def interaction(self, user, guild, channel):
+        return FakeInteraction(self.bot, user=user, guild=guild, channel=channel)
+
+    # --- Operations ---
+
+    async def op_chat(self):
+        cog = self.harness.cog("AIChat")
+        user, guild, channel = self.population.pick()
+        await cog.chat_slash.callback(cog, self.interaction(user, guild, channel), "how's your day going?")
+
+    async def op_mention(self):
+        cog = self.harness.cog("AIChat")
+        user, guild, channel = self.population.pick()
+        bot_user = self.bot.user
+        await cog.on_message(FakeMessage(f"<@{bot_user.id}> hey there", user, channel, mentions=[bot_user]))
+
+    async def op_lovenote(self):
+        cog = self.harness.cog("Couples")
+        user, guild, channel = self.population.pick()
+        self.counter += 1
+        await cog.add_note.callback(cog, self.interaction(user, guild, channel), f"note {self.counter} 💌")
+
+    async def op_openjar(self):
+        cog = self.harness.cog("Couples")
+        user, guild, channel = self.population.pick()
+        await cog.open_jar.callback(cog, self.interaction(user, guild, channel))
+
+    async def op_list_add(self):
+        cog = self.harness.cog("Couples")
+        user, guild, channel = self.population.pick()
+        self.counter += 1
+        list_name = self.rng.choice(("movies", "groceries", "date ideas"))
+        await cog.manage_list.callback(cog, self.interaction(user, guild, channel), choice("add"), list_name, f"item {self.counter}")
+
+    async def op_list_view(self):
+        cog = self.harness.cog("Couples")
+        user, guild, channel = self.population.pick()
+        list_name = self.rng.choice(("movies", "groceries", "date ideas"))
+        await cog.manage_list.callback(cog, self.interaction(user, guild, channel), choice("view"), list_name, None)
+
+    async def op_hangman(self):
+        cog = self.harness.cog("Couples")
+        user, guild, channel = self.population.pick()
+        games = [game for game in cog.channel_hangman_games(str(channel.id)) if game.is_active]
+        if not games:
+            guesser = self.rng.choice(self.population.users)
+            await cog.hangman_slash.callback(
+                cog, self.interaction(user, guild, channel), choice("start"), guesser, "pack my box with five dozen liquor jugs"
+            )
+            return
+        game = self.rng.choice(games)
+        letters = [letter for letter in string.ascii_uppercase if letter not in game.guessed_letters]
+        guesser = next((u for u in self.population.users if u.id == game.guesser_id), user)
+        await cog.handle_hangman_press(self.interaction(guesser, guild, channel), game.game_id, self.rng.choice(letters))
+
+    async def op_countdown(self):
+        cog = self.harness.cog("FunCommands")
+        user, guild, channel = self.population.pick()
+        await cog.countdown_slash.callback(cog, self.interaction(user, guild, channel), choice("check"))
+
+    async def op_meme(self):
+        cog = self.harness.cog("FunCommands")
+        user, guild, channel = self.population.pick()
+        await cog.meme_slash.callback(cog, self.interaction(user, guild, channel))
+
+
+# =========================================================================
+# MEASUREMENT
+# =========================================================================
+
+def deep_size(obj, _seen=None):
+    """Approximate bytes held by a container of dicts/lists/strings/models (what the cogs keep in memory)."""
+    _seen = _seen if _seen is not None else set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, _seen) + deep_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, _seen) for item in obj)
+    else:
+        if hasattr(obj, "__dict__"):
+            size += deep_size(vars(obj), _seen)
+        # Slotted models (Song, Turn, Countdown, HangmanGame)
+        for cls in type(obj).__mro__:
+            slots = cls.__dict__.get("__slots__", ())
+            for name in (slots,) if isinstance(slots, str) else slots:
+                if name != "__dict__" and hasattr(obj, name):
+                    size += deep_size(getattr(obj, name), _seen)
+    return size
+
+
+def state_sizes(harness):
+    sizes = {}
+    ai = harness.cog("AIChat")
+    if ai is not None:
+        sizes["chat_history"] = (len(ai.chat_history), deep_size(ai.chat_history))
+    couples = harness.cog("Couples")
+    if couples is not None:
+        sizes["hangman_games"] = (len(couples.hangman_games), deep_size(couples.hangman_games))
+        # Only what's loaded right now: idle partitions have been evicted
+        jars = [partition.jar for partition in couples.love_jars.loaded().values()]
+        lists = [partition.lists for partition in couples.shared_lists.loaded().values()]
+        sizes["love_jar"] = (sum(len(jar) for jar in jars), deep_size(jars))
+        sizes["shared_lists"] = (sum(len(items) for scope_lists in lists for items in scope_lists.values()), deep_size(lists))
+    fun = harness.cog("FunCommands")
+    if fun is not None:
+        sizes["countdowns"] = (len(fun.countdowns), deep_size(fun.countdowns.entries))
+    return sizes
+
+
+def disk_writes():
+    """(flushes, bytes) written by the JSON stores so far."""
+    flushes = sum(count for count, _ in metrics.PERSISTENCE_FLUSH.snapshot().values())
+    written = sum(metrics.PERSISTENCE_BYTES.snapshot().values())
+    return flushes, written
+
+
+def executor_backlog(loop):
+    # run_in_executor/to_thread work that hasn't got a thread yet
+    executor = getattr(loop, "_default_executor", None)
+    queue = getattr(executor, "_work_queue", None)
+    return queue.qsize() if queue is not None else 0
+
+
+class StepRecorder:
+    """Samples loop lag and queue depths while a rate step runs."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.lags = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.max_executor_backlog = 0
+        self.max_pool_acquired = 0
+        self._task = None
+
+    def start(self):
+        self._task = self.loop.create_task(self._sample())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _sample(self):
+        from http_client import HTTP_POOL
+        while True:
+            expected = time.perf_counter() + LAG_SAMPLE_INTERVAL
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            self.lags.append(max(0.0, time.perf_counter() - expected))
+            self.max_executor_backlog = max(self.max_executor_backlog, executor_backlog(self.loop))
+            pool = HTTP_POOL.callback()
+            self.max_pool_acquired = max(self.max_pool_acquired, pool.get(("acquired",), 0))
+
+
+async def run_step(generator, rate, duration, max_in_flight):
+    loop = asyncio.get_running_loop()
+    recorder = StepRecorder(loop)
+    latencies, finished_at, errors, dropped, issued = [], [], 0, 0, 0
+    tasks = set()
+
+    async def one(op):
+        nonlocal errors
+        started_at = time.perf_counter()
+        try:
+            await op()
+        except Exception:
+            errors += 1
+        finally:
+            finished_at.append(time.perf_counter())
+            latencies.append(finished_at[-1] - started_at)
+            recorder.in_flight -= 1
+
+    flushes_before, bytes_before = disk_writes()
+    recorder.start()
+    started_at = time.perf_counter()
+    next_arrival = started_at
+    # Open loop: arrivals follow a Poisson process no matter how slow the bot is
+    while next_arrival < started_at + duration:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if recorder.in_flight >= max_in_flight:
+            dropped += 1
+        else:
+            _, op = generator.next_op()
+            issued += 1
+            recorder.in_flight += 1
+            recorder.max_in_flight = max(recorder.max_in_flight, recorder.in_flight)
+            task = loop.create_task(one(op))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        next_arrival += generator.rng.expovariate(rate)
+
+    window_end = started_at + duration
+    in_flight_at_end = recorder.in_flight
+    if tasks:
+        await asyncio.gather(*tasks)
+    drain = time.perf_counter() - window_end
+    await recorder.stop()
+    # Steady-state throughput: completions in the second half of the window,
+    # once the first slow requests (e.g. Gemini calls) have started landing
+    halfway = started_at + duration / 2
+    steady = sum(1 for done in finished_at if halfway <= done <= window_end)
+    flushes_after, bytes_after = disk_writes()
+
+    return {
+        "rate": rate,
+        "offered": issued / duration,
+        "completed": len(latencies),
+        "achieved": steady / (duration / 2),
+        "in_flight_at_end": in_flight_at_end,
+        "drain": drain,
+        "errors": errors,
+        "dropped": dropped,
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        "max_in_flight": recorder.max_in_flight,
+        "max_executor_backlog": recorder.max_executor_backlog,
+        "max_pool_acquired": recorder.max_pool_acquired,
+        "lag_p99": percentile(recorder.lags, 0.99),
+        "lag_max": max(recorder.lags, default=0.0),
+        "flushes": flushes_after - flushes_before,
+        "kib_written": (bytes_after - bytes_before) / 1024,
+    }
+
+
+def saturation_reason(step):
+    if step["achieved"] < step["offered"] * THROUGHPUT_FLOOR or step["dropped"]:
+        return "throughput below offered rate"
+    if step["drain"] > INTERACTION_DEADLINE:
+        return f"backlog of {step['in_flight_at_end']} took {step['drain']:.1f}s to drain"
+    if step["p99"] > INTERACTION_DEADLINE:
+        return f"p99 over the {INTERACTION_DEADLINE:.0f}s interaction window"
+    if step["lag_p99"] > LAG_LIMIT:
+        return f"event-loop lag p99 over {LAG_LIMIT * 1000:.0f}ms"
+    return None
+
+
+def print_step(step, sizes, stalls, rss_kib):
+    print(
+        f"{step['rate']:>7.0f}/s  offered {step['offered']:>7.1f}/s  achieved {step['achieved']:>7.1f}/s  "
+        f"p50 {step['p50'] * 1000:>8.1f}ms  p99 {step['p99'] * 1000:>8.1f}ms  "
+        f"done {step['completed']}  errors {step['errors']}  dropped {step['dropped']}"
+    )
+    print(
+        f"          in-flight max {step['max_in_flight']}  executor backlog max {step['max_executor_backlog']}  "
+        f"http pool max {step['max_pool_acquired']}  loop lag p99 {step['lag_p99'] * 1000:.1f}ms "
+        f"max {step['lag_max'] * 1000:.1f}ms  stalls {stalls}"
+    )
+    state = "  ".join(f"{name} {count} ({size / 1024:.0f} KiB)" for name, (count, size) in sizes.items())
+    print(f"          {state}  rss peak {rss_kib / 1024:.0f} MiB")
+    print(f"          disk: {step['flushes']} flushes, {step['kib_written']:.0f} KiB written")
+
+
+def parse_mix(text):
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown operation '{name}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def run_load(args):
+    rng = random.Random(args.seed)
+    harness = await Harness({
+        "gemini_delay": args.gemini_delay, "voice_monkey_delay": 0.02, "meme_delay": args.meme_delay,
+    }).start()
+    watchdog = LoopWatchdog()
+    watchdog.start()
+    try:
+        population = Population(args.users, args.guilds, args.channels, args.dm_fraction, rng)
+        generator = LoadGenerator(harness, population, parse_mix(args.mix), rng)
+        print(
+            f"{args.users} users, {args.guilds} guilds x {args.channels} channels, "
+            f"{args.dm_fraction:.0%} DMs, ops: {', '.join(generator.ops)}\n"
+        )
+
+        saturated_at = None
+        for rate in args.rates:
+            step = await run_step(generator, rate, args.duration, args.max_in_flight)
+            rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            print_step(step, state_sizes(harness), len(watchdog.recent_stalls), rss_kib)
+            reason = saturation_reason(step)
+            if reason:
+                saturated_at = (rate, reason)
+                print(f"          -> saturated: {reason}\n")
+                if not args.keep_going:
+                    break
+            else:
+                print()
+
+        if saturated_at:
+            print(f"Capacity ceiling: below {saturated_at[0]:.0f} ops/s ({saturated_at[1]})")
+        else:
+            print(f"No saturation up to {args.rates[-1]:.0f} ops/s")
+    finally:
+        watchdog.stop()
+        await harness.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the bot's cogs with synthetic traffic.")
+    parser.add_argument("--rates", default="25,50,100,200,400", help="Comma-separated arrival rates (ops/s) to step through")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per rate step")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--guilds", type=int, default=100)
+    parser.add_argument("--channels", type=int, default=3, help="Channels per guild")
+    parser.add_argument("--dm-fraction", type=float, default=0.2)
+    parser.add_argument("--mix", help="Operation weights, e.g. chat=5,lovenote=1 (default: a built-in mix)")
+    parser.add_argument("--gemini-delay", type=float, default=0.5, help="Stubbed Gemini latency in seconds")
+    parser.add_argument("--meme-delay", type=float, default=0.2, help="Stubbed meme-api latency in seconds")
+    parser.add_argument("--max-in-flight", type=int, default=5000, help="Arrivals beyond this many in flight are dropped")
+    parser.add_argument("--keep-going", action="store_true", help="Run every step even after saturating")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--log-level", default="CRITICAL", help="Bot log level (errors past saturation are very noisy)")
+    args = parser.parse_args()
+    os.environ["LOG_LEVEL"] = args.log_level
+    args.rates = [float(rate) for rate in args.rates.split(",")]
+    asyncio.run(run_load(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Memory report for the bot's long-lived in-memory models: bytes per object
+in the old layout (plain dicts / __dict__ instances holding discord objects)
+against the slotted models, plus the cost of converting each model to and
+from its on-disk format.
+
+    python -m benchmarks.memory_report
+    python -m benchmarks.memory_report -n 5000
+"""
+import argparse
+import datetime
+import json
+import time
+import types
+
+import countdowns
+import hangman
+from benchmarks.loadtest import deep_size
+from chat_turns import MODEL, USER, Turn
+from music_cog import Song
+
+DEFAULT_SAMPLES = 2000
+
+
+class _Member:
+    """Stands in for the discord.Member the old Song held (shared with the member cache, so not counted)."""
+
+    def __init__(self, member_id, name):
+        self.id = member_id
+        self.display_name = name
+
+
+def _samples(count):
+    """(name, [(before, after)], from_dict) for each model, with distinct strings per object."""
+    member = _Member(1234567890, "Naekko")
+    today = datetime.date.today()
+
+    songs = []
+    for i in range(count):
+        song = Song(f"https://rr{i}.googlevideo.com/videoplayback?id={i:016x}", f"Track number {i}",
+                    f"some song {i}", member.id, member.display_name)
+        old = types.SimpleNamespace(source=song.source, title=song.title, url=song.url, requester=member, offset=0.0)
+        songs.append((old, song))
+
+    turns = []
+    for i in range(count):
+        role = USER if i % 2 == 0 else MODEL
+        attachments = [(f"{i:064x}", f"photo{i}.png")] if i % 10 == 0 else ()
+        turn = Turn(role, f"Naekko: message number {i} about nothing much at all", attachments)
+        # json round trip: the old turns were freshly parsed dicts
+        turns.append((json.loads(json.dumps(turn.to_dict())), turn))
+
+    entries = []
+    for i in range(count):
+        entry = countdowns.make_entry(f"Event {i}", today + datetime.timedelta(days=i))
+        entries.append((json.loads(json.dumps(entry.to_dict())), entry))
+
+    games = []
+    for i in range(count // 10 or 1):
+        game = hangman.HangmanGame(f"SECRET PHRASE {i}", 1, 2, guessed_letters="SEC", channel_id=i)
+        # The same state as an instance with a __dict__
+        old = types.SimpleNamespace(**{name: getattr(game, name) for name in hangman.HangmanGame.__slots__})
+        games.append((old, game))
+
+    return [
+        ("Song", songs, Song.from_dict, {id(member)}),
+        ("Turn", turns, Turn.from_dict, set()),
+        ("Countdown", entries, countdowns.normalize, set()),
+        ("HangmanGame", games, hangman.HangmanGame.from_dict, set()),
+    ]
+
+
+def _per_object(objects, shared):
+    seen = set(shared)
+    return deep_size(objects, seen) / len(objects)
+
+
+def _per_call(function, items):
+    started_at = time.perf_counter()
+    for item in items:
+        function(item)
+    return (time.perf_counter() - started_at) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--samples", type=int, default=DEFAULT_SAMPLES, help="objects per model")
+    args = parser.parse_args()
+
+    header = f"{'model':<14}{'before B/obj':>14}{'after B/obj':>13}{'saved':>8}{'to_dict µs':>12}{'from_dict µs':>14}"
+    print(header)
+    print("-" * len(header))
+    for name, pairs, from_dict, shared in _samples(args.samples):
+        before = _per_object([old for old, _ in pairs], shared)
+        after = _per_object([new for _, new in pairs], shared)
+        models = [new for _, new in pairs]
+        stored = [model.to_dict() for model in models]
+        dump = _per_call(lambda model: model.to_dict(), models)
+        load = _per_call(from_dict, stored)
+        print(f"{name:<14}{before:>14.0f}{after:>13.0f}{1 - after / before:>8.0%}{dump:>12.2f}{load:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmarks for the bot's hot paths, run against fake Discord objects and
+local upstream stubs (no token, network or ffmpeg needed).
+
+    python -m benchmarks.run                                  # every scenario
+    python -m benchmarks.run -k couples -n 500 -c 8           # filter, ops, concurrency
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.harness import Harness
+from benchmarks.scenarios import REQUIRES, SCENARIOS
+
+ALLOC_SAMPLES = 50
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def measure(op, operations, concurrency):
+    """Runs `operations` ops split over `concurrency` workers; returns latencies and wall time."""
+    latencies = []
+    remaining = iter(range(operations))
+
+    async def worker():
+        for _ in remaining:
+            started_at = time.perf_counter()
+            await op()
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started_at
+
+
+async def measure_allocations(op, samples):
+    """Average peak traced memory (KiB) a single op allocates."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await op()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(max(0, peak - before) / 1024)
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks) if peaks else 0.0
+
+
+async def run_benchmarks(args):
+    harness = await Harness().start()
+    results = {}
+    try:
+        for name, factory in SCENARIOS.items():
+            if args.k and args.k not in name:
+                continue
+            required_cog = REQUIRES.get(name.split(".")[0])
+            if required_cog and harness.cog(required_cog) is None:
+                print(f"  skip {name}: {required_cog} not loaded", file=sys.stderr)
+                continue
+
+            op = factory(harness)
+            for _ in range(args.warmup):
+                await op()
+
+            latencies, wall = await measure(op, args.operations, args.concurrency)
+            alloc_kib = await measure_allocations(op, min(ALLOC_SAMPLES, args.operations))
+            results[name] = {
+                "ops": len(latencies),
+                "ops_per_sec": round(len(latencies) / wall, 1) if wall else 0.0,
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+                "alloc_kib_per_op": round(alloc_kib, 2),
+            }
+    finally:
+        await harness.stop()
+
+    for extension, error in harness.skipped.items():
+        print(f"  extension {extension} not loaded: {error}", file=sys.stderr)
+    return results
+
+
+def print_table(results, baseline=None):
+    header = f"{'scenario':<28}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'KiB/op':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, row in results.items():
+        line = f"{name:<28}{row['ops_per_sec']:>10}{row['p50_ms']:>10}{row['p99_ms']:>10}{row['alloc_kib_per_op']:>10}"
+        old = (baseline or {}).get(name)
+        if old:
+            line += "   " + "  ".join(
+                f"{key.split('_')[0]} {_change(old[key], row[key])}" for key in ("p50_ms", "p99_ms", "ops_per_sec")
+            )
+        print(line)
+
+
+def _change(old, new):
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def regressions(results, baseline, tolerance):
+    """Scenarios whose p50/p99 got slower (or throughput lower) than the baseline by more than tolerance."""
+    found = []
+    for name, row in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if old[key] and row[key] > old[key] * (1 + tolerance):
+                found.append(f"{name} {key}: {old[key]} -> {row[key]}")
+        if old["ops_per_sec"] and row["ops_per_sec"] < old["ops_per_sec"] * (1 - tolerance):
+            found.append(f"{name} ops_per_sec: {old['ops_per_sec']} -> {row['ops_per_sec']}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot's command handlers.")
+    parser.add_argument("-k", help="Only run scenarios whose name contains this")
+    parser.add_argument("-n", "--operations", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmarks(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if baseline is not None:
+        found = regressions(results, baseline, args.tolerance)
+        if found:
+            print("\nRegressions:\n  " + "\n  ".join(found))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import datetime
+import itertools
+import string
+
+from discord import app_commands
+
+from benchmarks.fakes import FakeChannel, FakeContext, FakeInteraction, FakeMessage, FakeUser
+
+# =========================================================================
+# SCENARIOS
+# Each scenario is a factory: it gets the Harness, does any one-off setup,
+# and returns an async callable that performs exactly one operation.
+# =========================================================================
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(factory):
+        SCENARIOS[name] = factory
+        return factory
+    return register
+
+
+def choice(value):
+    return app_commands.Choice(name=value, value=value)
+
+
+# --- AIChat ---
+
+@scenario("ai.on_message")
+def ai_on_message(harness):
+    cog = harness.cog("AIChat")
+    bot_user = harness.bot.user
+    author = FakeUser(name="Yuki")
+    channel = FakeChannel(guild=harness.guild)
+
+    async def op():
+        message = FakeMessage(f"<@{bot_user.id}> how are you?", author, channel, mentions=[bot_user])
+        await cog.on_message(message)
+    return op
+
+
+@scenario("ai.chat_slash")
+def ai_chat_slash(harness):
+    cog = harness.cog("AIChat")
+    user = FakeUser(name="Naekko")
+
+    async def op():
+        interaction = FakeInteraction(harness.bot, user=user, guild=harness.guild)
+        await cog.chat_slash.callback(cog, interaction, "tell me something nice")
+    return op
+
+
+# --- Couples ---
+
+@scenario("couples.list_add")
+def couples_list_add(harness):
+    cog = harness.cog("Couples")
+    counter = itertools.count()
+
+    async def op():
+        interaction = FakeInteraction(harness.bot, guild=harness.guild)
+        await cog.manage_list.callback(cog, interaction, choice("add"), "bench", f"movie {next(counter)}")
+    return op
+
+
+@scenario("couples.list_view_large")
+def couples_list_view_large(harness):
+    cog = harness.cog("Couples")
+    lists = cog.lists_for(FakeInteraction(harness.bot, guild=harness.guild)).lists
+    lists["bench-large"] = [f"Big list item number {i}" for i in range(5000)]
+
+    async def op():
+        interaction = FakeInteraction(harness.bot, guild=harness.guild)
+        await cog.manage_list.callback(cog, interaction, choice("view"), "bench-large", None)
+    return op
+
+
+@scenario("couples.lovenote")
+def couples_lovenote(harness):
+    cog = harness.cog("Couples")
+    user = FakeUser(name="Yuki")
+    counter = itertools.count()
+
+    async def op():
+        interaction = FakeInteraction(harness.bot, user=user, guild=harness.guild)
+        await cog.add_note.callback(cog, interaction, f"you're the best #{next(counter)} 💌")
+    return op
+
+
+@scenario("couples.openjar")
+def couples_openjar(harness):
+    cog = harness.cog("Couples")
+    user = FakeUser(name="Naekko")
+    setup = FakeInteraction(harness.bot, user=user, guild=harness.guild)
+
+    async def seed():
+        for i in range(200):
+            await cog.add_note.callback(cog, FakeInteraction(harness.bot, user=user, guild=harness.guild), f"seed note {i}")
+
+    async def op():
+        if not seed.done:
+            seed.done = True
+            await seed()
+        interaction = FakeInteraction(harness.bot, user=setup.user, guild=harness.guild)
+        await cog.open_jar.callback(cog, interaction)
+    seed.done = False
+    return op
+
+
+@scenario("couples.hangman_guess")
+def couples_hangman_guess(harness):
+    cog = harness.cog("Couples")
+    setter = FakeUser(name="Yuki")
+    guesser = FakeUser(name="Naekko")
+    channel = FakeChannel(guild=harness.guild)
+    state = {"game_id": None, "letters": iter(())}
+
+    async def new_game():
+        interaction = FakeInteraction(harness.bot, user=setter, channel=channel, guild=harness.guild)
+        await cog.hangman_slash.callback(cog, interaction, choice("start"), guesser, "the quick brown fox jumps over the lazy dog")
+        active = [game for game in cog.channel_hangman_games(str(channel.id)) if game.setter_id == setter.id]
+        state["game_id"] = active[0].game_id
+        state["letters"] = iter(string.ascii_uppercase)
+
+    async def op():
+        letter = next(state["letters"], None)
+        game = cog.hangman_games.get(state["game_id"]) if state["game_id"] else None
+        if letter is None or game is None or not game.is_active:
+            await new_game()
+            letter = next(state["letters"])
+        interaction = FakeInteraction(harness.bot, user=guesser, channel=channel, guild=harness.guild)
+        await cog.handle_hangman_press(interaction, state["game_id"], letter)
+    return op
+
+
+# --- FunCommands ---
+
+@scenario("fun.countdown_check")
+def fun_countdown_check(harness):
+    cog = harness.cog("FunCommands")
+    user = FakeUser(name="Yuki")
+    today = datetime.date.today()
+    cog.countdowns.replace(user.id, [
+        {"title": f"Event {i}", "date": (today + datetime.timedelta(days=i * 7 - 30)).isoformat()}
+        for i in range(20)
+    ])
+
+    async def op():
+        interaction = FakeInteraction(harness.bot, user=user, guild=harness.guild)
+        await cog.countdown_slash.callback(cog, interaction, choice("check"))
+    return op
+
+
+@scenario("fun.joke")
+def fun_joke(harness):
+    cog = harness.cog("FunCommands")
+
+    async def op():
+        await cog.joke_slash.callback(cog, FakeInteraction(harness.bot, guild=harness.guild))
+    return op
+
+
+@scenario("fun.hug")
+def fun_hug(harness):
+    cog = harness.cog("FunCommands")
+    partner = FakeUser(name="Naekko")
+
+    async def op():
+        await cog.hug_slash.callback(cog, FakeInteraction(harness.bot, guild=harness.guild), partner)
+    return op
+
+
+# --- WakeupCog ---
+
+@scenario("wakeup.wakeup")
+def wakeup_wakeup(harness):
+    cog = harness.cog("WakeupCog")
+    user = FakeUser(name="Naekko")
+
+    async def op():
+        interaction = FakeInteraction(harness.bot, user=user, guild=harness.guild)
+        await cog.wakeup.callback(cog, interaction, "Never Gonna Give You Up")
+    return op
+
+
+# --- MusicCog ---
+
+@scenario("music.play")
+def music_play(harness):
+    cog = harness.cog("MusicCog")
+    author = FakeUser(name="Yuki")
+    author.voice = type("VoiceState", (), {"channel": harness.voice_channel})()
+    counter = itertools.count()
+
+    async def op():
+        ctx = FakeContext(harness.bot, author=author, guild=harness.guild)
+        await cog.play_command.callback(cog, ctx, search_query=f"song {next(counter)}")
+        player = cog.players.get(harness.guild.id)
+        if player is not None and len(player.queue) > 200:
+            # Keep the queue bounded so later iterations measure the same thing
+            player.clear()
+    return op
+
+
+# Which cog each scenario needs, so missing optional cogs are skipped cleanly
+REQUIRES = {
+    "ai": "AIChat",
+    "couples": "Couples",
+    "fun": "FunCommands",
+    "wakeup": "WakeupCog",
+    "music": "MusicCog",
+}
@@ -0,0 +1,103 @@
+import asyncio
+import itertools
+from aiohttp import web
+
+# =========================================================================
+# LOCAL UPSTREAM STUBS
+# One aiohttp app on 127.0.0.1 that stands in for Gemini, Voice Monkey and
+# meme-api, each with a configurable artificial latency. The real
+# webserver.dynamic_song_trigger handler is mounted too, for callers
+# outside the bot (/wakeup goes to Voice Monkey directly).
+# =========================================================================
+
+HOST = "127.0.0.1"
+
+
+class UpstreamStubs:
+    def __init__(self, gemini_delay=0.05, voice_monkey_delay=0.02, meme_delay=0.03):
+        self.delays = {"gemini": gemini_delay, "voice_monkey": voice_monkey_delay, "meme": meme_delay}
+        self.hits = {"gemini": 0, "voice_monkey": 0, "meme": 0}
+        self._post_ids = itertools.count(1)
+        self._runner = None
+        self.port = None
+
+    @property
+    def base_url(self):
+        return f"http://{HOST}:{self.port}"
+
+    def env(self):
+        """Environment variables that point the bot's modules at these stubs."""
+        return {
+            "GEMINI_API_KEY": "bench-key",
+            "GEMINI_API_URL": f"{self.base_url}/gemini/generateContent",
+            "VOICE_MONKEY_BASE_URL": f"{self.base_url}/voicemonkey?token=bench",
+            "VOICE_MONKEY_URL": f"{self.base_url}/voicemonkey",
+            "MEME_API_BASE": f"{self.base_url}/gimme",
+            # Local, deterministic embeddings for the AI's memory index
+            "MEMORY_EMBEDDINGS": "hashing",
+        }
+
+    # --- Handlers ---
+
+    async def gemini(self, request):
+        self.hits["gemini"] += 1
+        payload = await request.json()
+        await asyncio.sleep(self.delays["gemini"])
+        turns = len(payload.get("contents", []))
+        return web.json_response({
+            "candidates": [{"content": {"role": "model", "parts": [{"text": f"stub reply after {turns} turns"}]}}]
+        })
+
+    async def voice_monkey(self, request):
+        self.hits["voice_monkey"] += 1
+        await asyncio.sleep(self.delays["voice_monkey"])
+        return web.json_response({"success": True})
+
+    def _meme(self, subreddit):
+        post_id = next(self._post_ids)
+        return {
+            "postLink": f"https://redd.it/stub{post_id}",
+            "subreddit": subreddit,
+            "title": f"Stub meme #{post_id}",
+            "url": f"https://i.redd.it/stub{post_id}.png",
+            "nsfw": False,
+            "spoiler": False,
+        }
+
+    async def meme(self, request):
+        self.hits["meme"] += 1
+        await asyncio.sleep(self.delays["meme"])
+        subreddit = request.match_info["subreddit"]
+        count = request.match_info.get("count")
+        if count is None:
+            return web.json_response(self._meme(subreddit))
+        memes = [self._meme(subreddit) for _ in range(min(int(count), 50))]
+        return web.json_response({"count": len(memes), "memes": memes})
+
+    async def song_trigger(self, request):
+        # The bot's real proxy handler; imported lazily because it reads
+        # VOICE_MONKEY_BASE_URL (which needs our port) at import time
+        import webserver
+        return await webserver.dynamic_song_trigger(request)
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/gemini/generateContent", self.gemini)
+        app.router.add_route("*", "/voicemonkey", self.voice_monkey)
+        app.router.add_get("/gimme/{subreddit}", self.meme)
+        app.router.add_get("/gimme/{subreddit}/{count:\\d+}", self.meme)
+        app.router.add_get("/dynamic-song-trigger", self.song_trigger)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, HOST, 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,50 @@
+# =========================================================================
+# CHAT HISTORY TURNS
+# One message in an AI chat history, kept as a slotted object instead of
+# Gemini's nested {"role", "parts": [{"text"}, {"attachment"}]} dicts.
+# Roles are shared constants and a turn without attachments shares the
+# empty tuple, so a 20-turn history is mostly just its text.
+#
+# to_dict()/from_dict() convert to and from the stored format (the shared
+# chat history store and the restart snapshot), which is unchanged.
+# =========================================================================
+
+USER = "user"
+MODEL = "model"
+
+
+class Turn:
+    __slots__ = ("role", "text", "attachments")
+
+    def __init__(self, role, text, attachments=()):
+        self.role = MODEL if role == MODEL else USER
+        self.text = text
+        # ((sha256, filename), ...) of images kept in the AttachmentCache
+        self.attachments = tuple(attachments) if attachments else ()
+
+    def __repr__(self):
+        return f"Turn({self.role!r}, {self.text[:40]!r}, attachments={len(self.attachments)})"
+
+    @classmethod
+    def from_dict(cls, data):
+        texts, attachments = [], []
+        for part in data.get("parts", ()):
+            if "text" in part:
+                texts.append(part["text"])
+            elif "attachment" in part:
+                attachments.append((part["attachment"]["sha256"], part["attachment"]["filename"]))
+        return cls(data.get("role"), "\n".join(texts), attachments)
+
+    def to_dict(self):
+        parts = [{"text": self.text}] if self.text else []
+        parts.extend({"attachment": {"sha256": digest, "filename": filename}} for digest, filename in self.attachments)
+        return {"role": self.role, "parts": parts}
+
+
+def load_history(turns):
+    """Stored turns (or Turns already) -> list of Turns."""
+    return [Turn.from_dict(turn) if isinstance(turn, dict) else turn for turn in turns or ()]
+
+
+def dump_history(turns):
+    return [turn.to_dict() for turn in turns]
@@ -0,0 +1,111 @@
+import logging
+import time
+import discord
+from discord import app_commands
+from discord.ext import commands
+import deadlines
+import metrics
+from logging_setup import set_request_context
+from ratelimit import RateLimited, send_cooldown
+from sharding import shard_id_for
+from shutdown import RESTARTING_MESSAGE, lifecycle
+
+logger = logging.getLogger('Commands')
+
+# =========================================================================
+# COMMAND TREE + HOOKS
+# Framework-level wrappers that every command goes through, so cogs don't
+# have to instrument each handler by hand.
+# =========================================================================
+
+
+def _command_name(interaction: discord.Interaction):
+    return interaction.command.qualified_name if interaction.command else "unknown"
+
+
+def _finished(interaction: discord.Interaction):
+    deadlines.release(interaction)
+    if interaction.extras.pop("in_flight", False):
+        lifecycle.end()
+
+
+class BotTree(app_commands.CommandTree):
+    """CommandTree that times every application command, defers the slow ones and turns them away while shutting down."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.type is discord.InteractionType.autocomplete:
+            # Suggestions are quick and can't be answered with a message, so they're not tracked
+            return not lifecycle.draining
+        if lifecycle.draining:
+            await interaction.response.send_message(RESTARTING_MESSAGE, ephemeral=True)
+            return False
+        # Counted until on_app_command_completion or on_error (see shutdown.py)
+        lifecycle.begin()
+        interaction.extras["in_flight"] = True
+        interaction.extras["started_at"] = time.perf_counter()
+        # Defers on the handler's behalf if it hasn't answered in time (see deadlines.py)
+        deadlines.guard(interaction)
+        binding = getattr(interaction.command, "binding", None)
+        set_request_context(
+            cog=type(binding).__name__ if binding else None,
+            command=_command_name(interaction),
+            guild=interaction.guild_id,
+            shard=shard_id_for(interaction.client, interaction.guild_id),
+            request_id=interaction.id
+        )
+        metrics.INTERACTION_AGE.observe(metrics.interaction_age(interaction), command=_command_name(interaction))
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        _finished(interaction)
+        if isinstance(error, RateLimited):
+            # Not a failure: just tell the user when to come back
+            await send_cooldown(interaction, error.retry_after)
+            return
+        started_at = interaction.extras.get("started_at")
+        if started_at is not None:
+            metrics.COMMAND_DURATION.observe(time.perf_counter() - started_at, command=_command_name(interaction), kind="app")
+        metrics.COMMAND_ERRORS.inc(command=_command_name(interaction), kind="app")
+        await super().on_error(interaction, error)
+
+
+def install_hooks(bot: commands.Bot):
+    """Hooks prefix commands and app command completions into the metrics, and answers rate-limited prefix commands."""
+
+    @bot.event
+    async def on_command_error(ctx: commands.Context, error: commands.CommandError):
+        if isinstance(error, RateLimited):
+            await ctx.send(error.friendly(), delete_after=max(5, error.retry_after))
+            return
+        # Everything else gets discord.py's default handling (logging the traceback)
+        await commands.bot.BotBase.on_command_error(bot, ctx, error)
+
+    @bot.listen("on_app_command_completion")
+    async def record_app_command(interaction: discord.Interaction, command):
+        _finished(interaction)
+        started_at = interaction.extras.get("started_at")
+        if started_at is not None:
+            latency = time.perf_counter() - started_at
+            metrics.COMMAND_DURATION.observe(latency, command=command.qualified_name, kind="app")
+            logger.info("Command completed", extra={"latency": round(latency, 4)})
+
+    @bot.before_invoke
+    async def start_prefix_timer(ctx: commands.Context):
+        ctx.started_at = time.perf_counter()
+        set_request_context(
+            cog=ctx.cog.qualified_name if ctx.cog else None,
+            command=ctx.command.qualified_name if ctx.command else None,
+            guild=ctx.guild.id if ctx.guild else None,
+            shard=ctx.guild.shard_id if ctx.guild else 0,
+            request_id=ctx.message.id
+        )
+
+    @bot.after_invoke
+    async def record_prefix_command(ctx: commands.Context):
+        started_at = getattr(ctx, "started_at", None)
+        if started_at is not None and ctx.command is not None:
+            latency = time.perf_counter() - started_at
+            metrics.COMMAND_DURATION.observe(latency, command=ctx.command.qualified_name, kind="prefix")
+            logger.info("Command completed", extra={"latency": round(latency, 4)})
+        if ctx.command_failed and ctx.command is not None:
+            metrics.COMMAND_ERRORS.inc(command=ctx.command.qualified_name, kind="prefix")
@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import random
+import time
+import discord
+
+logger = logging.getLogger('Content')
+
+# =========================================================================
+# CONTENT REGISTRY
+# Jokes, truths, dares and the hug/kiss GIFs live in a JSON file instead of
+# in code. Every item's embed is built once when the file is (re)loaded, so
+# a command just picks one; the file is re-read whenever its mtime changes
+# (checked at most every RELOAD_CHECK_INTERVAL seconds), no restart needed.
+#
+# File format, one entry per category:
+#   "joke": {"title": ..., "color": "gold" or "#rrggbb", "format": "**{item}**", "items": [...]}
+#   "hug":  {"title": ..., "color": ..., "description": "{author} hugs {target}",
+#            "self_message": ..., "gifs": [...]}
+# =========================================================================
+
+RELOAD_CHECK_INTERVAL = 5
+
+
+def parse_color(value):
+    """A discord.Color from a classmethod name ("gold") or a hex string ("#ffb300")."""
+    if isinstance(value, str) and value.startswith("#"):
+        return discord.Color(int(value[1:], 16))
+    factory = getattr(discord.Color, str(value), None)
+    if not callable(factory):
+        raise ValueError(f"unknown color {value!r}")
+    return factory()
+
+
+class ItemCategory:
+    """A category of plain items (jokes, truths, ...) with one ready-made embed each."""
+
+    def __init__(self, spec):
+        color = parse_color(spec.get("color", "default"))
+        template = spec.get("format", "{item}")
+        self.embeds = tuple(
+            discord.Embed(title=spec["title"], description=template.format(item=item), color=color)
+            for item in spec["items"]
+        )
+
+    def __len__(self):
+        return len(self.embeds)
+
+    def pick(self):
+        return random.choice(self.embeds) if self.embeds else None
+
+
+class InteractionCategory:
+    """A hug/kiss-style category: one embed template per GIF, with the people filled in per call."""
+
+    def __init__(self, spec):
+        color = parse_color(spec.get("color", "default"))
+        self.description = spec["description"]
+        self.self_message = spec.get("self_message") or "That's you, silly! 🙈"
+        self.templates = tuple(
+            discord.Embed(title=spec["title"], color=color).set_image(url=gif)
+            for gif in spec["gifs"]
+        )
+
+    def __len__(self):
+        return len(self.templates)
+
+    def build(self, author, target):
+        if not self.templates:
+            return None
+        embed = random.choice(self.templates).copy()
+        embed.description = self.description.format(author=author.mention, target=target.mention)
+        return embed
+
+
+class ContentRegistry:
+    def __init__(self, filename):
+        self.filename = filename
+        self.categories = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self.reload()
+
+    def reload(self):
+        """Re-reads the file; a broken file is logged and the previous content kept."""
+        try:
+            # Remember the mtime even if parsing fails, so a broken file is reported once
+            self._mtime = os.stat(self.filename).st_mtime_ns
+            with open(self.filename, "r") as f:
+                data = json.load(f)
+            categories = {}
+            for name, spec in data.items():
+                categories[name] = InteractionCategory(spec) if "gifs" in spec else ItemCategory(spec)
+        except FileNotFoundError:
+            logger.error(f"Content file {self.filename} is missing")
+            return False
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.error(f"Couldn't load {self.filename}, keeping the previous content: {e}")
+            return False
+        self.categories = categories
+        logger.info(f"Loaded {self.filename}: " + ", ".join(f"{len(c)} {name}" for name, c in categories.items()))
+        return True
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.filename).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+    def get(self, name):
+        self.maybe_reload()
+        return self.categories.get(name)
@@ -0,0 +1,219 @@
+# =========================================================================
+# COUNTDOWNS
+# Each entry stores its date as a pre-parsed ordinal (days since
+# 0001-01-01), and every user's entries are kept sorted by that ordinal,
+# so checking them is a plain walk with no date parsing and passed events
+# can be archived by cutting a prefix off the list. Entries are slotted
+# Countdown objects in memory and {"id", "title", "date", "ordinal"} dicts
+# on disk.
+# =========================================================================
+
+import bisect
+import datetime
+import secrets
+
+DATE_FORMAT = "%Y-%m-%d"
+MAX_PER_USER = 100
+# Only the most recent passed events are kept per user
+MAX_ARCHIVED_PER_USER = 100
+MAX_TITLE_LENGTH = 100
+
+
+def parse_date(text):
+    """YYYY-MM-DD -> datetime.date (raises ValueError)."""
+    return datetime.datetime.strptime(text.strip(), DATE_FORMAT).date()
+
+
+def new_countdown_id():
+    return secrets.token_hex(3)
+
+
+class Countdown:
+    """One countdown. The date is kept only as its ordinal; `date` rebuilds the text."""
+
+    __slots__ = ("id", "title", "ordinal")
+
+    def __init__(self, countdown_id, title, ordinal):
+        self.id = countdown_id
+        self.title = title
+        self.ordinal = ordinal
+
+    @property
+    def date(self):
+        return datetime.date.fromordinal(self.ordinal).isoformat()
+
+    def with_id(self, countdown_id):
+        return Countdown(countdown_id, self.title, self.ordinal)
+
+    def to_dict(self):
+        return {"id": self.id, "title": self.title, "date": self.date, "ordinal": self.ordinal}
+
+
+def make_entry(title, date, countdown_id=None):
+    """A stored countdown; `date` is a datetime.date."""
+    return Countdown(countdown_id or new_countdown_id(), str(title)[:MAX_TITLE_LENGTH], date.toordinal())
+
+
+def normalize(entry):
+    """A Countdown from a stored dict, including ones from older files (raises ValueError/KeyError)."""
+    if isinstance(entry, Countdown):
+        return entry
+    if "ordinal" in entry and "id" in entry:
+        return Countdown(entry["id"], entry["title"], int(entry["ordinal"]))
+    return make_entry(entry.get("title") or "Special Day", parse_date(entry["date"]), entry.get("id"))
+
+
+def normalize_all(entries):
+    """(Countdowns, number of unreadable entries dropped)."""
+    valid, skipped = [], 0
+    for entry in entries or ():
+        try:
+            valid.append(normalize(entry))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            skipped += 1
+    return valid, skipped
+
+
+def _sort_key(entry):
+    return entry.ordinal, entry.id
+
+
+class CountdownBook:
+    """user id -> countdowns sorted by date, plus each user's archive of passed ones."""
+
+    def __init__(self, countdowns=None, archive=None):
+        self.entries = {}
+        # user id -> sorted [(ordinal, id)] for bisect, parallel to self.entries
+        self._keys = {}
+        self.archive = {}
+        self.skipped = 0
+        for user_id, entries in (countdowns or {}).items():
+            self.replace(user_id, entries)
+        for user_id, entries in (archive or {}).items():
+            self.replace_archive(user_id, entries)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.entries.values())
+
+    def get(self, user_id):
+        return self.entries.get(str(user_id), [])
+
+    def replace(self, user_id, entries):
+        """Sets a user's countdowns wholesale (loading, or a change from another worker)."""
+        user_id = str(user_id)
+        # Unparseable dates are dropped once here instead of on every check
+        valid, skipped = normalize_all(entries)
+        self.skipped += skipped
+        if not valid:
+            self.entries.pop(user_id, None)
+            self._keys.pop(user_id, None)
+            return
+        valid.sort(key=_sort_key)
+        self.entries[user_id] = valid
+        self._keys[user_id] = [_sort_key(entry) for entry in valid]
+
+    def replace_archive(self, user_id, entries):
+        """Sets a user's archive wholesale (None or empty removes it)."""
+        valid, _ = normalize_all(entries)
+        if valid:
+            self.archive[str(user_id)] = valid
+        else:
+            self.archive.pop(str(user_id), None)
+
+    def add(self, user_id, entry):
+        """Inserts an entry in date order. Returns False if the user is at MAX_PER_USER."""
+        user_id = str(user_id)
+        entries = self.entries.setdefault(user_id, [])
+        if len(entries) >= MAX_PER_USER:
+            return False
+        keys = self._keys.setdefault(user_id, [])
+        position = bisect.bisect(keys, _sort_key(entry))
+        keys.insert(position, _sort_key(entry))
+        entries.insert(position, entry)
+        return True
+
+    def add_many(self, user_id, entries):
+        """Bulk insert (import): one sort instead of an insert per entry. Returns how many were added."""
+        user_id = str(user_id)
+        current = self.entries.get(user_id, [])
+        known = {entry.id for entry in current}
+        room = MAX_PER_USER - len(current)
+        added = []
+        for entry in entries:
+            if len(added) >= room:
+                break
+            if entry.id in known:
+                entry = entry.with_id(new_countdown_id())
+            known.add(entry.id)
+            added.append(entry)
+        if added:
+            self.replace(user_id, current + added)
+        return len(added)
+
+    def remove(self, user_id, countdown_id):
+        """Deletes one countdown by id; returns it (or None)."""
+        user_id = str(user_id)
+        for position, entry in enumerate(self.entries.get(user_id, ())):
+            if entry.id == countdown_id:
+                del self.entries[user_id][position]
+                del self._keys[user_id][position]
+                if not self.entries[user_id]:
+                    self.clear(user_id)
+                return entry
+        return None
+
+    def clear(self, user_id):
+        """Deletes all of a user's countdowns; returns how many there were."""
+        self._keys.pop(str(user_id), None)
+        return len(self.entries.pop(str(user_id), []))
+
+    def sweep(self, today=None):
+        """Moves every countdown dated before today into its owner's archive. Returns the changed user ids."""
+        cutoff = ((today or datetime.date.today()).toordinal(), "")
+        changed = []
+        for user_id, keys in list(self._keys.items()):
+            position = bisect.bisect_left(keys, cutoff)
+            if not position:
+                continue
+            passed = self.entries[user_id][:position]
+            del self.entries[user_id][:position]
+            del keys[:position]
+            archive = self.archive.setdefault(user_id, [])
+            archive.extend(passed)
+            del archive[:-MAX_ARCHIVED_PER_USER]
+            if not keys:
+                self.clear(user_id)
+            changed.append(user_id)
+        return changed
+
+    def export(self, user_id):
+        """A user's countdowns and archive, in the format import accepts."""
+        return {
+            "countdowns": [entry.to_dict() for entry in self.get(user_id)],
+            "archive": [entry.to_dict() for entry in self.archive.get(str(user_id), [])],
+        }
+
+    def snapshot(self):
+        return {user_id: [entry.to_dict() for entry in entries] for user_id, entries in self.entries.items()}
+
+    def archive_snapshot(self):
+        return {user_id: [entry.to_dict() for entry in entries] for user_id, entries in self.archive.items()}
+
+
+def parse_import(data):
+    """
+    Entries from an uploaded file: either an export ({"countdowns": [...]})
+    or a plain list of {"title", "date"}. Returns (entries, number skipped).
+    """
+    if isinstance(data, dict):
+        data = data.get("countdowns", [])
+    if not isinstance(data, list):
+        raise ValueError("expected a list of countdowns")
+    entries, skipped = [], 0
+    for item in data:
+        try:
+            # Always re-parse (an uploaded file's ordinals can't be trusted) and give it a fresh id
+            entries.append(make_entry(item.get("title") or "Special Day", parse_date(item["date"])))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            skipped += 1
+    return entries, skipped
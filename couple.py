@@ -2,83 +2,249 @@ import discord
 from discord.ext import commands
 from discord import app_commands, ui
 import random
-import json
-import os
 import string
 import asyncio
-
-LOVE_JAR_FILE = "love_jar.json"
-SHARED_LISTS_FILE = "shared_lists.json"
+import hashlib
+import logging
+import os
+import paginator
+import partitions
+import ratelimit
+import hangman
+import love_jar
+import storage
+from storage import AppendLog, DebouncedWriter
+from memory_index import memory
+
+logger = logging.getLogger('Couples')
+
+LOVE_JAR_FILE = "love_jar.json" # Old format: one JSON list, rewritten on every note
+LOVE_JAR_LOG = "love_jar.jsonl" # Old format: one global append-only log
+SHARED_LISTS_FILE = "shared_lists.json" # Old format: one global file
+# Lists and notes now live per guild / couple (see partitions.py). The old
+# global data moves into this scope once (e.g. LEGACY_SCOPE=guild-1234);
+# until it's set, the old data stays where it is
+LEGACY_SCOPE = os.getenv("LEGACY_SCOPE")
 HANGMAN_FILE = "hangman_games.json" # New file for Hangman state
+HANGMAN_STATS_FILE = "hangman_stats.json"
+MAX_GAMES_PER_CHANNEL = 10
+BUTTON_LETTERS = string.ascii_uppercase[:20]
+SELECT_LETTERS = string.ascii_uppercase[20:]
 
 # =========================================================================
-# HANGMAN GAME VIEW (Buttons)
-# This view manages the interactive letter buttons for guessing.
+# HANGMAN GAME BUTTONS
+# Each letter button carries its game id in the custom_id
+# (e.g. "hangman:1f9a04c2:A"), so any number of games can share a channel.
+# A message holds at most 25 components, so A-T are buttons and U-Z are a
+# dropdown on the last row.
+# The button classes are registered once in setup() and look the game up
+# lazily when pressed, which also keeps them working after a restart.
 # =========================================================================
 
-class HangmanGameView(ui.View):
-    def __init__(self, cog, channel_id, game_data):
-        super().__init__(timeout=None)
-        self.cog = cog
-        self.channel_id = channel_id
-        self.game_data = game_data # Reference to the current game state
+class HangmanLetterButton(ui.DynamicItem[ui.Button], template=r"hangman:(?P<game_id>[0-9a-f]+):(?P<letter>[A-Z])"):
+    def __init__(self, game_id, letter):
+        self.game_id = game_id
+        self.letter = letter
+        super().__init__(
+            ui.Button(
+                label=letter,
+                style=discord.ButtonStyle.secondary,
+                custom_id=f"hangman:{game_id}:{letter}"
+            )
+        )
 
-        # Create buttons for all letters A-Z
-        for letter in string.ascii_uppercase:
-            is_guessed = letter in self.game_data['guessed_letters']
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        return cls(match["game_id"], match["letter"])
 
-            button = ui.Button(
-                label=letter,
-                style=discord.ButtonStyle.secondary if not is_guessed else discord.ButtonStyle.green if letter in self.game_data['word'] else discord.ButtonStyle.danger,
-                custom_id=f"hangman_{letter}",
-                disabled=is_guessed or self.game_data['status'] != 'active'
+    async def interaction_check(self, interaction: discord.Interaction):
+        # Every guess re-renders the board and rewrites the games file
+        return await ratelimit.check_interaction("hangman_guess", interaction)
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("Couples")
+        if cog is not None:
+            await cog.handle_hangman_press(interaction, self.game_id, self.letter)
+
+
+class HangmanLetterSelect(ui.DynamicItem[ui.Select], template=r"hangman:(?P<game_id>[0-9a-f]+):pick"):
+    """Discord allows 25 components per message, so the last letters live in a dropdown."""
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        super().__init__(
+            ui.Select(
+                placeholder="More letters…",
+                custom_id=f"hangman:{game_id}:pick",
+                options=[discord.SelectOption(label=letter, value=letter) for letter in SELECT_LETTERS]
             )
-            # Assign the callback function
-            button.callback = self.button_callback
-            self.add_item(button)
-
-    # Overwrite the default add_item to control row layout
-    def add_item(self, item: discord.ui.Item):
-        # 26 letters in total, 7 per row (4 rows of 7, 1 row of 2)
-        if len(self.children) < 7:
-            item.row = 0
-        elif len(self.children) < 14:
-            item.row = 1
-        elif len(self.children) < 21:
-            item.row = 2
-        else:
-            item.row = 3
-        super().add_item(item)
+        )
 
-    async def button_callback(self, interaction: discord.Interaction):
-        # Check if it's the right person guessing
-        if interaction.user.id != self.game_data['guesser_id']:
-            await interaction.response.send_message("❌ It's not your turn to guess, or you are not the designated guesser!", ephemeral=True)
-            return
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Select, match):
+        return cls(match["game_id"])
 
-        # Get the letter from the custom_id (e.g., "hangman_A")
-        letter = interaction.data['custom_id'].split('_')[1]
+    async def interaction_check(self, interaction: discord.Interaction):
+        return await ratelimit.check_interaction("hangman_guess", interaction)
 
-        # Process the guess and get the result message
-        result_message = await self.cog.process_hangman_guess(self.channel_id, letter)
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("Couples")
+        if cog is not None and interaction.data.get("values"):
+            await cog.handle_hangman_press(interaction, self.game_id, interaction.data["values"][0])
 
-        # Update the message with the new view and content
-        updated_embed = self.cog.create_hangman_embed(self.channel_id)
 
-        # Recreate the view to update disabled state and color
-        updated_view = HangmanGameView(self.cog, self.channel_id, self.game_data)
+def build_hangman_view(game_id):
+    """Builds the letter buttons (5 per row) plus the dropdown for the rest of the alphabet."""
+    view = ui.View(timeout=None)
+    buttons = {}
+    for index, letter in enumerate(BUTTON_LETTERS):
+        button = HangmanLetterButton(game_id, letter)
+        button.row = index // 5
+        view.add_item(button)
+        buttons[letter] = button.item
+    select = HangmanLetterSelect(game_id)
+    select.row = 4
+    view.add_item(select)
+    return view, buttons, select.item
 
-        await interaction.response.edit_message(embed=updated_embed, view=updated_view)
 
-        # If the game is over, send a final celebratory/sad message
-        if self.game_data['status'] != 'active':
-            await interaction.followup.send(result_message)
-            # Remove game state
-            await self.cog.delete_hangman_game(self.channel_id)
-            return
+# =========================================================================
+# PER-SCOPE LISTS AND LOVE JARS
+# Each guild / couple gets its own lists file and love jar log under
+# DATA_DIR, loaded when first used and dropped again when idle, so a write
+# only touches that scope's data (see partitions.py).
+# =========================================================================
+
+def list_memories(list_name, items):
+    """A list's items as {key: text} for the AI's memory index."""
+    return {
+        f"list:{list_name}:{hashlib.sha1(item.encode()).hexdigest()[:12]}": f"On our {list_name} list: {item}"
+        for item in items
+    }
+
+
+def note_memory(note):
+    """A note as {key: text} for the AI's memory index; notes for one person only aren't indexed."""
+    # The scope's index is searched for whoever is chatting, so it could hand a private note to anyone
+    if note.get("recipient_id"):
+        return {}
+    return {f"note:{note['id']}": f"Love note from {note['user']}: {note['text']}"}
 
-        # Send a follow-up message with the result (e.g., "Correct!" or "Wrong!")
-        await interaction.followup.send(f"{interaction.user.mention}, {result_message}", ephemeral=False)
+
+def jar_memories(notes):
+    memories = {}
+    for note in notes:
+        memories.update(note_memory(note))
+    return memories
+
+
+def _read_notes(filename):
+    if storage.shared_store() is not None:
+        return list(storage.load_json(filename, {}).values())
+    return AppendLog(filename).read()
+
+
+class SharedListsPartition:
+    """One scope's {list name: [items]}."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.filename = partitions.partition_path("shared_lists", scope)
+        self.lists = storage.load_json(self.filename, {})
+        storage.watch(self.filename, self._changed)
+
+    @staticmethod
+    def read(scope):
+        """A scope's lists straight from storage, without loading the partition."""
+        filename = partitions.partition_path("shared_lists", scope)
+        try:
+            return storage.load_json(filename, {})
+        finally:
+            storage.release(filename)
+
+    def save(self, list_name):
+        """Persists the lists and drops the cached pages of the changed list."""
+        storage.save_json(self.filename, self.lists)
+        paginator.invalidate("list", f"{self.scope}:{list_name}")
+        self.remember(list_name)
+
+    def remember(self, list_name):
+        """Refreshes the list in the AI's memory index (once per burst of changes)."""
+        memory.sync_later(self.scope, f"list:{list_name}", lambda: list_memories(list_name, self.lists.get(list_name, [])))
+
+    def _changed(self, changes):
+        for list_name, items in changes.items():
+            if items is None:
+                self.lists.pop(list_name, None)
+            else:
+                self.lists[list_name] = items
+            paginator.invalidate("list", f"{self.scope}:{list_name}")
+            self.remember(list_name)
+
+    async def flush(self):
+        # Every change is saved as it happens
+        pass
+
+    def release(self):
+        storage.unwatch(self.filename, self._changed)
+        storage.release(self.filename)
+        paginator.invalidate("list", prefix=f"{self.scope}:")
+
+    def close_sync(self):
+        self.release()
+
+
+class LoveJarPartition:
+    """One scope's love jar, backed by its own append-only log."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.filename = partitions.partition_path("love_jar", scope, "jsonl")
+        self.log = AppendLog(self.filename)
+        self.jar = love_jar.LoveJar(sorted(_read_notes(self.filename), key=lambda note: note["ts"]))
+        storage.watch(self.filename, self._changed)
+        # Also drops recipient-only notes indexed before they were kept out of the index
+        memory.sync_later(scope, "love_jar", lambda: jar_memories(self.jar.notes))
+
+    @staticmethod
+    def read(scope):
+        """A scope's notes straight from storage, without loading the partition."""
+        filename = partitions.partition_path("love_jar", scope, "jsonl")
+        try:
+            return _read_notes(filename)
+        finally:
+            storage.release(filename)
+
+    def add(self, note):
+        self.jar.add(note)
+        self.save_notes([note])
+        paginator.invalidate("jar_search", prefix=f"{self.scope}:")
+        memory.add(self.scope, "love_jar", note_memory(note))
+
+    def save_notes(self, notes):
+        if storage.shared_store() is not None:
+            storage.save_json_entries(self.filename, {note["id"]: note for note in notes})
+        else:
+            for note in notes:
+                self.log.append(note)
+
+    def _changed(self, changes):
+        for note in changes.values():
+            if note is not None and self.jar.add(note):
+                paginator.invalidate("jar_search", prefix=f"{self.scope}:")
+                memory.add(self.scope, "love_jar", note_memory(note))
+
+    async def flush(self):
+        await self.log.flush()
+
+    def release(self):
+        storage.unwatch(self.filename, self._changed)
+        storage.release(self.filename)
+        paginator.invalidate("jar_search", prefix=f"{self.scope}:")
+
+    def close_sync(self):
+        self.log.flush_sync()
+        self.release()
 
 
 # =========================================================================
@@ -90,198 +256,371 @@ class Couples(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.love_jar = self.load_json(LOVE_JAR_FILE, default_type=[])
-        self.shared_lists = self.load_json(SHARED_LISTS_FILE, default_type={})
-        self.hangman_games = self.load_json(HANGMAN_FILE, default_type={})
+        # scope -> SharedListsPartition / LoveJarPartition, loaded on demand
+        self._legacy_checked = False
+        self.shared_lists = partitions.PartitionCache("shared_lists", self._open_lists)
+        self.love_jars = partitions.PartitionCache("love_jar", self._open_jar)
+        # game_id -> HangmanGame, plus a channel_id -> {game_id} index
+        self.hangman_games = {}
+        self.hangman_channels = {}
+        for game_id, data in self.load_json(HANGMAN_FILE, default_type={}).items():
+            if "channel_id" not in data:
+                # Old format was keyed by channel, one game each
+                data["channel_id"] = game_id
+            self.add_hangman_game(hangman.HangmanGame.from_dict(data, game_id=game_id))
+        # Guesses only mark the file dirty; it's rewritten once things go quiet
+        self.hangman_store = DebouncedWriter(
+            HANGMAN_FILE,
+            lambda: {game_id: game.to_dict() for game_id, game in self.hangman_games.items()}
+        )
+        # game_id -> (view, {letter: button}, select), built on first render and then restyled in place
+        self.hangman_views = {}
+
+        # user_id -> {"wins": n, "losses": n}, updated as games finish
+        self.hangman_stats = self.load_json(HANGMAN_STATS_FILE, default_type={})
+        self.hangman_stats_store = DebouncedWriter(HANGMAN_STATS_FILE, lambda: dict(self.hangman_stats))
+        self._hangman_leaderboard = None
+
+        paginator.register_source("list", self.list_page_source)
+        paginator.register_source("hangman_stats", self.hangman_stats_page_source)
+        paginator.register_source("jar_search", self.jar_search_page_source)
+
+        # In cluster mode other worker processes write these stores too
+        # (partitions watch their own files)
+        self._watchers = {
+            HANGMAN_FILE: self._hangman_games_changed,
+            HANGMAN_STATS_FILE: self._hangman_stats_changed,
+        }
+        for filename, callback in self._watchers.items():
+            storage.watch(filename, callback)
+
+        # What the AI chat may remember about a scope (see memory_index.py)
+        memory.register_source("love_jar", self.jar_memory_source)
+        memory.register_source("lists", self.list_memory_source)
+
+    async def cog_unload(self):
+        for filename, callback in self._watchers.items():
+            storage.unwatch(filename, callback)
+        memory.unregister_source("love_jar")
+        memory.unregister_source("lists")
+        for store in (self.hangman_store, self.hangman_stats_store):
+            if store.dirty:
+                await store.flush()
+        await self.shared_lists.close()
+        await self.love_jars.close()
 
     # Utility method for loading/saving JSON data
     def load_json(self, filename, default_type):
-        if not os.path.exists(filename):
-            return default_type
-        try:
-            with open(filename, "r") as f:
-                return json.load(f)
-        except:
-            return default_type
+        return storage.load_json(filename, default_type)
 
     def save_json(self, filename, data):
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=4)
+        storage.save_json(filename, data)
+
+    # --- Changes written by other worker processes (cluster mode only) ---
+
+    def _hangman_games_changed(self, changes):
+        for game_id, data in changes.items():
+            self.forget_hangman_game(game_id)
+            if data is not None:
+                self.add_hangman_game(hangman.HangmanGame.from_dict(data, game_id=game_id))
+
+    def _hangman_stats_changed(self, changes):
+        for user_id, stats in changes.items():
+            if stats is None:
+                self.hangman_stats.pop(user_id, None)
+            else:
+                self.hangman_stats[user_id] = stats
+        self._hangman_leaderboard = None
+        paginator.invalidate("hangman_stats")
+
+    # --- Per-scope partitions ---
+
+    def _open_lists(self, scope):
+        self.migrate_legacy(scope)
+        return SharedListsPartition(scope)
+
+    def _open_jar(self, scope):
+        self.migrate_legacy(scope)
+        return LoveJarPartition(scope)
+
+    def lists_for(self, interaction: discord.Interaction):
+        return self.shared_lists.get(partitions.scope_for(interaction))
+
+    def jar_for(self, interaction: discord.Interaction):
+        return self.love_jars.get(partitions.scope_for(interaction))
+
+    def jar_memory_source(self, scope):
+        # Backfills read storage unless the scope is loaded anyway, so they don't evict active scopes
+        partition = self.love_jars.peek(scope)
+        notes = partition.jar.notes if partition is not None else LoveJarPartition.read(scope)
+        return {"love_jar": jar_memories(notes)}
+
+    def list_memory_source(self, scope):
+        partition = self.shared_lists.peek(scope)
+        lists = partition.lists if partition is not None else SharedListsPartition.read(scope)
+        return {f"list:{list_name}": list_memories(list_name, items) for list_name, items in lists.items()}
+
+    def migrate_legacy(self, scope):
+        """Moves the old global lists and love jar into LEGACY_SCOPE, once."""
+        if self._legacy_checked or (LEGACY_SCOPE and scope != LEGACY_SCOPE):
+            return
+        self._legacy_checked = True
+        shared = storage.shared_store() is not None
+
+        lists = storage.load_json(SHARED_LISTS_FILE, {})
+        legacy_log = AppendLog(LOVE_JAR_LOG)
+        notes = list(storage.load_json(LOVE_JAR_LOG, {}).values()) if shared else legacy_log.read()
+        if not notes:
+            notes = love_jar.LoveJar(storage.load_json(LOVE_JAR_FILE, [])).notes
+        if not lists and not notes:
+            return
+        if not LEGACY_SCOPE:
+            logger.warning(
+                f"Found {len(lists)} shared lists and {len(notes)} love notes in the old global stores; "
+                f"set LEGACY_SCOPE (e.g. LEGACY_SCOPE=guild-1234) to move them into that server or couple"
+            )
+            return
+        # Cluster mode: every worker has its own _legacy_checked, only one may move the data
+        if not storage.claim_once(f"legacy_migration:{LEGACY_SCOPE}"):
+            return
+
+        lists_file = partitions.partition_path("shared_lists", scope)
+        merged = storage.load_json(lists_file, {})
+        for list_name, items in lists.items():
+            merged.setdefault(list_name, []).extend(items)
+        storage.save_json(lists_file, merged)
+
+        jar_file = partitions.partition_path("love_jar", scope, "jsonl")
+        if shared:
+            storage.save_json_entries(jar_file, {note["id"]: note for note in notes})
+            storage.save_json_entries(LOVE_JAR_LOG, {note["id"]: None for note in notes if "id" in note})
+        else:
+            jar_log = AppendLog(jar_file)
+            jar_log.rewrite(sorted(jar_log.read() + notes, key=lambda note: note["ts"]))
+            if os.path.exists(LOVE_JAR_LOG):
+                legacy_log.rewrite([])
+
+        # Empty the old stores (and, in cluster mode, the files the shared
+        # store would otherwise seed itself from again)
+        for filename, empty in ((SHARED_LISTS_FILE, {}), (LOVE_JAR_FILE, [])):
+            storage.save_json(filename, empty)
+            if shared and os.path.exists(filename):
+                storage.write_json_atomic(filename, empty)
+        logger.info(f"Moved {len(lists)} shared lists and {len(notes)} love notes from the global stores to {scope}")
+
+    def jar_search_page_source(self, key):
+        """Feeds /searchjar results to the paginator (key is "<scope>:<reader id>:<author id or *>:<query>")."""
+        scope, reader, author, query = key.split(":", 3)
+        notes = self.love_jars.get(scope).jar.search(query, reader, author=None if author == "*" else author)
+        if not notes:
+            return None
+        return paginator.PageData(
+            title=f"🔎 Love notes matching \"{query}\"",
+            items=notes,
+            format_item=lambda number, note: f"**{number}.** \"{note['text']}\" — *{note['user']}*",
+            color=discord.Color.from_rgb(255, 182, 193)
+        )
+
+    def list_page_source(self, key):
+        """Feeds a shared list to the paginator (key is "<scope>:<list name>")."""
+        scope, _, list_name = key.partition(":")
+        items = self.shared_lists.get(scope).lists.get(list_name)
+        if not items:
+            return None
+        return paginator.PageData(
+            title=f"📝 {list_name.capitalize()} List",
+            items=items,
+            format_item=lambda number, val: f"**{number}.** {val}",
+            color=discord.Color.teal()
+        )
 
     # --- HANGMAN GAME LOGIC HELPERS ---
 
-    async def delete_hangman_game(self, channel_id):
+    def add_hangman_game(self, game):
+        self.hangman_games[game.game_id] = game
+        self.hangman_channels.setdefault(game.channel_id, set()).add(game.game_id)
+
+    def channel_hangman_games(self, channel_id):
+        """Returns the active games in a channel (uses the channel index, not a full scan)."""
+        return [
+            self.hangman_games[game_id]
+            for game_id in self.hangman_channels.get(channel_id, ())
+            if self.hangman_games[game_id].is_active
+        ]
+
+    def forget_hangman_game(self, game_id):
+        """Drops a game from memory and the channel index; returns it (or None)."""
+        game = self.hangman_games.pop(game_id, None)
+        if game is None:
+            return None
+        self.hangman_views.pop(game_id, None)
+        channel_games = self.hangman_channels.get(game.channel_id)
+        if channel_games is not None:
+            channel_games.discard(game_id)
+            if not channel_games:
+                del self.hangman_channels[game.channel_id]
+        return game
+
+    async def delete_hangman_game(self, game_id):
         """Deletes the game state after a win, loss, or stop."""
-        if channel_id in self.hangman_games:
-            del self.hangman_games[channel_id]
-            self.save_json(HANGMAN_FILE, self.hangman_games)
-
-    def get_hangman_mask(self, word, guessed_letters):
-        """Returns the masked word display (e.g., H E L L O -> H _ _ L O)"""
-        masked = ""
-        for char in word:
-            if char.upper() in guessed_letters or char.upper() == ' ':
-                masked += char.upper() + " "
+        if self.forget_hangman_game(game_id) is not None:
+            self.hangman_store.mark_dirty()
+
+    def render_hangman_view(self, game):
+        """Returns the game's button view, restyled to match its state."""
+        cached = self.hangman_views.get(game.game_id)
+        if cached is None:
+            cached = build_hangman_view(game.game_id)
+            self.hangman_views[game.game_id] = cached
+        view, buttons, select = cached
+
+        for letter, button in buttons.items():
+            if letter in game.guessed_letters:
+                button.style = discord.ButtonStyle.green if letter in game.positions else discord.ButtonStyle.danger
+                button.disabled = True
             else:
-                masked += "_ "
-        return masked.strip()
-
-    def check_hangman_win(self, word, guessed_letters):
-        """Checks if all non-space letters have been guessed."""
-        for char in word:
-            if char.isalpha() and char.upper() not in guessed_letters:
-                return False
-        return True
-
-    def get_hangman_art(self, mistakes):
-        """Generates simple text-based hangman art."""
-        stages = [
-            # 0 Mistakes
-            """
-              ---
-              |/
-              | 
-              |
-              |
-            __|__
-            """,
-            # 1 Mistake (Head)
-            """
-              ---
-              |/  |
-              |  ( )
-              |
-              |
-            __|__
-            """,
-            # 2 Mistakes (Body)
-            """
-              ---
-              |/  |
-              |  ( )
-              |   |
-              |
-            __|__
-            """,
-            # 3 Mistakes (Left Arm)
-            """
-              ---
-              |/  |
-              |  ( )
-              |  /|
-              |
-            __|__
-            """,
-            # 4 Mistakes (Right Arm)
-            """
-              ---
-              |/  |
-              |  ( )
-              |  /|\\
-              |
-            __|__
-            """,
-            # 5 Mistakes (Left Leg)
-            """
-              ---
-              |/  |
-              |  ( )
-              |  /|\\
-              |  /
-            __|__
-            """,
-            # 6 Mistakes (Game Over - Right Leg)
-            """
-              ---
-              |/  |
-              |  (X)
-              |  /|\\
-              |  / \\
-            __|__
-            """
-        ]
-        return f"```\n{stages[mistakes]}\n```"
+                button.style = discord.ButtonStyle.secondary
+                button.disabled = not game.is_active
+
+        # Guessed dropdown letters are simply left out
+        remaining = [letter for letter in SELECT_LETTERS if letter not in game.guessed_letters]
+        select.options = [discord.SelectOption(label=letter, value=letter) for letter in remaining or SELECT_LETTERS]
+        select.disabled = not remaining or not game.is_active
+        return view
+
+    async def handle_hangman_press(self, interaction: discord.Interaction, game_id, letter):
+        """Routes a letter button press to its game."""
+        game = self.hangman_games.get(game_id)
+
+        # The game may have ended (or been stopped) since this message was sent
+        if game is None or not game.is_active:
+            await interaction.response.send_message("This Hangman game has already ended.", ephemeral=True)
+            return
+
+        # Check if it's the right person guessing
+        if interaction.user.id != game.guesser_id:
+            await interaction.response.send_message("❌ It's not your turn to guess, or you are not the designated guesser!", ephemeral=True)
+            return
+
+        # Process the guess and get the result message
+        result_message = await self.process_hangman_guess(game_id, letter)
+
+        updated_embed = self.create_hangman_embed(game_id)
+        await interaction.response.edit_message(embed=updated_embed, view=self.render_hangman_view(game))
+
+        # If the game is over, send a final celebratory/sad message
+        if not game.is_active:
+            await interaction.followup.send(result_message)
+            # Remove game state
+            await self.delete_hangman_game(game_id)
+            return
+
+        # Send a follow-up message with the result (e.g., "Correct!" or "Wrong!")
+        await interaction.followup.send(f"{interaction.user.mention}, {result_message}", ephemeral=False)
+
+    def record_hangman_result(self, game):
+        """Updates the guesser's win/loss totals once a game finishes."""
+        stats = self.hangman_stats.setdefault(str(game.guesser_id), {"wins": 0, "losses": 0})
+        if game.status == "won":
+            stats["wins"] += 1
+        elif game.status == "lost":
+            stats["losses"] += 1
+        else:
+            return
+        self._hangman_leaderboard = None
+        paginator.invalidate("hangman_stats")
+        self.hangman_stats_store.mark_dirty()
+
+    def hangman_stats_page_source(self, key):
+        """Feeds the leaderboard to the paginator; it's only re-sorted after a result changes."""
+        if self._hangman_leaderboard is None:
+            self._hangman_leaderboard = sorted(
+                self.hangman_stats.items(),
+                key=lambda entry: (-entry[1]["wins"], entry[1]["losses"])
+            )
+        if not self._hangman_leaderboard:
+            return None
+        return paginator.PageData(
+            title="🏆 Hangman Leaderboard",
+            items=self._hangman_leaderboard,
+            format_item=lambda number, entry: f"**{number}.** <@{entry[0]}> — {entry[1]['wins']}W / {entry[1]['losses']}L",
+            color=discord.Color.gold()
+        )
 
-    def create_hangman_embed(self, channel_id):
+    def create_hangman_embed(self, game_id):
         """Creates the main Discord Embed for the game state."""
-        game = self.hangman_games[channel_id]
+        game = self.hangman_games[game_id]
 
-        setter_user = self.bot.get_user(game['setter_id'])
-        guesser_user = self.bot.get_user(game['guesser_id'])
+        setter_user = self.bot.get_user(game.setter_id)
+        guesser_user = self.bot.get_user(game.guesser_id)
 
-        title = f"❓ Hangman: Set by {setter_user.display_name}"
+        setter_name = setter_user.display_name if setter_user else "someone"
+        title = f"❓ Hangman: Set by {setter_name}"
         color = discord.Color.blue()
-        footer = f"Guessed Letters: {', '.join(sorted(game['guessed_letters']))}"
+        footer = f"Guessed Letters: {', '.join(sorted(game.guessed_letters))}"
 
-        if game['status'] == 'won':
+        if game.status == 'won':
             title = "🎉 Hangman Solved! 🎉"
             color = discord.Color.green()
-        elif game['status'] == 'lost':
+        elif game.status == 'lost':
             title = "💀 Hangman Game Over 💀"
             color = discord.Color.red()
-            footer += f" | Word was: {game['word']}"
-        elif game['status'] == 'stopped':
+            footer += f" | Word was: {game.word}"
+        elif game.status == 'stopped':
              title = "🛑 Hangman Stopped 🛑"
              color = discord.Color.dark_grey()
-             footer += f" | Word was: {game['word']}"
+             footer += f" | Word was: {game.word}"
 
         embed = discord.Embed(title=title, color=color)
 
-        # Display the ASCII art
+        # Display the ASCII art (pre-rendered per stage)
         embed.add_field(
-            name=f"Mistakes: {game['mistakes']}/{game['max_mistakes']}",
-            value=self.get_hangman_art(game['mistakes']),
+            name=f"Mistakes: {game.mistakes}/{game.max_mistakes}",
+            value=game.art,
             inline=False
         )
 
-        # Display the masked word
-        masked_word = self.get_hangman_mask(game['word'], game['guessed_letters'])
+        # Display the masked word (cached on the game, patched on each correct guess)
         embed.add_field(
             name="Current Word/Phrase",
-            value=f"## `{masked_word}`",
+            value=f"## `{game.mask}`",
             inline=False
         )
 
         # Show current player
-        if game['status'] == 'active' and guesser_user:
+        if game.is_active and guesser_user:
             embed.set_footer(text=f"Turn: {guesser_user.display_name} | {footer}")
         else:
             embed.set_footer(text=footer)
 
         return embed
 
-    async def process_hangman_guess(self, channel_id, letter):
+    async def process_hangman_guess(self, game_id, letter):
         """Processes a single letter guess, updates state, and checks for game end."""
-        game = self.hangman_games[channel_id]
+        game = self.hangman_games[game_id]
         letter = letter.upper()
 
-        if game['status'] != 'active':
-            return f"The game is already {game['status']}!"
-
-        game['guessed_letters'].append(letter)
-
-        word = game['word']
-
-        if letter in word:
-            # Correct guess
-            if self.check_hangman_win(word, game['guessed_letters']):
-                game['status'] = 'won'
-                self.save_json(HANGMAN_FILE, self.hangman_games)
-                return f"🎉 **SOLVED!** {self.bot.get_user(game['guesser_id']).display_name} nailed the phrase! It was **{word}**."
-            else:
-                self.save_json(HANGMAN_FILE, self.hangman_games)
-                return f"✅ **Correct!** The letter **{letter}** is in the phrase."
+        if not game.is_active:
+            return f"The game is already {game.status}!"
+
+        outcome = game.guess(letter)
+        if outcome != hangman.REPEAT:
+            self.hangman_store.mark_dirty()
+        if outcome in (hangman.WON, hangman.LOST):
+            self.record_hangman_result(game)
+
+        if outcome == hangman.REPEAT:
+            return f"🔁 **{letter}** was already guessed."
+        elif outcome == hangman.WON:
+            guesser = self.bot.get_user(game.guesser_id)
+            guesser_name = guesser.display_name if guesser else "The guesser"
+            return f"🎉 **SOLVED!** {guesser_name} nailed the phrase! It was **{game.word}**."
+        elif outcome == hangman.CORRECT:
+            return f"✅ **Correct!** The letter **{letter}** is in the phrase."
+        elif outcome == hangman.LOST:
+            return f"💀 **GAME OVER!** Mistake {game.mistakes}. You lost the round. The word was **{game.word}**."
         else:
-            # Incorrect guess
-            game['mistakes'] += 1
-
-            if game['mistakes'] >= game['max_mistakes']:
-                game['status'] = 'lost'
-                self.save_json(HANGMAN_FILE, self.hangman_games)
-                return f"💀 **GAME OVER!** Mistake {game['mistakes']}. You lost the round. The word was **{word}**."
-            else:
-                self.save_json(HANGMAN_FILE, self.hangman_games)
-                return f"❌ **Wrong!** Mistake {game['mistakes']}/{game['max_mistakes']}."
+            return f"❌ **Wrong!** Mistake {game.mistakes}/{game.max_mistakes}."
 
 
     # =========================================================================
@@ -293,15 +632,22 @@ class Couples(commands.Cog):
     @app_commands.choices(action=[
         app_commands.Choice(name="Start New Game", value="start"),
         app_commands.Choice(name="Stop Current Game", value="stop"),
+        app_commands.Choice(name="View Stats", value="stats"),
     ])
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
+    @ratelimit.limit("hangman")
     async def hangman_slash(self, interaction: discord.Interaction, action: app_commands.Choice[str], target_user: discord.User = None, phrase: str = None):
         channel_id = str(interaction.channel_id)
 
         if action.value == "start":
-            if channel_id in self.hangman_games and self.hangman_games[channel_id]['status'] == 'active':
-                await interaction.response.send_message("A Hangman game is already active in this channel! Use `/hangman stop` to end it.", ephemeral=True)
+            active_games = self.channel_hangman_games(channel_id)
+            if any(game.setter_id == interaction.user.id for game in active_games):
+                await interaction.response.send_message("You already have a Hangman game running in this channel! Use `/hangman stop` to end it.", ephemeral=True)
+                return
+
+            if len(active_games) >= MAX_GAMES_PER_CHANNEL:
+                await interaction.response.send_message(f"This channel already has {MAX_GAMES_PER_CHANNEL} Hangman games going. Finish one first!", ephemeral=True)
                 return
 
             if not target_user or target_user.bot:
@@ -320,16 +666,14 @@ class Couples(commands.Cog):
             sanitized_phrase = "".join(c for c in phrase.upper() if c.isalpha() or c == ' ')
 
             # --- Initialize Game State ---
-            self.hangman_games[channel_id] = {
-                "word": sanitized_phrase.replace(" ", " "),
-                "setter_id": interaction.user.id,
-                "guesser_id": target_user.id,
-                "guessed_letters": [],
-                "mistakes": 0,
-                "max_mistakes": 6,
-                "status": "active"
-            }
-            self.save_json(HANGMAN_FILE, self.hangman_games)
+            game = hangman.HangmanGame(
+                word=sanitized_phrase,
+                setter_id=interaction.user.id,
+                guesser_id=target_user.id,
+                channel_id=channel_id
+            )
+            self.add_hangman_game(game)
+            self.hangman_store.mark_dirty()
 
             # Acknowledge the interaction and then edit the message to display the game
             await interaction.response.send_message(
@@ -340,36 +684,39 @@ class Couples(commands.Cog):
             )
 
             # Send the main interactive game message (Edit the response)
-            game_embed = self.create_hangman_embed(channel_id)
-            game_view = HangmanGameView(self, channel_id, self.hangman_games[channel_id])
+            game_embed = self.create_hangman_embed(game.game_id)
 
             # Edit the original response to include the embed and buttons
-            await interaction.edit_original_response(embed=game_embed, view=game_view, content="")
+            await interaction.edit_original_response(embed=game_embed, view=self.render_hangman_view(game), content="")
 
         elif action.value == "stop":
-            if channel_id not in self.hangman_games or self.hangman_games[channel_id]['status'] != 'active':
+            active_games = self.channel_hangman_games(channel_id)
+            if not active_games:
                 await interaction.response.send_message("There is no active Hangman game in this channel to stop.", ephemeral=True)
                 return
 
-            # Only the setter or an administrator can stop the game
+            # The setter stops their own game; an administrator with no game of their own stops them all
+            to_stop = [game for game in active_games if game.setter_id == interaction.user.id]
             is_admin = interaction.user.guild_permissions.administrator if interaction.guild else False
-            if interaction.user.id != self.hangman_games[channel_id]['setter_id'] and not is_admin:
+            if not to_stop and is_admin:
+                to_stop = active_games
+
+            if not to_stop:
                 await interaction.response.send_message("Only the person who set the word can stop the game!", ephemeral=True)
                 return
 
-            # End the game and display the final word
-            self.hangman_games[channel_id]['status'] = 'stopped'
-            final_word = self.hangman_games[channel_id]['word']
+            # End the game(s) and display the final word(s)
+            final_words = []
+            for game in to_stop:
+                game.status = 'stopped'
+                final_words.append(f"**{game.word}**")
+                await self.delete_hangman_game(game.game_id)
 
-            # Edit the message to show the final word and disable buttons
-            game_embed = self.create_hangman_embed(channel_id)
-            game_view = HangmanGameView(self, channel_id, self.hangman_games[channel_id])
+            await interaction.response.send_message(f"🛑 **Game Stopped!** 🛑\n{interaction.user.mention} ended the game. The secret phrase was: {', '.join(final_words)}")
 
-            await interaction.response.send_message(f"🛑 **Game Stopped!** 🛑\n{interaction.user.mention} ended the game. The secret phrase was: **{final_word}**")
-
-            # The original message needs to be edited to disable buttons, but since we sent a new response, 
-            # we just delete the state now.
-            await self.delete_hangman_game(channel_id)
+        elif action.value == "stats":
+            if not await paginator.send_page(interaction, "hangman_stats", "all"):
+                await interaction.response.send_message("No Hangman games have been finished yet!", ephemeral=True)
 
 
     # =========================================================================
@@ -377,24 +724,30 @@ class Couples(commands.Cog):
     # =========================================================================
 
     @app_commands.command(name="lovenote", description="Put a sweet note in the jar for your partner to find later.")
-    @app_commands.describe(note="The sweet message you want to save.")
+    @app_commands.describe(note="The sweet message you want to save.", recipient="Only this person will draw the note (default: anyone).")
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
-    async def add_note(self, interaction: discord.Interaction, note: str):
-        entry = {"user": interaction.user.display_name, "text": note}
-        self.love_jar.append(entry)
-        self.save_json(LOVE_JAR_FILE, self.love_jar)
+    @ratelimit.limit("lovenote")
+    async def add_note(self, interaction: discord.Interaction, note: str, recipient: discord.User = None):
+        entry = love_jar.make_note(
+            note,
+            interaction.user.display_name,
+            author_id=interaction.user.id,
+            recipient_id=recipient.id if recipient else None
+        )
+        self.jar_for(interaction).add(entry)
         await interaction.response.send_message("💌 **Note added to the Love Jar!** Your partner can find it later.", ephemeral=True)
 
     @app_commands.command(name="openjar", description="Pull a random sweet note from the jar.")
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
     async def open_jar(self, interaction: discord.Interaction):
-        if not self.love_jar:
+        # Notes addressed to this user or to anyone, favouring ones they haven't seen lately
+        note = self.jar_for(interaction).jar.draw(interaction.user.id)
+        if note is None:
             await interaction.response.send_message("The jar is empty! Time to write some notes for each other. 📝", ephemeral=True)
             return
 
-        note = random.choice(self.love_jar)
         embed = discord.Embed(
             title="💌 A Note from the Jar", 
             description=f"**\"{note['text']}\"**\n\n— *Left by {note['user']}*", 
@@ -402,6 +755,17 @@ class Couples(commands.Cog):
         )
         await interaction.response.send_message(embed=embed)
 
+    @app_commands.command(name="searchjar", description="Find love notes containing some words.")
+    @app_commands.describe(query="Words the note should contain.", author="Only notes left by this person.")
+    @app_commands.allowed_installs(guilds=True, users=True)
+    @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
+    async def search_jar(self, interaction: discord.Interaction, query: str, author: discord.User = None):
+        scope = partitions.scope_for(interaction)
+        # The reader is part of the key: notes addressed to someone only show up in their own searches
+        key = f"{scope}:{interaction.user.id}:{author.id if author else '*'}:{' '.join(sorted(love_jar.tokenize(query)))}"
+        if not await paginator.send_page(interaction, "jar_search", key, ephemeral=True):
+            await interaction.response.send_message(f"No notes in the jar match **{query}**.", ephemeral=True)
+
     # =========================================================================
     # 🤔 DECISION MAKER
     # =========================================================================
@@ -440,52 +804,50 @@ class Couples(commands.Cog):
     @app_commands.describe(list_name="Name of the list (e.g. Movies)", item="Item to add/remove (only for add/remove actions)")
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
+    @ratelimit.limit("list")
     async def manage_list(self, interaction: discord.Interaction, action: app_commands.Choice[str], list_name: str, item: str = None):
         list_name = list_name.lower().strip()
+        partition = self.lists_for(interaction)
+        lists = partition.lists
 
         if action.value == "add":
             if not item:
                 await interaction.response.send_message("You need to type the item you want to add!", ephemeral=True)
                 return
 
-            if list_name not in self.shared_lists:
-                self.shared_lists[list_name] = []
+            if list_name not in lists:
+                lists[list_name] = []
 
-            self.shared_lists[list_name].append(item)
-            self.save_json(SHARED_LISTS_FILE, self.shared_lists)
+            lists[list_name].append(item)
+            partition.save(list_name)
             await interaction.response.send_message(f"✅ Added **{item}** to the **{list_name}** list!")
 
         elif action.value == "view":
-            if list_name not in self.shared_lists or not self.shared_lists[list_name]:
+            if list_name not in lists or not lists[list_name]:
                 await interaction.response.send_message(f"The **{list_name}** list is currently empty.", ephemeral=True)
                 return
 
-            # Create a numbered list
-            items_text = ""
-            for i, val in enumerate(self.shared_lists[list_name], 1):
-                items_text += f"**{i}.** {val}\n"
-
-            embed = discord.Embed(title=f"📝 {list_name.capitalize()} List", description=items_text, color=discord.Color.teal())
-            await interaction.response.send_message(embed=embed)
+            # Only the first page is rendered; the buttons fetch the rest on demand
+            await paginator.send_page(interaction, "list", f"{partition.scope}:{list_name}")
 
         elif action.value == "remove":
-            if list_name not in self.shared_lists or not self.shared_lists[list_name]:
+            if list_name not in lists or not lists[list_name]:
                 await interaction.response.send_message(f"The **{list_name}** list is empty, nothing to remove.", ephemeral=True)
                 return
 
             # Try to remove by exact match first
-            if item in self.shared_lists[list_name]:
-                self.shared_lists[list_name].remove(item)
-                self.save_json(SHARED_LISTS_FILE, self.shared_lists)
+            if item in lists[list_name]:
+                lists[list_name].remove(item)
+                partition.save(list_name)
                 await interaction.response.send_message(f"🗑️ Removed **{item}** from **{list_name}**.")
                 return
 
             # Try to remove by index number (e.g. user types "1")
             try:
                 idx = int(item) - 1
-                if 0 <= idx < len(self.shared_lists[list_name]):
-                    removed = self.shared_lists[list_name].pop(idx)
-                    self.save_json(SHARED_LISTS_FILE, self.shared_lists)
+                if 0 <= idx < len(lists[list_name]):
+                    removed = lists[list_name].pop(idx)
+                    partition.save(list_name)
                     await interaction.response.send_message(f"🗑️ Removed **{removed}** from **{list_name}**.")
                 else:
                     await interaction.response.send_message("Invalid number.", ephemeral=True)
@@ -493,12 +855,15 @@ class Couples(commands.Cog):
                 await interaction.response.send_message(f"Couldn't find **{item}** in the list.", ephemeral=True)
 
         elif action.value == "clear":
-            if list_name in self.shared_lists:
-                self.shared_lists[list_name] = []
-                self.save_json(SHARED_LISTS_FILE, self.shared_lists)
+            if list_name in lists:
+                lists[list_name] = []
+                partition.save(list_name)
                 await interaction.response.send_message(f"💥 Cleared the entire **{list_name}** list.", ephemeral=True)
             else:
                 await interaction.response.send_message("That list doesn't exist yet.", ephemeral=True)
 
 async def setup(bot: commands.Bot):
+    paginator.setup_paginator(bot)
+    # Registered once; the buttons of in-flight games keep working after a restart
+    bot.add_dynamic_items(HangmanLetterButton, HangmanLetterSelect)
     await bot.add_cog(Couples(bot))
\ No newline at end of file
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import os
+import discord
+import metrics
+
+logger = logging.getLogger('Deadlines')
+
+# =========================================================================
+# INTERACTION DEADLINES
+# Discord drops an interaction that isn't answered within 3 seconds. Every
+# app command gets its interaction.response wrapped in a GuardedResponse
+# (see command_tree.py) that defers on the handler's behalf once the
+# interaction is DEFER_AFTER seconds old and still unanswered.
+#
+# Handlers don't need to know: after an automatic defer, their own
+#   response.send_message(...)  becomes a follow-up (ephemeral ones replace
+#                               the public "thinking..." message),
+#   response.edit_message(...)  edits the original response,
+#   response.defer(...)         is a no-op.
+# Either way the defer is recorded (metrics.observe_defer) exactly once.
+# Responses go through one lock, so the timer and the handler never both
+# answer. The timer can only fire while the handler awaits something;
+# a handler blocking the loop for 3 seconds still misses the window.
+# =========================================================================
+
+DEFER_AFTER = float(os.getenv("INTERACTION_DEFER_AFTER", "2.0"))
+
+
+class GuardedResponse:
+    """Stands in for interaction.response; everything it doesn't override goes to the real one."""
+
+    def __init__(self, interaction: discord.Interaction, response):
+        self._interaction = interaction
+        self._response = response
+        self._lock = asyncio.Lock()
+        self._timer = None
+        self.auto_deferred = False
+        # Whether the "thinking..." message has been replaced by an answer yet
+        self._answered = False
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def is_done(self):
+        return self._response.is_done()
+
+    def start(self, budget=DEFER_AFTER):
+        """Arms the timer relative to when Discord created the interaction."""
+        delay = max(0.0, budget - metrics.interaction_age(self._interaction))
+        self._timer = asyncio.create_task(self._expire(delay))
+
+    def cancel(self):
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+
+    async def _expire(self, delay):
+        await asyncio.sleep(delay)
+        async with self._lock:
+            if self._response.is_done():
+                return
+            command = _command_name(self._interaction)
+            try:
+                if self._interaction.type is discord.InteractionType.component:
+                    await self._response.defer()
+                else:
+                    await self._response.defer(thinking=True)
+            except discord.HTTPException as e:
+                AUTO_DEFERRED.inc(command=command, result="failed")
+                logger.warning(f"Couldn't defer /{command} in time: {e}")
+                return
+            self.auto_deferred = True
+            AUTO_DEFERRED.inc(command=command, result="deferred")
+            metrics.observe_defer(self._interaction)
+            logger.info(f"Deferred /{command} on its behalf")
+
+    # --- Responses, rerouted once the timer has deferred ---
+
+    async def defer(self, **kwargs):
+        async with self._lock:
+            if self.auto_deferred:
+                return None
+            result = await self._response.defer(**kwargs)
+            # Recorded here, once per interaction, whoever defers it
+            metrics.observe_defer(self._interaction)
+            return result
+
+    async def send_message(self, content=None, **kwargs):
+        async with self._lock:
+            if not self.auto_deferred:
+                return await self._response.send_message(content, **kwargs)
+            return await self._follow_up(content, **kwargs)
+
+    async def edit_message(self, **kwargs):
+        async with self._lock:
+            if not self.auto_deferred:
+                return await self._response.edit_message(**kwargs)
+            kwargs.pop("delete_after", None)
+            self._answered = True
+            return await self._interaction.edit_original_response(**kwargs)
+
+    async def send_modal(self, modal):
+        async with self._lock:
+            return await self._response.send_modal(modal)
+
+    async def _follow_up(self, content, **kwargs):
+        delete_after = kwargs.pop("delete_after", None)
+        thinking = not self._answered and self._interaction.type is not discord.InteractionType.component
+        self._answered = True
+        if thinking and kwargs.get("ephemeral"):
+            # The "thinking..." message is public; an ephemeral answer has to replace it
+            try:
+                await self._interaction.delete_original_response()
+            except discord.HTTPException:
+                pass
+        message = await self._interaction.followup.send(content, wait=True, **kwargs)
+        if delete_after is not None and message is not None:
+            await message.delete(delay=delete_after)
+        return message
+
+
+def _command_name(interaction: discord.Interaction):
+    return interaction.command.qualified_name if interaction.command else "component"
+
+
+def guard(interaction: discord.Interaction, budget=DEFER_AFTER):
+    """Wraps the interaction's response and starts its deadline timer."""
+    guarded = GuardedResponse(interaction, interaction.response)
+    # discord.py caches .response in this slot; replacing it covers every later access
+    interaction._cs_response = guarded
+    guarded.start(budget)
+    return guarded
+
+
+def release(interaction: discord.Interaction):
+    """Stops the timer once the handler has finished (answered or not)."""
+    if isinstance(interaction.response, GuardedResponse):
+        interaction.response.cancel()
+
+
+async def respond(interaction: discord.Interaction, content=None, **kwargs):
+    """Sends a message whether or not the interaction has been answered yet."""
+    response = interaction.response
+    if not response.is_done() or getattr(response, "auto_deferred", False):
+        return await response.send_message(content, **kwargs)
+    kwargs.pop("delete_after", None)
+    return await interaction.followup.send(content, **kwargs)
+
+
+AUTO_DEFERRED = metrics.Counter(
+    "naekki_interactions_auto_deferred_total",
+    "Interactions deferred on the handler's behalf because it hadn't answered within the deadline.",
+    ["command", "result"],
+)
@@ -1,123 +1,235 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import requests
 import random
 import os
 import asyncio
 import datetime
+import io
 import json
+import logging
+import content
+import countdowns
+import ratelimit
+from meme_buffer import MemeBuffer
+from memory_index import memory
+import storage
 
-# =========================================================================
-# 🎨 CUSTOMIZE YOUR CONTENT HERE
-# =========================================================================
+logger = logging.getLogger('FunCommands')
 
-INSIDE_JOKES = [
-    "Remember that time we got lost? 😂",
-    "You're the 🧀 to my 🍷!",
-    "Internal Error: Cuteness overload detected.",
-    "That's what she said! (Or he said...)",
-    "Don't make me use the 'look' 👀",
-    "You owe me a soda! 🥤"
-]
-
-TRUTH_QUESTIONS = [
-    "What is your biggest fear?",
-    "What is the most embarrassing thing you've ever done?",
-    "Have you ever lied to get out of trouble?",
-    "Who is your secret crush? (Besides me 😉)",
-    "What is your guilty pleasure movie?",
-    "If you could change one thing about yourself, what would it be?"
-]
-
-DARE_TASKS = [
-    "Send a selfie making a funny face right now!",
-    "Do 10 jumping jacks and send a video (or voice note of you tired).",
-    "Talk in a fake accent for the next 10 minutes.",
-    "Send the 5th photo in your camera roll without explaining context.",
-    "Text your parents/best friend and tell them you're becoming a mime.",
-    "Draw a picture of me on paper and send it."
-]
 
+async def respond(target, *, ephemeral=False, **kwargs):
+    """Replies to a slash command (Interaction) or a prefix command (Context) the same way."""
+    if hasattr(target, "response"):
+        await target.response.send_message(ephemeral=ephemeral, **kwargs)
+    else:
+        await target.send(**kwargs)
+
+# =========================================================================
+# 🎨 CUSTOMIZE YOUR CONTENT IN fun_content.json
+# Jokes, truths, dares and the hug/kiss GIFs are read from that file and
+# picked up again whenever it changes (see content.py).
 # =========================================================================
 
-# --- Helper Data for Interaction Commands ---
-INTERACTION_GIFS = {
-    'hug': [
-        "https://placehold.co/500x300/42a5f5/fff?text=A+BIG+HUG",
-        "https://placehold.co/500x300/9ccc65/fff?text=CUDDLES",
-        "https://placehold.co/500x300/ab47bc/fff?text=COMFY+HUG"
-    ],
-    'kiss': [
-        "https://placehold.co/500x300/ef5350/fff?text=SWEET+KISS",
-        "https://placehold.co/500x300/ffb300/fff?text=MUAH",
-        "https://placehold.co/500x300/26a69a/fff?text=KISS"
-    ]
-}
+CONTENT_FILE = "fun_content.json"
+
+# Coin flip embeds, built once: (result, emoji, color)
+COIN_FACES = tuple(
+    (result, discord.Embed(description=f"The coin spins and lands on... **{result}**! {emoji}", color=color))
+    for result, emoji, color in (
+        ("Heads", "👑", discord.Color.green()),
+        ("Tails", "🐍", discord.Color.dark_red()),
+    )
+)
 
 COUNTDOWN_FILE = "countdowns.json"
+COUNTDOWN_ARCHIVE_FILE = "countdowns_archive.json" # Passed events, moved here by the daily sweep
+MAX_IMPORT_BYTES = 64 * 1024
+# Discord shows at most 25 fields per embed
+MAX_COUNTDOWN_FIELDS = 25
+# Base of the meme API (MEME_API_BASE can point this at a local stub)
+MEME_API_BASE = os.getenv("MEME_API_BASE", "https://meme-api.com/gimme")
+SLASH_MEME_SUBREDDIT = "memes"
+PREFIX_MEME_SUBREDDIT = "wholesomememes"
 
 class FunCommands(commands.Cog):
     """A Cog containing fun, relationship-focused slash and prefix commands."""
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.content = content.ContentRegistry(CONTENT_FILE)
         self.countdowns = self.load_countdowns()
+        self._countdown_sweeper = None
+        # Memes are fetched ahead of time in batches, so /meme rarely waits on the API
+        self.memes = MemeBuffer(MEME_API_BASE)
+        storage.watch(COUNTDOWN_FILE, self._countdowns_changed)
+        storage.watch(COUNTDOWN_ARCHIVE_FILE, self._countdown_archive_changed)
+        # Lets the AI chat remember people's special days (see memory_index.py)
+        memory.register_source("countdowns", self.countdown_memory_source)
+
+    async def cog_load(self):
+        self._countdown_sweeper = asyncio.create_task(self.sweep_countdowns_daily())
+        self.memes.prefill(SLASH_MEME_SUBREDDIT, PREFIX_MEME_SUBREDDIT)
+
+    async def cog_unload(self):
+        if self._countdown_sweeper is not None:
+            self._countdown_sweeper.cancel()
+        await self.memes.close()
+        storage.unwatch(COUNTDOWN_FILE, self._countdowns_changed)
+        storage.unwatch(COUNTDOWN_ARCHIVE_FILE, self._countdown_archive_changed)
+        memory.unregister_source("countdowns")
+
+    # --- Hot reload (see reloader.py) ---
+
+    def export_state(self):
+        return {"memes": self.memes.export()}
+
+    def import_state(self, state):
+        self.memes.restore(state["memes"])
+
+    # --- Restart snapshot (see shutdown.py) ---
+
+    def snapshot_state(self):
+        # Saves the next process a round of meme-api calls (and repeats) at startup
+        return {"memes": self.memes.export()}
+
+    def restore_state(self, data):
+        self.memes.restore(data["memes"])
 
     def load_countdowns(self):
-        if not os.path.exists(COUNTDOWN_FILE):
-            return {}
-        try:
-            with open(COUNTDOWN_FILE, "r") as f:
-                return json.load(f)
-        except Exception:
+        book = countdowns.CountdownBook(
+            storage.load_json(COUNTDOWN_FILE, {}),
+            storage.load_json(COUNTDOWN_ARCHIVE_FILE, {})
+        )
+        if book.skipped:
+            logger.warning(f"Dropped {book.skipped} countdowns with unreadable dates")
+        return book
+
+    def save_countdowns(self, *user_ids):
+        """Persists the countdowns and refreshes these users' countdowns in the AI's memory."""
+        storage.save_json(COUNTDOWN_FILE, self.countdowns.snapshot())
+        for user_id in user_ids:
+            self.remember_countdowns(user_id)
+
+    def remember_countdowns(self, user_id):
+        memory.sync_later(f"user-{user_id}", "countdowns", lambda: self.countdown_memories(user_id))
+
+    def countdown_memories(self, user_id):
+        # Passed (archived) days are still worth remembering
+        entries = self.countdowns.get(user_id) + self.countdowns.archive.get(str(user_id), [])
+        return {f"countdown:{entry.id}": f"Special day: {entry.title} on {entry.date}" for entry in entries}
+
+    def countdown_memory_source(self, scope):
+        if not scope.startswith("user-"):
             return {}
-
-    def save_countdowns(self):
-        with open(COUNTDOWN_FILE, "w") as f:
-            json.dump(self.countdowns, f, indent=4)
+        return {"countdowns": self.countdown_memories(scope[len("user-"):])}
+
+    def _countdowns_changed(self, changes):
+        # Another worker process changed someone's countdowns (cluster mode only)
+        for user_id, events in changes.items():
+            self.countdowns.replace(user_id, events)
+            self.remember_countdowns(user_id)
+
+    def _countdown_archive_changed(self, changes):
+        for user_id, events in changes.items():
+            self.countdowns.replace_archive(user_id, events)
+
+    def sweep_countdowns(self):
+        """Archives every countdown whose day has passed."""
+        changed = self.countdowns.sweep()
+        if changed:
+            self.save_countdowns()
+            storage.save_json(COUNTDOWN_ARCHIVE_FILE, self.countdowns.archive_snapshot())
+            logger.info(f"Archived passed countdowns for {len(changed)} users")
+
+    async def sweep_countdowns_daily(self):
+        """Sweeps on startup and then just after every midnight."""
+        while True:
+            try:
+                self.sweep_countdowns()
+            except Exception:
+                logger.exception("Countdown sweep failed")
+            now = datetime.datetime.now()
+            next_run = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time(0, 1))
+            await asyncio.sleep((next_run - now).total_seconds())
 
     # =========================================================================
     # SLASH COMMANDS (Invoked with /)
     # =========================================================================
 
+    # --- SHARED HANDLERS (used by both the slash and the prefix versions) ---
+
+    async def send_content(self, target, category):
+        """Sends a random pre-built joke/truth/dare embed."""
+        items = self.content.get(category)
+        embed = items.pick() if items else None
+        if embed is None:
+            await respond(target, content="I'm all out of those right now! 🙈", ephemeral=True)
+            return
+        await respond(target, embed=embed)
+
+    async def send_affection(self, target, kind, author, user):
+        """Sends a hug/kiss from author to user."""
+        category = self.content.get(kind)
+        if category is None:
+            await respond(target, content="I'm all out of those right now! 🙈", ephemeral=True)
+            return
+        if user.id == author.id:
+            await respond(target, content=category.self_message, ephemeral=True)
+            return
+        embed = category.build(author, user)
+        if embed is None:
+            await respond(target, content="I'm all out of those right now! 🙈", ephemeral=True)
+            return
+        await respond(target, embed=embed)
+
+    async def send_coinflip(self, target, author):
+        result, face = random.choice(COIN_FACES)
+        embed = face.copy()
+        embed.title = f"🪙 {author.name} flipped the coin! 🪙"
+        await respond(target, embed=embed)
+
     # --- NEW: INSIDE JOKES ---
     @app_commands.command(name='joke', description='Tells a random inside joke or quote.')
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
     async def joke_slash(self, interaction: discord.Interaction):
-        joke = random.choice(INSIDE_JOKES)
-        embed = discord.Embed(title="✨ Just Between Us...", description=joke, color=discord.Color.gold())
-        await interaction.response.send_message(embed=embed)
+        await self.send_content(interaction, "joke")
 
     # --- NEW: TRUTH OR DARE ---
     @app_commands.command(name='truth', description='Asks a random Truth question.')
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
     async def truth_slash(self, interaction: discord.Interaction):
-        question = random.choice(TRUTH_QUESTIONS)
-        embed = discord.Embed(title="🔮 Truth", description=f"**{question}**", color=discord.Color.dark_blue())
-        await interaction.response.send_message(embed=embed)
+        await self.send_content(interaction, "truth")
 
     @app_commands.command(name='dare', description='Gives a random Dare task.')
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
     async def dare_slash(self, interaction: discord.Interaction):
-        task = random.choice(DARE_TASKS)
-        embed = discord.Embed(title="🔥 Dare", description=f"**{task}**", color=discord.Color.dark_orange())
-        await interaction.response.send_message(embed=embed)
+        await self.send_content(interaction, "dare")
 
     # --- NEW: COUNTDOWN ---
     @app_commands.command(name='countdown', description='Manage countdowns. Format: YYYY-MM-DD')
-    @app_commands.describe(action='Set a new date or check existing ones?', date='YYYY-MM-DD (Only needed for set)', title='Title of the event (Only needed for set)')
+    @app_commands.describe(
+        action='What to do with your countdowns?',
+        date='YYYY-MM-DD (Only needed for set)',
+        title='Title of the event (Only needed for set)',
+        countdown_id='The id shown by Check Days (Only needed for delete)',
+        file='A countdowns file from Export, or a JSON list of {"title", "date"} (Only needed for import)'
+    )
     @app_commands.choices(action=[
         app_commands.Choice(name="Set Date", value="set"),
         app_commands.Choice(name="Check Days", value="check"),
-        app_commands.Choice(name="Delete All", value="delete")
+        app_commands.Choice(name="Delete One", value="delete_one"),
+        app_commands.Choice(name="Delete All", value="delete"),
+        app_commands.Choice(name="Export", value="export"),
+        app_commands.Choice(name="Import", value="import")
     ])
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
-    async def countdown_slash(self, interaction: discord.Interaction, action: app_commands.Choice[str], date: str = None, title: str = "Special Day"):
+    @ratelimit.limit("countdown")
+    async def countdown_slash(self, interaction: discord.Interaction, action: app_commands.Choice[str], date: str = None, title: str = "Special Day", countdown_id: str = None, file: discord.Attachment = None):
         user_id = str(interaction.user.id)
 
         if action.value == "set":
@@ -127,114 +239,145 @@ class FunCommands(commands.Cog):
 
             try:
                 # Validate date format
-                target_date = datetime.datetime.strptime(date, "%Y-%m-%d").date()
-                today = datetime.date.today()
-
-                if target_date < today:
-                     await interaction.response.send_message("That date is in the past! Unless you have a time machine? 🕰️", ephemeral=True)
-                     return
-
-                # Save to dictionary
-                if user_id not in self.countdowns:
-                    self.countdowns[user_id] = []
-
-                self.countdowns[user_id].append({"title": title, "date": date})
-                self.save_countdowns()
-
-                await interaction.response.send_message(f"✅ Countdown set for **{title}** on **{date}**!")
-
+                target_date = countdowns.parse_date(date)
             except ValueError:
                 await interaction.response.send_message("Invalid date format! Please use **YYYY-MM-DD** (e.g., 2025-12-25).", ephemeral=True)
+                return
+
+            if target_date < datetime.date.today():
+                await interaction.response.send_message("That date is in the past! Unless you have a time machine? 🕰️", ephemeral=True)
+                return
+
+            if not self.countdowns.add(user_id, countdowns.make_entry(title, target_date)):
+                await interaction.response.send_message(f"You already have {countdowns.MAX_PER_USER} countdowns! Delete some first.", ephemeral=True)
+                return
+            self.save_countdowns(user_id)
+            await interaction.response.send_message(f"✅ Countdown set for **{title}** on **{target_date.isoformat()}**!")
 
         elif action.value == "check":
-            if user_id not in self.countdowns or not self.countdowns[user_id]:
+            entries = self.countdowns.get(user_id)
+            if not entries:
                 await interaction.response.send_message("You haven't set any countdowns yet! Use `/countdown action:Set Date`.", ephemeral=True)
                 return
 
             embed = discord.Embed(title="📅 Your Countdowns", color=discord.Color.teal())
-            today = datetime.date.today()
-
-            # Calculate days remaining for each entry
-            to_remove = []
-            for index, entry in enumerate(self.countdowns[user_id]):
-                try:
-                    target_date = datetime.datetime.strptime(entry['date'], "%Y-%m-%d").date()
-                    delta = (target_date - today).days
-
-                    if delta < 0:
-                        embed.add_field(name=f"~~{entry['title']}~~", value=f"Passed {abs(delta)} days ago", inline=False)
-                        # Optional: Auto-delete passed events? For now, we keep them crossed out.
-                    elif delta == 0:
-                        embed.add_field(name=f"🎉 {entry['title']} 🎉", value="**IT IS TODAY!**", inline=False)
-                    else:
-                        embed.add_field(name=entry['title'], value=f"**{delta}** days remaining", inline=False)
-                except ValueError:
-                    to_remove.append(index)
+            today = datetime.date.today().toordinal()
+
+            # Entries are already sorted by date, with their dates pre-parsed
+            for entry in entries[:MAX_COUNTDOWN_FIELDS]:
+                delta = entry.ordinal - today
+                if delta < 0:
+                    # Passed since the last sweep; archived at midnight
+                    embed.add_field(name=f"~~{entry.title}~~", value=f"Passed {abs(delta)} days ago · id `{entry.id}`", inline=False)
+                elif delta == 0:
+                    embed.add_field(name=f"🎉 {entry.title} 🎉", value=f"**IT IS TODAY!** · id `{entry.id}`", inline=False)
+                else:
+                    embed.add_field(name=entry.title, value=f"**{delta}** days remaining · id `{entry.id}`", inline=False)
+            if len(entries) > MAX_COUNTDOWN_FIELDS:
+                embed.set_footer(text=f"…and {len(entries) - MAX_COUNTDOWN_FIELDS} more. Use Export to see them all.")
 
             await interaction.response.send_message(embed=embed)
 
+        elif action.value == "delete_one":
+            if not countdown_id:
+                await interaction.response.send_message("Tell me which one: the id is shown next to each countdown in **Check Days**.", ephemeral=True)
+                return
+            entry = self.countdowns.remove(user_id, countdown_id.strip().strip("`"))
+            if entry is None:
+                await interaction.response.send_message(f"You don't have a countdown with id `{countdown_id}`.", ephemeral=True)
+                return
+            self.save_countdowns(user_id)
+            await interaction.response.send_message(f"🗑️ Deleted **{entry.title}** ({entry.date}).", ephemeral=True)
+
         elif action.value == "delete":
-            if user_id in self.countdowns:
-                del self.countdowns[user_id]
-                self.save_countdowns()
+            if self.countdowns.clear(user_id):
+                self.save_countdowns(user_id)
                 await interaction.response.send_message("🗑️ All your countdowns have been deleted.", ephemeral=True)
             else:
                  await interaction.response.send_message("You don't have any countdowns to delete.", ephemeral=True)
 
+        elif action.value == "export":
+            data = self.countdowns.export(user_id)
+            if not data["countdowns"] and not data["archive"]:
+                await interaction.response.send_message("You don't have any countdowns to export.", ephemeral=True)
+                return
+            payload = io.BytesIO(json.dumps(data, indent=2, ensure_ascii=False).encode())
+            await interaction.response.send_message(
+                f"📦 {len(data['countdowns'])} countdowns and {len(data['archive'])} archived ones.",
+                file=discord.File(payload, filename="countdowns.json"),
+                ephemeral=True
+            )
+
+        elif action.value == "import":
+            if file is None:
+                await interaction.response.send_message("Attach a countdowns file (from **Export**) to import.", ephemeral=True)
+                return
+            if file.size > MAX_IMPORT_BYTES:
+                await interaction.response.send_message(f"That file is too big (max {MAX_IMPORT_BYTES // 1024} KiB).", ephemeral=True)
+                return
+            try:
+                entries, skipped = countdowns.parse_import(json.loads(await file.read()))
+            except (ValueError, discord.HTTPException):
+                await interaction.response.send_message("I couldn't read that file. It should be JSON from **Export**.", ephemeral=True)
+                return
+
+            today = datetime.date.today().toordinal()
+            upcoming = [entry for entry in entries if entry.ordinal >= today]
+            added = self.countdowns.add_many(user_id, upcoming)
+            if added:
+                self.save_countdowns(user_id)
+            skipped += len(entries) - added
+            message = f"📥 Imported **{added}** countdowns."
+            if skipped:
+                message += f" Skipped {skipped} (past, unreadable, or over the limit of {countdowns.MAX_PER_USER})."
+            await interaction.response.send_message(message, ephemeral=True)
+
     # --- EXISTING COMMANDS (Updated contexts) ---
 
     @app_commands.command(name='meme', description='Fetches a random, meme from Reddit.')
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
+    @ratelimit.limit("meme")
     async def meme_slash(self, interaction: discord.Interaction):
-        await interaction.response.defer() 
-        MEME_API_URL = "https://meme-api.com/gimme/memes"
-        try:
-            response = await self.bot.loop.run_in_executor(None, lambda: requests.get(MEME_API_URL, timeout=10))
-            response.raise_for_status() 
-            data = response.json()
-            embed = discord.Embed(title=data.get('title', 'A Random Meme'), url=data.get('postLink'), color=discord.Color.blue())
-            embed.set_image(url=data.get('url'))
-            embed.set_footer(text=f"From {data.get('subreddit')} | Requested by {interaction.user.name}")
-            await interaction.followup.send(embed=embed)
-        except requests.exceptions.RequestException:
+        data = self.memes.take(SLASH_MEME_SUBREDDIT)
+        if data is not None:
+            await interaction.response.send_message(embed=self.meme_embed(data, interaction.user.name))
+            return
+
+        # Buffer ran dry: wait for the refill that take() just started
+        await interaction.response.defer()
+        data = await self.memes.get(SLASH_MEME_SUBREDDIT)
+        if data is None:
             await interaction.followup.send("Oops! I couldn't fetch a meme right now.")
+            return
+        await interaction.followup.send(embed=self.meme_embed(data, interaction.user.name))
+
+    @staticmethod
+    def meme_embed(data, requested_by):
+        embed = discord.Embed(title=data.get('title', 'A Random Meme'), url=data.get('postLink'), color=discord.Color.blue())
+        embed.set_image(url=data.get('url'))
+        embed.set_footer(text=f"From {data.get('subreddit')} | Requested by {requested_by}")
+        return embed
 
     @app_commands.command(name='hug', description='Sends a virtual hug to a user to show affection.')
     @app_commands.describe(user='The user you want to hug.')
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
-    async def hug_slash(self, interaction: discord.Interaction, user: discord.User): 
-        if user.id == interaction.user.id:
-            await interaction.response.send_message("You can't hug yourself, silly! But I'll send one your way. 🤗", ephemeral=True)
-            return
-        gif_url = random.choice(INTERACTION_GIFS['hug'])
-        embed = discord.Embed(title="🤗 Virtual Hug! 🤗", description=f"{interaction.user.mention} gives {user.mention} a big, loving hug! Aww...", color=discord.Color.purple())
-        embed.set_image(url=gif_url)
-        await interaction.response.send_message(embed=embed)
+    async def hug_slash(self, interaction: discord.Interaction, user: discord.User):
+        await self.send_affection(interaction, "hug", interaction.user, user)
 
     @app_commands.command(name='kiss', description='Sends a virtual kiss to a user to show affection.')
     @app_commands.describe(user='The user you want to kiss.')
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
     async def kiss_slash(self, interaction: discord.Interaction, user: discord.User):
-        if user.id == interaction.user.id:
-            await interaction.response.send_message("Don't kiss and tell! I'll pretend I didn't see that. 😉", ephemeral=True)
-            return
-        gif_url = random.choice(INTERACTION_GIFS['kiss'])
-        embed = discord.Embed(title="💋 Virtual Kiss! 💋", description=f"{interaction.user.mention} gives {user.mention} a sweet kiss! Hope you like it!", color=discord.Color.red())
-        embed.set_image(url=gif_url)
-        await interaction.response.send_message(embed=embed)
+        await self.send_affection(interaction, "kiss", interaction.user, user)
 
     @app_commands.command(name='coinflip', description='Flips a coin for a simple heads or tails game.')
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
     async def coinflip_slash(self, interaction: discord.Interaction):
-        result = random.choice(["Heads", "Tails"])
-        color = discord.Color.green() if result == "Heads" else discord.Color.dark_red()
-        emoji = "👑" if result == "Heads" else "🐍"
-        embed = discord.Embed(title=f"🪙 {interaction.user.name} flipped the coin! 🪙", description=f"The coin spins and lands on... **{result}**! {emoji}", color=color)
-        await interaction.response.send_message(embed=embed)
+        await self.send_coinflip(interaction, interaction.user)
 
     # =========================================================================
     # PREFIX COMMANDS (Invoked with e!)
@@ -242,65 +385,40 @@ class FunCommands(commands.Cog):
     # Note: Prefix commands do not need special decorators for DMs, they work if the bot can read the message.
 
     @commands.command(name='meme', help='Fetches a random, wholesome meme from Reddit.')
+    @ratelimit.limit("meme")
     async def meme_prefix(self, ctx: commands.Context):
-        async with ctx.typing():
-            MEME_API_URL = "https://meme-api.com/gimme/wholesomememes"
-            try:
-                response = await self.bot.loop.run_in_executor(None, lambda: requests.get(MEME_API_URL, timeout=10))
-                response.raise_for_status()
-                data = response.json()
-                embed = discord.Embed(title=data.get('title', 'A Random Meme'), url=data.get('postLink'), color=discord.Color.blue())
-                embed.set_image(url=data.get('url'))
-                embed.set_footer(text=f"From {data.get('subreddit')} | Requested by {ctx.author.name}")
-                await ctx.send(embed=embed)
-            except requests.exceptions.RequestException:
-                await ctx.send("Oops! I couldn't fetch a meme right now.")
+        data = self.memes.take(PREFIX_MEME_SUBREDDIT)
+        if data is None:
+            async with ctx.typing():
+                data = await self.memes.get(PREFIX_MEME_SUBREDDIT)
+        if data is None:
+            await ctx.send("Oops! I couldn't fetch a meme right now.")
+            return
+        await ctx.send(embed=self.meme_embed(data, ctx.author.name))
 
     @commands.command(name='hug', help='Sends a virtual hug to a user to show affection.')
     async def hug_prefix(self, ctx: commands.Context, user: discord.User):
-        if user.id == ctx.author.id:
-            await ctx.send("You can't hug yourself, silly! But I'll send one your way. 🤗")
-            return
-        gif_url = random.choice(INTERACTION_GIFS['hug'])
-        embed = discord.Embed(title="🤗 Virtual Hug! 🤗", description=f"{ctx.author.mention} gives {user.mention} a big, loving hug! Aww...", color=discord.Color.purple())
-        embed.set_image(url=gif_url)
-        await ctx.send(embed=embed)
+        await self.send_affection(ctx, "hug", ctx.author, user)
 
     @commands.command(name='kiss', help='Sends a virtual kiss to a user to show affection.')
     async def kiss_prefix(self, ctx: commands.Context, user: discord.User):
-        if user.id == ctx.author.id:
-            await ctx.send("Don't kiss and tell! I'll pretend I didn't see that. 😉")
-            return
-        gif_url = random.choice(INTERACTION_GIFS['kiss'])
-        embed = discord.Embed(title="💋 Virtual Kiss! 💋", description=f"{ctx.author.mention} gives {user.mention} a sweet kiss! Hope you like it!", color=discord.Color.red())
-        embed.set_image(url=gif_url)
-        await ctx.send(embed=embed)
+        await self.send_affection(ctx, "kiss", ctx.author, user)
 
     @commands.command(name='coinflip', help='Flips a coin for a simple heads or tails game.')
     async def coinflip_prefix(self, ctx: commands.Context):
-        result = random.choice(["Heads", "Tails"])
-        color = discord.Color.green() if result == "Heads" else discord.Color.dark_red()
-        emoji = "👑" if result == "Heads" else "🐍"
-        embed = discord.Embed(title=f"🪙 {ctx.author.name} flipped the coin! 🪙", description=f"The coin spins and lands on... **{result}**! {emoji}", color=color)
-        await ctx.send(embed=embed)
+        await self.send_coinflip(ctx, ctx.author)
 
     @commands.command(name='joke', help='Tells a random inside joke.')
     async def joke_prefix(self, ctx: commands.Context):
-        joke = random.choice(INSIDE_JOKES)
-        embed = discord.Embed(title="✨ Just Between Us...", description=joke, color=discord.Color.gold())
-        await ctx.send(embed=embed)
+        await self.send_content(ctx, "joke")
 
     @commands.command(name='truth', help='Asks a random Truth question.')
     async def truth_prefix(self, ctx: commands.Context):
-        question = random.choice(TRUTH_QUESTIONS)
-        embed = discord.Embed(title="🔮 Truth", description=f"**{question}**", color=discord.Color.dark_blue())
-        await ctx.send(embed=embed)
+        await self.send_content(ctx, "truth")
 
     @commands.command(name='dare', help='Gives a random Dare task.')
     async def dare_prefix(self, ctx: commands.Context):
-        task = random.choice(DARE_TASKS)
-        embed = discord.Embed(title="🔥 Dare", description=f"**{task}**", color=discord.Color.dark_orange())
-        await ctx.send(embed=embed)
+        await self.send_content(ctx, "dare")
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(FunCommands(bot))
\ No newline at end of file
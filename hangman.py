@@ -0,0 +1,199 @@
+# =========================================================================
+# HANGMAN GAME STATE
+# Keeps everything needed to answer a guess in constant time: a set of
+# guessed letters, how many distinct letters are still hidden, and where
+# each letter sits in the phrase so the mask can be patched in place.
+# =========================================================================
+
+import secrets
+
+MAX_MISTAKES = 6
+
+# Guess outcomes returned by HangmanGame.guess()
+REPEAT = "repeat"
+CORRECT = "correct"
+WRONG = "wrong"
+WON = "won"
+LOST = "lost"
+
+_STAGES = [
+    # 0 Mistakes
+    """
+      ---
+      |/
+      |
+      |
+      |
+    __|__
+    """,
+    # 1 Mistake (Head)
+    """
+      ---
+      |/  |
+      |  ( )
+      |
+      |
+    __|__
+    """,
+    # 2 Mistakes (Body)
+    """
+      ---
+      |/  |
+      |  ( )
+      |   |
+      |
+    __|__
+    """,
+    # 3 Mistakes (Left Arm)
+    """
+      ---
+      |/  |
+      |  ( )
+      |  /|
+      |
+    __|__
+    """,
+    # 4 Mistakes (Right Arm)
+    """
+      ---
+      |/  |
+      |  ( )
+      |  /|\\
+      |
+    __|__
+    """,
+    # 5 Mistakes (Left Leg)
+    """
+      ---
+      |/  |
+      |  ( )
+      |  /|\\
+      |  /
+    __|__
+    """,
+    # 6 Mistakes (Game Over - Right Leg)
+    """
+      ---
+      |/  |
+      |  (X)
+      |  /|\\
+      |  / \\
+    __|__
+    """
+]
+
+# Rendered once at import instead of on every embed
+ART_STAGES = tuple(f"```\n{stage}\n```" for stage in _STAGES)
+
+
+def new_game_id():
+    """Short random id that fits in a button custom_id (e.g. 'hangman:1f9a04c2:A')."""
+    return secrets.token_hex(4)
+
+
+class HangmanGame:
+    """The state of one hangman round."""
+
+    __slots__ = ("game_id", "channel_id", "word", "setter_id", "guesser_id", "mistakes", "max_mistakes",
+                 "status", "guessed_letters", "positions", "remaining", "_mask_chars", "_mask")
+
+    def __init__(self, word, setter_id, guesser_id, guessed_letters=(), mistakes=0,
+                 max_mistakes=MAX_MISTAKES, status="active", game_id=None, channel_id=None):
+        self.game_id = game_id or new_game_id()
+        self.channel_id = channel_id
+        self.word = word
+        self.setter_id = setter_id
+        self.guesser_id = guesser_id
+        self.mistakes = mistakes
+        self.max_mistakes = max_mistakes
+        self.status = status
+        self.guessed_letters = set()
+
+        # letter -> positions in the word, so a correct guess only touches its own slots
+        positions = {}
+        for index, char in enumerate(word):
+            if char.isalpha():
+                positions.setdefault(char, []).append(index)
+        self.positions = {char: tuple(slots) for char, slots in positions.items()}
+
+        self.remaining = len(self.positions)
+        self._mask_chars = [char if char == " " else "_" for char in word]
+        self._mask = None
+
+        for letter in guessed_letters:
+            self._reveal(letter)
+
+    # --- Serialisation (hangman_games.json maps game_id -> this dict) ---
+
+    @classmethod
+    def from_dict(cls, data, game_id=None):
+        return cls(
+            game_id=game_id,
+            channel_id=data.get("channel_id"),
+            word=data["word"],
+            setter_id=data["setter_id"],
+            guesser_id=data["guesser_id"],
+            guessed_letters=data.get("guessed_letters", []),
+            mistakes=data.get("mistakes", 0),
+            max_mistakes=data.get("max_mistakes", MAX_MISTAKES),
+            status=data.get("status", "active"),
+        )
+
+    def to_dict(self):
+        return {
+            "channel_id": self.channel_id,
+            "word": self.word,
+            "setter_id": self.setter_id,
+            "guesser_id": self.guesser_id,
+            "guessed_letters": sorted(self.guessed_letters),
+            "mistakes": self.mistakes,
+            "max_mistakes": self.max_mistakes,
+            "status": self.status,
+        }
+
+    # --- Game Logic ---
+
+    def _reveal(self, letter):
+        """Records a letter as guessed; returns True if it was in the word."""
+        self.guessed_letters.add(letter)
+        slots = self.positions.get(letter)
+        if not slots:
+            return False
+        for index in slots:
+            self._mask_chars[index] = letter
+        self.remaining -= 1
+        self._mask = None
+        return True
+
+    def guess(self, letter):
+        """Applies a guess and returns one of REPEAT, CORRECT, WRONG, WON or LOST."""
+        letter = letter.upper()
+        if letter in self.guessed_letters:
+            return REPEAT
+
+        if self._reveal(letter):
+            if self.remaining == 0:
+                self.status = "won"
+                return WON
+            return CORRECT
+
+        self.mistakes += 1
+        if self.mistakes >= self.max_mistakes:
+            self.status = "lost"
+            return LOST
+        return WRONG
+
+    @property
+    def is_active(self):
+        return self.status == "active"
+
+    @property
+    def mask(self):
+        """The masked word display (e.g., H E L L O -> H _ L L _)."""
+        if self._mask is None:
+            self._mask = " ".join(self._mask_chars)
+        return self._mask
+
+    @property
+    def art(self):
+        return ART_STAGES[min(self.mistakes, len(ART_STAGES) - 1)]
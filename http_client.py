@@ -0,0 +1,48 @@
+import aiohttp
+import metrics
+
+# =========================================================================
+# SHARED HTTP SESSION
+# One pooled aiohttp session for the bot's event loop instead of a new
+# ClientSession (and TCP/TLS handshake) per request.
+# =========================================================================
+
+POOL_LIMIT = 50
+POOL_LIMIT_PER_HOST = 20
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
+
+_session = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Returns the shared session, creating it on first use (must be called on the bot's loop)."""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=POOL_LIMIT, limit_per_host=POOL_LIMIT_PER_HOST, ttl_dns_cache=300)
+        _session = aiohttp.ClientSession(connector=connector, timeout=DEFAULT_TIMEOUT)
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _pool_stats():
+    if _session is None or _session.closed:
+        return {}
+    connector = _session.connector
+    # aiohttp doesn't expose these publicly; fall back to zero if internals change
+    acquired = len(getattr(connector, "_acquired", ()))
+    idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+    return {("limit",): connector.limit, ("acquired",): acquired, ("idle",): idle}
+
+
+HTTP_POOL = metrics.Gauge(
+    "naekki_http_pool_connections",
+    "Shared aiohttp connection pool: configured limit, connections in use and idle keep-alive connections.",
+    ["state"],
+    callback=_pool_stats,
+)
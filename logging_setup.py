@@ -0,0 +1,124 @@
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+
+# =========================================================================
+# STRUCTURED LOGGING
+# Every log record is tagged with the current request context (cog,
+# command, guild, shard, request id) and put on an in-memory queue. A background
+# QueueListener thread formats the records as JSON and writes them to
+# stdout, so handlers on the event loop never wait on I/O.
+#
+# Environment:
+#   LOG_LEVEL=INFO                         root level
+#   LOG_LEVELS=WakeupCog=DEBUG,discord=WARNING
+#   LOG_SAMPLE=WakeupCog=0.1               keep 10% of that logger's DEBUG/INFO records
+#   LOG_FORMAT=json|text
+# =========================================================================
+
+# Fields describing the command/interaction currently being handled
+request_context = contextvars.ContextVar("request_context", default={})
+
+CONTEXT_FIELDS = ("cog", "command", "guild", "shard", "request_id", "latency")
+
+_listener = None
+
+
+def set_request_context(**fields):
+    """Tags every record logged from the current task with these fields."""
+    request_context.set({**request_context.get(), **fields})
+
+
+def _parse_mapping(value):
+    mapping = {}
+    for part in (value or "").split(","):
+        if "=" in part:
+            name, setting = part.split("=", 1)
+            mapping[name.strip()] = setting.strip()
+    return mapping
+
+
+class ContextFilter(logging.Filter):
+    """Copies the request context onto the record (runs on the caller's thread)."""
+
+    def filter(self, record):
+        for key, value in request_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of DEBUG/INFO records per logger; warnings and errors always pass."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.name)
+        return rate is None or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging():
+    """Installs the queue-based handler on the root logger. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    if os.getenv("LOG_FORMAT", "json") == "text":
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    else:
+        formatter = JsonFormatter()
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    rates = {name: float(rate) for name, rate in _parse_mapping(os.getenv("LOG_SAMPLE")).items()}
+    if rates:
+        queue_handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    for name, level in _parse_mapping(os.getenv("LOG_LEVELS")).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """Drains the queue and stops the writer thread (call on shutdown)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,135 @@
+# =========================================================================
+# LOVE JAR
+# Notes are kept in insertion order with id -> note, per-author and
+# per-recipient id lists, and a word -> ids inverted index, so adding a
+# note, drawing one at random and searching never walk the whole jar.
+# =========================================================================
+
+import random
+import re
+import secrets
+import time
+from collections import OrderedDict
+
+# How many recent draws per reader count as "recently shown"
+RECENT_WINDOW = 50
+# Re-rolls before settling for a recently shown note (small jars)
+MAX_DRAW_ATTEMPTS = 8
+# Ignore words shorter than this when indexing/searching
+MIN_WORD_LENGTH = 2
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return {word for word in _WORD.findall(text.casefold()) if len(word) >= MIN_WORD_LENGTH}
+
+
+def new_note_id():
+    return secrets.token_hex(6)
+
+
+def make_note(text, author_name, author_id=None, recipient_id=None):
+    return {
+        "id": new_note_id(),
+        "user": author_name,
+        "user_id": str(author_id) if author_id else None,
+        "recipient_id": str(recipient_id) if recipient_id else None,
+        "text": text,
+        "ts": time.time(),
+    }
+
+
+def author_key(note):
+    # Old notes only stored the author's display name
+    return note.get("user_id") or note.get("user")
+
+
+class LoveJar:
+    def __init__(self, notes=()):
+        self.notes = []
+        self.by_id = {}
+        self.by_author = {}
+        # recipient id -> note ids; None holds notes meant for anyone
+        self.by_recipient = {}
+        self.index = {}
+        # reader id -> OrderedDict(note id -> reader's draw number when shown)
+        self._recent = {}
+        self._draws = {}
+        for note in notes:
+            self.add(note)
+
+    def __len__(self):
+        return len(self.notes)
+
+    def __bool__(self):
+        return bool(self.notes)
+
+    def add(self, note):
+        """Indexes a note. Returns False if a note with the same id is already in the jar."""
+        if "id" not in note:
+            # Notes from the old love_jar.json: give them an id, and their
+            # position as a timestamp so they keep sorting before newer ones
+            note = dict(note, id=new_note_id(), ts=len(self.notes))
+        if note["id"] in self.by_id:
+            return False
+        note_id = note["id"]
+        self.notes.append(note)
+        self.by_id[note_id] = note
+        self.by_author.setdefault(author_key(note), []).append(note_id)
+        self.by_recipient.setdefault(note.get("recipient_id"), []).append(note_id)
+        for word in tokenize(note["text"]):
+            self.index.setdefault(word, set()).add(note_id)
+        return True
+
+    def draw(self, reader_id, rng=random):
+        """
+        Picks a note addressed to the reader (or to anyone) at random, in
+        O(1): a note the reader saw k draws ago is accepted with probability
+        k / RECENT_WINDOW, so recent repeats are rare without tracking weights
+        for the whole jar.
+        """
+        pools = [self.by_recipient.get(str(reader_id), ()), self.by_recipient.get(None, ())]
+        total = sum(len(pool) for pool in pools)
+        if not total:
+            return None
+
+        reader = str(reader_id)
+        recent = self._recent.setdefault(reader, OrderedDict())
+        draws = self._draws[reader] = self._draws.get(reader, 0) + 1
+        for _ in range(MAX_DRAW_ATTEMPTS):
+            position = rng.randrange(total)
+            if position < len(pools[0]):
+                note_id = pools[0][position]
+            else:
+                note_id = pools[1][position - len(pools[0])]
+            shown_at = recent.get(note_id)
+            if shown_at is None or rng.random() < (draws - shown_at) / RECENT_WINDOW:
+                break
+
+        recent[note_id] = draws
+        recent.move_to_end(note_id)
+        while len(recent) > RECENT_WINDOW:
+            recent.popitem(last=False)
+        return self.by_id[note_id]
+
+    def search(self, query, reader_id, author=None):
+        """
+        Notes the reader may see (addressed to them or to anyone) containing
+        every word of the query, newest first, optionally by one author.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        # Intersect starting from the rarest word so the working set stays small
+        postings = sorted((self.index.get(word, set()) for word in words), key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches &= posting
+            if not matches:
+                return []
+        reader = str(reader_id)
+        matches = {note_id for note_id in matches if self.by_id[note_id].get("recipient_id") in (None, reader)}
+        if author is not None:
+            matches = {note_id for note_id in matches if author_key(self.by_id[note_id]) == str(author)}
+        return sorted((self.by_id[note_id] for note_id in matches), key=lambda note: note["ts"], reverse=True)
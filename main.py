@@ -1,7 +1,18 @@
 import os
+import logging
+from logging_setup import configure_logging, stop_logging
+
+# Set up structured, queue-based logging before anything else logs
+configure_logging()
+logger = logging.getLogger('Main')
+
 import discord
 from discord.ext import commands
-from webserver import keep_alive 
+from webserver import keep_alive, stop_server
+from command_tree import BotTree, install_hooks
+from sharding import build_bot, install_shard_metrics
+from watchdog import watchdog
+import shutdown
 from google import genai
 from google.genai import types
 import asyncio
@@ -11,21 +22,24 @@ DISCORD_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 if not DISCORD_TOKEN or not GEMINI_API_KEY:
-    print("FATAL ERROR: Please set both DISCORD_TOKEN and GEMINI_API_KEY environment variables.")
+    logger.critical("FATAL ERROR: Please set both DISCORD_TOKEN and GEMINI_API_KEY environment variables.")
     exit()
 
 # Initialize Gemini
 try:
     gemini_client = genai.Client(api_key=GEMINI_API_KEY)
 except Exception as e:
-    print(f"Error initializing Gemini client: {e}")
+    logger.critical(f"Error initializing Gemini client: {e}")
     exit()
 
 # Bot Setup
 intents = discord.Intents.default()
 intents.message_content = True 
 intents.dm_messages = True
-bot = commands.Bot(command_prefix='!', intents=intents)
+# A plain Bot, or an AutoShardedBot when SHARD_COUNT is set (see sharding.py)
+bot = build_bot(command_prefix='!', intents=intents, tree_cls=BotTree)
+install_hooks(bot)
+install_shard_metrics(bot)
 
 # Conversation History for AI
 conversation_histories = {} 
@@ -36,38 +50,60 @@ SYSTEM_INSTRUCTION = (
 )
 
 @bot.event
-async def on_ready():
-    print(f'Logged in as {bot.user} (ID: {bot.user.id})')
-    
+async def setup_hook():
+    # Runs once before connecting (unlike on_ready, which fires on every
+    # reconnect and, when sharded, again as shards come back), so cogs are
+    # loaded exactly once however many shards this process runs
+    watchdog.start()
+    # SIGTERM drains in-flight work and snapshots state instead of killing the process
+    shutdown.install(bot)
+
     # --- Load Cogs ---
     # Load all your feature cogs here
-    initial_extensions = ['fun', 'ai_chat', 'couples', 'wakeup','webserver','webhook_server']
+    initial_extensions = ['fun', 'ai_chat', 'couple', 'wakeup', 'music_cog', 'webserver', 'webhook_server', 'reloader']
     
     for extension in initial_extensions:
         try:
             await bot.load_extension(extension)
-            print(f"Successfully loaded {extension}.")
+            logger.info(f"Successfully loaded {extension}.")
         except Exception as e:
-            print(f"Failed to load {extension}: {e}")
+            logger.error(f"Failed to load {extension}: {e}")
+
+    # Music queues, chat history, ... saved by the previous process on SIGTERM
+    shutdown.restore_snapshot(bot)
 
     # --- Sync Commands ---
+    # In cluster mode only one worker syncs (supervisor.py sets SYNC_COMMANDS=0 on the rest)
+    if os.getenv("SYNC_COMMANDS", "1") == "0":
+        return
     try:
         synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} application commands globally.")
+        logger.info(f"Synced {len(synced)} application commands globally.")
     except Exception as e:
-        print(f"Failed to sync application commands: {e}")
+        logger.error(f"Failed to sync application commands: {e}")
+
+@bot.event
+async def on_ready():
+    logger.info(f'Logged in as {bot.user} (ID: {bot.user.id}) on {bot.shard_count or 1} shard(s), {len(bot.guilds)} guilds')
 
 @bot.event
 async def on_message(message):
     if message.author == bot.user:
         return
+    if shutdown.lifecycle.draining:
+        return
     
     # ... (Keep your existing AI Chat logic here if you haven't moved it to ai_chat.py) ...
     # If you are using the 'ai_chat' cog, you don't need logic here, just:
-    await bot.process_commands(message)
+    async with shutdown.lifecycle.tracking():
+        await bot.process_commands(message)
 
 # --- Startup ---
 keep_alive() # Starts the webserver defined in webserver.py
 
 if DISCORD_TOKEN:
-    bot.run(DISCORD_TOKEN)
\ No newline at end of file
+    # log_handler=None keeps discord.py from installing its own (blocking) stdout handler
+    bot.run(DISCORD_TOKEN, log_handler=None)
+    # bot.run() returns once graceful_shutdown() has closed the bot
+    stop_server()
+    stop_logging()
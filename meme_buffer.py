@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+import aiohttp
+import http_client
+import metrics
+
+logger = logging.getLogger('MemeBuffer')
+
+# =========================================================================
+# MEME PREFETCH BUFFER
+# Each subreddit has a small ring buffer of memes fetched ahead of time in
+# batches (meme-api's /gimme/<subreddit>/<count>), so /meme answers from
+# memory instead of waiting on the API. The buffer refills itself in the
+# background when it runs low, skips posts that were shown recently, and
+# stops calling the API for a while when it keeps failing.
+# =========================================================================
+
+CAPACITY = 150
+LOW_WATER = 50
+# meme-api returns at most 50 memes per request
+BATCH_SIZE = 50
+# While callers are waiting on an empty buffer, up to this many batches
+# are fetched at once per subreddit
+MAX_PARALLEL_REFILLS = 4
+# How many recently buffered/shown posts to remember for de-duplication
+DEDUPE_WINDOW = 500
+# How long a caller waits for a refill when the buffer is empty
+EMPTY_WAIT = 8
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+
+class CircuitBreaker:
+    """
+    Opens after FAILURES consecutive errors; while open, calls are refused
+    until the cooldown ends, then one trial call decides whether it closes
+    again. Each re-open doubles the cooldown, up to max_cooldown.
+    """
+
+    FAILURES = 3
+
+    def __init__(self, cooldown=30, max_cooldown=300):
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.cooldown = self.base_cooldown
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial:
+            # The trial call failed: stay open, for longer
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self.opened_at = time.monotonic()
+        elif self.failures >= self.FAILURES and self.opened_at is None:
+            self.opened_at = time.monotonic()
+            logger.warning(f"Meme API failing, pausing requests for {self.cooldown}s")
+        self._trial = False
+
+
+class MemeBuffer:
+    """Prefetched memes per subreddit."""
+
+    def __init__(self, base_url, capacity=CAPACITY, low_water=LOW_WATER, batch_size=BATCH_SIZE):
+        self.base_url = base_url
+        self.capacity = capacity
+        self.low_water = low_water
+        self.batch_size = batch_size
+        self._buffers = {}
+        # subreddit -> set of in-flight refill tasks
+        self._refills = {}
+        # subreddit -> callers waiting in get()
+        self._waiting = {}
+        # postLink -> None, oldest first
+        self._seen = OrderedDict()
+        self.breaker = CircuitBreaker()
+        _buffers.append(self)
+
+    def __len__(self):
+        return sum(len(buffer) for buffer in self._buffers.values())
+
+    def sizes(self):
+        return {subreddit: len(buffer) for subreddit, buffer in self._buffers.items()}
+
+    def _pop(self, subreddit):
+        buffer = self._buffers.setdefault(subreddit, deque(maxlen=self.capacity))
+        meme = buffer.popleft() if buffer else None
+        if len(buffer) < self.low_water and not self._refills.get(subreddit):
+            self.refill(subreddit)
+        return meme
+
+    def take(self, subreddit):
+        """A buffered meme, or None if there isn't one. Tops the buffer up in the background."""
+        meme = self._pop(subreddit)
+        MEME_REQUESTS.inc(result="hit" if meme else "miss")
+        return meme
+
+    async def get(self, subreddit, wait=EMPTY_WAIT):
+        """For when take() came back empty: waits (up to `wait` seconds) for the refill."""
+        meme = self._pop(subreddit)
+        if meme is not None:
+            return meme
+        waiting = self._waiting[subreddit] = self._waiting.get(subreddit, 0) + 1
+        try:
+            deadline = time.monotonic() + wait
+            buffer = self._buffers[subreddit]
+            while not buffer:
+                tasks = self._refills.setdefault(subreddit, set())
+                # More waiters than the in-flight batches will cover: fetch another
+                if waiting > len(tasks) * self.batch_size and len(tasks) < MAX_PARALLEL_REFILLS:
+                    self.refill(subreddit)
+                if not tasks:
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                await asyncio.wait([asyncio.shield(task) for task in tasks], timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            return buffer.popleft()
+        finally:
+            self._waiting[subreddit] -= 1
+
+    def refill(self, subreddit):
+        """Starts a background batch fetch unless the API is paused."""
+        if not self.breaker.allow():
+            return None
+        task = asyncio.get_running_loop().create_task(self._refill(subreddit))
+        tasks = self._refills.setdefault(subreddit, set())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        return task
+
+    async def _refill(self, subreddit):
+        started_at = time.perf_counter()
+        try:
+            session = http_client.get_session()
+            async with session.get(f"{self.base_url}/{subreddit}/{self.batch_size}", timeout=REQUEST_TIMEOUT) as response:
+                response.raise_for_status()
+                data = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.breaker.record_failure()
+            MEME_REFILLS.inc(result="error")
+            logger.warning(f"Meme refill for r/{subreddit} failed: {e}")
+            return
+        self.breaker.record_success()
+        MEME_REFILLS.inc(result="ok")
+        MEME_REFILL_LATENCY.observe(time.perf_counter() - started_at)
+
+        buffer = self._buffers.setdefault(subreddit, deque(maxlen=self.capacity))
+        added = 0
+        for meme in data.get("memes", []):
+            link = meme.get("postLink") or meme.get("url")
+            if not meme.get("url") or meme.get("nsfw") or link in self._seen:
+                continue
+            self._seen[link] = None
+            if len(self._seen) > DEDUPE_WINDOW:
+                self._seen.popitem(last=False)
+            buffer.append(meme)
+            added += 1
+        MEME_DUPLICATES.inc(len(data.get("memes", [])) - added)
+
+    def prefill(self, *subreddits):
+        for subreddit in subreddits:
+            self._buffers.setdefault(subreddit, deque(maxlen=self.capacity))
+            self.refill(subreddit)
+
+    def export(self):
+        """The buffered memes and recently seen posts, for restore() on a new buffer."""
+        return {
+            "buffers": {subreddit: list(buffer) for subreddit, buffer in self._buffers.items()},
+            "seen": list(self._seen),
+        }
+
+    def restore(self, state):
+        for link in state["seen"]:
+            self._seen[link] = None
+        while len(self._seen) > DEDUPE_WINDOW:
+            self._seen.popitem(last=False)
+        for subreddit, memes in state["buffers"].items():
+            self._buffers.setdefault(subreddit, deque(maxlen=self.capacity)).extendleft(reversed(memes))
+
+    async def close(self):
+        for tasks in self._refills.values():
+            for task in list(tasks):
+                task.cancel()
+        self._refills.clear()
+        if self in _buffers:
+            _buffers.remove(self)
+
+
+_buffers = []
+
+
+def _buffered():
+    sizes = {}
+    for buffer in _buffers:
+        for subreddit, size in buffer.sizes().items():
+            sizes[(subreddit,)] = sizes.get((subreddit,), 0) + size
+    return sizes
+
+
+def _breaker_open():
+    return {(): sum(1 for buffer in _buffers if buffer.breaker.state != "closed")}
+
+
+MEME_BUFFERED = metrics.Gauge(
+    "naekki_meme_buffered",
+    "Memes prefetched and waiting in the buffer, per subreddit.",
+    ["subreddit"],
+    callback=_buffered,
+)
+MEME_BREAKER_OPEN = metrics.Gauge(
+    "naekki_meme_breaker_open",
+    "1 while meme-api requests are paused after repeated failures.",
+    callback=_breaker_open,
+)
+MEME_REQUESTS = metrics.Counter(
+    "naekki_meme_requests_total",
+    "Memes asked of the buffer, by whether one was ready (hit) or not (miss).",
+    ["result"],
+)
+MEME_REFILLS = metrics.Counter(
+    "naekki_meme_refills_total",
+    "Background batch fetches from meme-api, by outcome.",
+    ["result"],
+)
+MEME_DUPLICATES = metrics.Counter(
+    "naekki_meme_duplicates_total",
+    "Fetched memes dropped because they were shown or buffered recently (or NSFW).",
+)
+MEME_REFILL_LATENCY = metrics.Histogram(
+    "naekki_meme_refill_seconds",
+    "Time for one batch fetch from meme-api.",
+)
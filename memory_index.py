@@ -0,0 +1,462 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import http_client
+import metrics
+import partitions
+import storage
+
+try:
+    import numpy as np
+except ImportError:
+    # Without NumPy the AI chat simply doesn't get long-term memories
+    np = None
+
+logger = logging.getLogger('MemoryIndex')
+
+# =========================================================================
+# LONG-TERM MEMORY INDEX
+# Love notes, shared list items, countdown titles and chat turns that fell
+# out of the AI's 20-turn window are embedded and kept in a per-scope
+# vector index (same scopes as partitions.py), so the AI chat can pull the
+# few most relevant ones into its prompt.
+#
+# Each scope's index is a memory-mapped float32 matrix (DATA_DIR/memory/
+# <scope>.f32, one normalised row per memory) plus a JSON sidecar with the
+# texts; a search is one brute-force matrix-vector product, which is well
+# under a millisecond at the few thousand rows a scope holds.
+#
+# Writes only queue texts; they are embedded in batches (one API call per
+# BATCH_SIZE texts) a moment later. An index opened for the first time is
+# backfilled from the registered sources (see register_source()).
+#
+# MEMORY_EMBEDDINGS picks the embedder:
+#   gemini   text-embedding-004 (default when GEMINI_API_KEY is set)
+#   hashing  deterministic local feature hashing, for offline use/tests
+#   off      no memory index at all
+# =========================================================================
+
+BACKEND = os.getenv("MEMORY_EMBEDDINGS", "gemini").lower()
+EMBED_URL = os.getenv("GEMINI_EMBED_URL", "https://generativelanguage.googleapis.com/v1beta/models/text-embedding-004:batchEmbedContents")
+EMBED_MODEL = "models/text-embedding-004"
+HASHING_DIM = 256
+# batchEmbedContents takes at most 100 texts per call
+BATCH_SIZE = 100
+# How long queued texts wait for company before they're embedded
+BATCH_DELAY = 0.5
+# Longest wait between retries while the embedder keeps failing
+MAX_RETRY_DELAY = 300
+INITIAL_CAPACITY = 256
+TOP_K = 5
+# Overrides the embedder's own min_score (the cosine similarity a memory needs to be used)
+MIN_SCORE = os.getenv("MEMORY_MIN_SCORE")
+MAX_TEXT_LENGTH = 500
+# Cluster workers (see supervisor.py) each keep their own copy of the index
+_worker = os.getenv("WORKER_ID")
+KIND = f"memory-{_worker}" if _worker else "memory"
+
+_WORD = re.compile(r"\w{3,}")
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class HashingEmbedder:
+    """
+    Deterministic, offline embeddings: words of 3+ letters are hashed into
+    HASHING_DIM signed buckets. Only catches shared words, but needs no API.
+    """
+
+    name = f"hashing-{HASHING_DIM}"
+    dim = HASHING_DIM
+    min_score = 0.1
+
+    def embed_sync(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in zip(vectors, texts):
+            for feature in set(_WORD.findall(text.casefold())):
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                row[int.from_bytes(digest[:4], "little") % self.dim] += 1.0 if digest[4] & 1 else -1.0
+        return _normalize(vectors)
+
+    async def embed(self, texts):
+        return await asyncio.to_thread(self.embed_sync, texts)
+
+
+class GeminiEmbedder:
+    name = "text-embedding-004"
+    dim = 768
+    min_score = 0.55
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+
+    async def embed(self, texts):
+        session = http_client.get_session()
+        values = []
+        for start in range(0, len(texts), BATCH_SIZE):
+            payload = {"requests": [
+                {"model": EMBED_MODEL, "content": {"parts": [{"text": text}]}}
+                for text in texts[start:start + BATCH_SIZE]
+            ]}
+            async with session.post(f"{EMBED_URL}?key={self.api_key}", json=payload) as response:
+                response.raise_for_status()
+                data = await response.json()
+            values.extend(embedding["values"] for embedding in data["embeddings"])
+        return _normalize(np.asarray(values, dtype=np.float32))
+
+
+def make_embedder():
+    if np is None or BACKEND == "off":
+        return None
+    api_key = os.getenv("GEMINI_API_KEY")
+    if BACKEND == "hashing" or not api_key:
+        return HashingEmbedder()
+    return GeminiEmbedder(api_key)
+
+
+def _read_json(filename):
+    try:
+        with open(filename, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class VectorIndex:
+    """One scope's memories: rows of a memory-mapped matrix, with [key, group, text] per row."""
+
+    def __init__(self, scope, model, dim):
+        self.scope = scope
+        self.model = model
+        self.dim = dim
+        self.vectors_file = partitions.partition_path(KIND, scope, "f32")
+        self.meta_file = partitions.partition_path(KIND, scope, "json")
+
+        meta = _read_json(self.meta_file) or {}
+        rows = meta.get("rows", [])
+        stored_rows = os.path.getsize(self.vectors_file) // (4 * dim) if os.path.exists(self.vectors_file) else 0
+        if meta.get("model") != model or meta.get("dim") != dim or len(rows) > stored_rows:
+            # New index, a different embedder, or a sidecar ahead of its vectors: start over
+            rows = []
+            meta = {}
+        # [key, group, text] per row; None marks a removed row until the next compaction
+        self.rows = rows
+        self.keys = {row[0]: position for position, row in enumerate(rows) if row is not None}
+        self.dead = {position for position, row in enumerate(rows) if row is None}
+        # Sources (see MemoryIndex.register_source) already backfilled into this index
+        self.built = set(meta.get("built", []))
+        self.vectors = None
+        self._open(max(INITIAL_CAPACITY, stored_rows if rows else 0))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _open(self, capacity):
+        size = capacity * self.dim * 4
+        if not os.path.exists(self.vectors_file) or os.path.getsize(self.vectors_file) < size:
+            with open(self.vectors_file, "ab") as f:
+                f.truncate(size)
+        self.vectors = np.memmap(self.vectors_file, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _reserve(self, rows):
+        capacity = len(self.vectors)
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        self.vectors.flush()
+        self.vectors = None
+        self._open(capacity)
+
+    def group_keys(self, group):
+        return [row[0] for row in self.rows if row is not None and row[1] == group]
+
+    def text(self, key):
+        position = self.keys.get(key)
+        return self.rows[position][2] if position is not None else None
+
+    def upsert(self, entries, vectors):
+        """entries: [(key, group, text)], one row of `vectors` each."""
+        self._reserve(len(self.rows) + len(entries))
+        for (key, group, text), vector in zip(entries, vectors):
+            position = self.keys.get(key)
+            if position is None:
+                position = self.keys[key] = len(self.rows)
+                self.rows.append(None)
+            self.rows[position] = [key, group, text]
+            self.vectors[position] = vector
+
+    def remove(self, keys):
+        for key in keys:
+            position = self.keys.pop(key, None)
+            if position is not None:
+                self.rows[position] = None
+                self.vectors[position] = 0.0
+                self.dead.add(position)
+        if len(self.dead) > 64 and len(self.dead) > len(self.rows) // 2:
+            self._compact()
+
+    def trim(self, group, limit):
+        """Drops a group's oldest rows beyond `limit`."""
+        keys = self.group_keys(group)
+        if len(keys) > limit:
+            self.remove(keys[:len(keys) - limit])
+
+    def _compact(self):
+        live = [position for position, row in enumerate(self.rows) if row is not None]
+        self.vectors[:len(live)] = self.vectors[live]
+        self.rows = [self.rows[position] for position in live]
+        self.keys = {row[0]: position for position, row in enumerate(self.rows)}
+        self.dead.clear()
+
+    def search(self, query, k=TOP_K):
+        """[(score, text)] of the k rows most similar to a normalised query vector."""
+        count = len(self.rows)
+        if not self.keys:
+            return []
+        scores = np.asarray(self.vectors[:count] @ query)
+        if self.dead:
+            scores[list(self.dead)] = -np.inf
+        k = min(k, len(self.keys))
+        best = np.argpartition(-scores, k - 1)[:k]
+        return [(float(scores[position]), self.rows[position][2]) for position in best[np.argsort(-scores[best])]]
+
+    def snapshot(self):
+        return {"model": self.model, "dim": self.dim, "built": sorted(self.built), "rows": list(self.rows)}
+
+    def save_sync(self):
+        self.vectors.flush()
+        storage.write_json_atomic(self.meta_file, self.snapshot())
+
+    async def save(self):
+        data = self.snapshot()
+        await asyncio.to_thread(self.vectors.flush)
+        await asyncio.to_thread(storage.write_json_atomic, self.meta_file, data)
+
+    async def flush(self):
+        await self.save()
+
+    def release(self):
+        self.vectors = None
+
+    def close_sync(self):
+        self.save_sync()
+        self.release()
+
+
+class MemoryIndex:
+    """Queues memories per scope, embeds them in batches and answers similarity searches."""
+
+    def __init__(self, embedder=None):
+        self.embedder = embedder if embedder is not None else make_embedder()
+        self.min_score = float(MIN_SCORE) if MIN_SCORE else getattr(self.embedder, "min_score", 0.0)
+        self.indexes = partitions.PartitionCache(KIND, self._open)
+        # source name -> fetch(scope) returning {group: {key: text}}
+        self._sources = {}
+        # group -> max rows kept per scope
+        self._limits = {}
+        # (scope, key) -> (group, text), waiting to be embedded
+        self._pending = {}
+        # Taken out of _pending and being embedded right now
+        self._inflight = {}
+        # (scope, group) -> fetch() for groups to re-sync at the next flush
+        self._stale = {}
+        self._changed = set()
+        # Failed embedding calls in a row; the next flush backs off accordingly
+        self._failures = 0
+        self._flush_task = None
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def enabled(self):
+        return self.embedder is not None
+
+    # --- Sources ---
+
+    def register_source(self, name, fetch):
+        """fetch(scope) -> {group: {key: text}}: everything a cog would index for that scope, for backfills."""
+        self._sources[name] = fetch
+
+    def unregister_source(self, name):
+        self._sources.pop(name, None)
+
+    def _open(self, scope):
+        index = VectorIndex(scope, self.embedder.name, self.embedder.dim)
+        for name, fetch in self._sources.items():
+            if name in index.built:
+                continue
+            try:
+                groups = fetch(scope)
+            except Exception:
+                logger.exception(f"Memory source {name} failed for {scope}")
+                continue
+            for group, entries in groups.items():
+                self._sync(index, group, entries)
+            index.built.add(name)
+        return index
+
+    # --- Writes ---
+
+    def add(self, scope, group, entries, limit=None):
+        """Queues {key: text} for embedding. With a limit, only the newest `limit` rows of the group are kept."""
+        if not self.enabled or not entries:
+            return
+        if limit is not None:
+            self._limits[group] = limit
+        for key, text in entries.items():
+            self._pending[(scope, key)] = (group, text[:MAX_TEXT_LENGTH])
+        self._schedule()
+
+    def sync(self, scope, group, entries):
+        """Makes a group hold exactly these {key: text}: stale rows are dropped, only new texts embedded."""
+        if self.enabled:
+            self._sync(self.indexes.get(scope), group, entries)
+
+    def sync_later(self, scope, group, fetch):
+        """sync() with fetch() -> {key: text}, deferred to the next flush so a burst of writes costs one sync."""
+        if self.enabled:
+            self._stale[(scope, group)] = fetch
+            self._schedule()
+
+    def _sync(self, index, group, entries):
+        stale = [key for key in index.group_keys(group) if key not in entries]
+        for waiting in (self._pending, self._inflight):
+            stale_waiting = [item for item, (pending_group, _) in waiting.items()
+                             if item[0] == index.scope and pending_group == group and item[1] not in entries]
+            for item in stale_waiting:
+                del waiting[item]
+        if stale:
+            index.remove(stale)
+            self._changed.add(index.scope)
+        self.add(index.scope, group, {
+            key: text for key, text in entries.items() if index.text(key) != text[:MAX_TEXT_LENGTH]
+        })
+        self._schedule()
+
+    def _schedule(self):
+        if self._flush_task is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            delay = BATCH_DELAY
+            if self._failures:
+                delay = min(BATCH_DELAY * 2 ** self._failures, MAX_RETRY_DELAY)
+            await asyncio.sleep(delay)
+            await self.flush()
+        finally:
+            self._flush_task = None
+        if self._pending or self._stale or self._changed:
+            self._schedule()
+
+    async def flush(self):
+        """Embeds everything queued (BATCH_SIZE texts per call) and saves the changed indexes."""
+        async with self._flush_lock:
+            await self._flush()
+
+    async def _flush(self):
+        stale, self._stale = self._stale, {}
+        for (scope, group), fetch in stale.items():
+            self._sync(self.indexes.get(scope), group, fetch())
+
+        while self._pending:
+            batch = list(self._pending.items())[:BATCH_SIZE]
+            for item, _ in batch:
+                del self._pending[item]
+            self._inflight.update(batch)
+            started_at = time.perf_counter()
+            try:
+                vectors = await self.embedder.embed([text for _, (_, text) in batch])
+            except Exception as e:
+                # Back in the queue for a retry, unless removed or queued again meanwhile
+                for item, value in self._inflight.items():
+                    self._pending.setdefault(item, value)
+                self._inflight.clear()
+                self._failures += 1
+                MEMORY_EMBEDDED.inc(len(batch), result="error")
+                logger.warning(f"Embedding {len(batch)} memories failed (attempt {self._failures}): {e}")
+                break
+            self._failures = 0
+            MEMORY_EMBED_LATENCY.observe(time.perf_counter() - started_at)
+            MEMORY_EMBEDDED.inc(len(batch), result="ok")
+
+            by_scope = {}
+            for ((scope, key), (group, text)), vector in zip(batch, vectors):
+                # Skip anything removed or replaced while the batch was out
+                if self._inflight.get((scope, key)) == (group, text):
+                    by_scope.setdefault(scope, ([], []))
+                    by_scope[scope][0].append((key, group, text))
+                    by_scope[scope][1].append(vector)
+            self._inflight.clear()
+            for scope, (entries, rows) in by_scope.items():
+                index = self.indexes.get(scope)
+                index.upsert(entries, rows)
+                for group in {group for _, group, _ in entries}:
+                    if group in self._limits:
+                        index.trim(group, self._limits[group])
+                self._changed.add(scope)
+
+        changed, self._changed = self._changed, set()
+        for scope in changed:
+            index = self.indexes.loaded().get(scope)
+            if index is not None:
+                await index.save()
+
+    # --- Reads ---
+
+    async def search(self, scopes, text, k=TOP_K):
+        """The texts most relevant to `text` across these scopes (best first, above min_score)."""
+        if not self.enabled or not text.strip():
+            return []
+        started_at = time.perf_counter()
+        try:
+            query = (await self.embedder.embed([text[:MAX_TEXT_LENGTH]]))[0]
+        except Exception as e:
+            logger.warning(f"Couldn't embed the memory query: {e}")
+            return []
+        results = []
+        for scope in dict.fromkeys(scopes):
+            results.extend(self.indexes.get(scope).search(query, k))
+        results.sort(reverse=True)
+        MEMORY_SEARCH.observe(time.perf_counter() - started_at)
+        return [text for score, text in results[:k] if score >= self.min_score]
+
+    async def close(self):
+        await self.flush()
+        await self.indexes.close()
+
+
+memory = MemoryIndex()
+
+
+MEMORY_EMBEDDED = metrics.Counter(
+    "naekki_memory_embedded_total",
+    "Texts sent to the embedder for the AI's memory index, by outcome.",
+    ["result"],
+)
+MEMORY_EMBED_LATENCY = metrics.Histogram(
+    "naekki_memory_embed_seconds",
+    "Time to embed one batch of memories.",
+)
+MEMORY_SEARCH = metrics.Histogram(
+    "naekki_memory_search_seconds",
+    "Embedding a query and searching the memory index, per AI reply.",
+)
+MEMORY_ROWS = metrics.Gauge(
+    "naekki_memory_rows",
+    "Memories held by the loaded memory indexes.",
+    callback=lambda: {(): sum(len(index) for index in memory.indexes.loaded().values())},
+)
@@ -0,0 +1,232 @@
+import threading
+import time
+
+# =========================================================================
+# METRICS
+# A tiny Prometheus-style registry. Cogs record into module-level metrics
+# below and webserver.py serves render() at /metrics. Everything is guarded
+# by one lock because the web server runs on its own thread and loop.
+# =========================================================================
+
+# Latency buckets in seconds (3.0 is Discord's interaction response window)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 2.5, 3.0, 5.0, 10.0)
+
+_lock = threading.Lock()
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """A value that only goes up (e.g. number of errors)."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        """{label tuple: value} copy, for in-process readers like the load tester."""
+        with _lock:
+            return dict(self._values)
+
+    def collect(self):
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Gauge:
+    """A value that can go up and down, either set directly or read from a callback."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        # callback() returns {label tuple: value}, evaluated at scrape time
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values = {}
+        _registry.append(self)
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with _lock:
+            self._values[key] = value
+
+    def collect(self):
+        values = dict(self._values)
+        if self.callback is not None:
+            try:
+                values.update(self.callback())
+            except Exception:
+                pass
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram:
+    """Counts observations into cumulative buckets, plus their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label tuple -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with _lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        """Context manager that observes the elapsed wall time."""
+        return _Timer(self, labels)
+
+    def snapshot(self):
+        """{label tuple: (count, sum)}, for in-process readers like the load tester."""
+        with _lock:
+            return {key: (sum(series[:-1]), series[-1]) for key, series in self._values.items()}
+
+    def collect(self):
+        for key, series in self._values.items():
+            cumulative = 0
+            for index, bound in enumerate(self.buckets):
+                cumulative += series[index]
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', bound))} {cumulative}"
+            cumulative += series[len(self.buckets)]
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+
+def render():
+    """Returns every metric in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for metric in _registry:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+# =========================================================================
+# BOT METRICS
+# =========================================================================
+
+INTERACTION_DEFER = Histogram(
+    "naekki_interaction_defer_seconds",
+    "Time from Discord creating an interaction to our defer being acknowledged.",
+    ["command"],
+)
+INTERACTION_AGE = Histogram(
+    "naekki_interaction_start_age_seconds",
+    "How old an interaction already is when its handler starts running.",
+    ["command"],
+)
+COMMAND_DURATION = Histogram(
+    "naekki_command_duration_seconds",
+    "Handler duration per command.",
+    ["command", "kind"],
+)
+COMMAND_ERRORS = Counter(
+    "naekki_command_errors_total",
+    "Commands that raised an error.",
+    ["command", "kind"],
+)
+GEMINI_REQUEST = Histogram(
+    "naekki_gemini_request_seconds",
+    "Full Gemini generateContent round-trip.",
+    ["status"],
+)
+GEMINI_TTFT = Histogram(
+    "naekki_gemini_ttft_seconds",
+    "Time until Gemini's response headers (first byte) arrive.",
+)
+VOICE_MONKEY_REQUEST = Histogram(
+    "naekki_voice_monkey_request_seconds",
+    "Voice Monkey API round-trip.",
+    ["source", "status"],
+)
+YTDLP_EXTRACT = Histogram(
+    "naekki_ytdlp_extract_seconds",
+    "yt_dlp extract_info duration.",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0),
+)
+PERSISTENCE_FLUSH = Histogram(
+    "naekki_persistence_flush_seconds",
+    "Time spent writing a JSON store to disk.",
+    ["file"],
+)
+PERSISTENCE_BYTES = Counter(
+    "naekki_persistence_bytes_total",
+    "Bytes written to disk by JSON store flushes.",
+    ["file"],
+)
+LOOP_LAG = Histogram(
+    "naekki_event_loop_lag_seconds",
+    "How late the watchdog's heartbeat woke up.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+def interaction_age(interaction):
+    """Seconds since Discord created the interaction (based on its snowflake)."""
+    return time.time() - interaction.created_at.timestamp()
+
+
+def observe_defer(interaction):
+    """Records how long it took to get a defer in, relative to Discord's 3-second window."""
+    name = interaction.command.qualified_name if interaction.command else "component"
+    INTERACTION_DEFER.observe(interaction_age(interaction), command=name)
+
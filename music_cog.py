@@ -2,6 +2,15 @@ import discord
 from discord.ext import commands
 import yt_dlp
 import asyncio
+import logging
+import time
+from collections import deque
+import paginator
+import metrics
+import ratelimit
+
+# Set up logging for the cog
+logger = logging.getLogger('MusicCog')
 
 # Suppress harmless errors relating to voice
 yt_dlp.utils.bug_reports_message = lambda: ''
@@ -22,15 +31,203 @@ FFMPEG_OPTIONS = {
     'options': '-vn'  # Tells ffmpeg to not expect video
 }
 
+# How many track-transition samples each player keeps for stats
+TRANSITION_SAMPLES = 50
+# How often a player that took over after a hot reload checks whether the
+# track it inherited has finished
+HANDOFF_POLL = 0.25
+# Restored queues are only resumed if the bot can reconnect this quickly
+RESTORE_CONNECT_TIMEOUT = 15
+
 
 class Song:
-    """A simple class to hold song information for the queue."""
+    """
+    A queued track. Holds the requester's id and display name rather than the
+    discord.Member, so a long queue doesn't pin member objects in memory.
+    """
 
-    def __init__(self, source, title, url, requester):
+    __slots__ = ("source", "title", "url", "requester_id", "requester_name", "offset")
+
+    def __init__(self, source, title, url, requester_id, requester_name, offset=0.0):
         self.source = source
         self.title = title
         self.url = url
-        self.requester = requester  # discord.Member object
+        self.requester_id = requester_id
+        self.requester_name = requester_name
+        # Seconds into the track to start from (a track resumed after a restart)
+        self.offset = offset
+
+    @classmethod
+    def requested_by(cls, source, title, url, member):
+        return cls(source, title, url, member.id, member.display_name)
+
+    def to_dict(self, position=None):
+        return {
+            "source": self.source,
+            "title": self.title,
+            "url": self.url,
+            "requester_id": self.requester_id,
+            "requester_name": self.requester_name,
+            "offset": self.offset if position is None else position,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["source"], data["title"], data["url"], data["requester_id"],
+                   data["requester_name"], data.get("offset", 0.0))
+
+
+class GuildPlayer:
+    """
+    Owns the queue and the playback loop for a single guild.
+
+    The loop runs as a normal asyncio task and simply awaits an event that the
+    voice thread's 'after' callback sets when a track ends, so every
+    "Now playing" message is sent from the event loop itself.
+    """
+
+    def __init__(self, cog, guild: discord.Guild):
+        self.cog = cog
+        self.bot = cog.bot
+        self.guild = guild
+        self.queue = deque()
+        self.current = None
+        self.text_channel = None
+        # When the current track started playing (monotonic), for position()
+        self.started_at = None
+
+        self.queue_ready = asyncio.Event()
+        self.track_finished = asyncio.Event()
+        self.last_error = None
+        self.finished_at = None
+        # Seconds between a track ending and the next one starting
+        self.transition_latencies = deque(maxlen=TRANSITION_SAMPLES)
+
+        self.task = self.bot.loop.create_task(self.player_loop())
+
+    # --- Queue Management ---
+
+    def enqueue(self, song: Song, channel):
+        """Adds a song to the queue and wakes the player loop."""
+        self.text_channel = channel
+        self.queue.append(song)
+        self.queue_ready.set()
+        paginator.invalidate("queue", self.guild.id)
+
+    def adopt(self, queue, current, text_channel):
+        """Takes over from the previous player after a hot reload (call before the loop runs)."""
+        self.queue = queue
+        self.current = current
+        self.text_channel = text_channel
+        if queue:
+            self.queue_ready.set()
+
+    def position(self):
+        """Seconds into the current track (None when nothing is playing)."""
+        if self.current is None or self.started_at is None:
+            return None
+        return self.current.offset + time.monotonic() - self.started_at
+
+    def clear(self):
+        """Drops every queued song (the current track is left alone)."""
+        self.queue.clear()
+        self.queue_ready.clear()
+        paginator.invalidate("queue", self.guild.id)
+
+    # --- Playback Loop ---
+
+    def _after(self, error):
+        """Runs in the voice thread: hand the result back to the event loop."""
+        self.bot.loop.call_soon_threadsafe(self._track_done, error)
+
+    def _track_done(self, error):
+        self.last_error = error
+        self.finished_at = time.perf_counter()
+        self.track_finished.set()
+
+    async def player_loop(self):
+        """Plays queued songs one after another until the task is cancelled."""
+        if self.current is not None:
+            # Adopted mid-track: the old player's after-callback won't reach us
+            voice_client = self.guild.voice_client
+            while voice_client is not None and (voice_client.is_playing() or voice_client.is_paused()):
+                await asyncio.sleep(HANDOFF_POLL)
+            self.current = None
+            self.finished_at = time.perf_counter()
+
+        while True:
+            if not self.queue:
+                self.queue_ready.clear()
+                self.finished_at = None
+                await self.queue_ready.wait()
+                continue
+
+            song = self.queue.popleft()
+            paginator.invalidate("queue", self.guild.id)
+            voice_client = self.guild.voice_client
+            if voice_client is None:
+                # We were disconnected while songs were still queued
+                self.clear()
+                continue
+
+            options = dict(FFMPEG_OPTIONS)
+            if song.offset:
+                options['before_options'] += f" -ss {song.offset:.1f}"
+            try:
+                source = discord.FFmpegOpusAudio(song.source, **options)
+            except Exception as e:
+                logger.error(f"Could not create audio source for '{song.title}': {e}")
+                await self.notify(f"⚠️ Couldn't play **{song.title}**, skipping it.")
+                continue
+
+            self.current = song
+            self.last_error = None
+            self.track_finished.clear()
+
+            self.started_at = time.monotonic()
+            try:
+                voice_client.play(source, after=self._after)
+            except discord.ClientException as e:
+                logger.error(f"Voice client refused to play '{song.title}': {e}")
+                self.current = None
+                await self.notify(f"⚠️ Couldn't play **{song.title}**: {e}")
+                continue
+
+            if self.finished_at is not None:
+                latency = time.perf_counter() - self.finished_at
+                self.transition_latencies.append(latency)
+                logger.info(f"Track transition in guild {self.guild.id} took {latency * 1000:.1f} ms.")
+
+            await self.notify(
+                f"🎶 Now playing: **{song.title}** (Requested by {song.requester_name})"
+            )
+
+            await self.track_finished.wait()
+            self.current = None
+
+            if self.last_error:
+                logger.error(f"Playback error in guild {self.guild.id} on '{song.title}': {self.last_error}")
+                await self.notify(f"⚠️ Playback error on **{song.title}**: `{self.last_error}`")
+
+    async def notify(self, content: str):
+        """Sends a status message to the channel music was last requested from."""
+        if self.text_channel is None:
+            return
+        try:
+            await self.text_channel.send(content)
+        except discord.HTTPException as e:
+            logger.warning(f"Failed to send music notification: {e}")
+
+    def transition_stats(self):
+        """Returns (samples, average, worst) track-transition latency in seconds."""
+        samples = list(self.transition_latencies)
+        if not samples:
+            return 0, 0.0, 0.0
+        return len(samples), sum(samples) / len(samples), max(samples)
+
+    def stop(self):
+        """Cancels the player loop."""
+        self.task.cancel()
 
 
 class MusicCog(commands.Cog):
@@ -38,13 +235,96 @@ class MusicCog(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        # State management for the music bot
-        self.is_playing = False
-        self.music_queue = []
+        # One player (queue + playback task) per guild
+        self.players = {}
         self.ydl = yt_dlp.YoutubeDL(YDL_OPTIONS)
+        paginator.register_source("queue", self.queue_page_source)
+
+    async def cog_unload(self):
+        for player in self.players.values():
+            player.stop()
+        self.players.clear()
+
+    # --- Hot reload (see reloader.py) ---
+
+    def export_state(self):
+        # Playback itself lives on the voice client, which survives the reload
+        return [(player.guild, player.queue, player.current, player.text_channel) for player in self.players.values()]
+
+    def import_state(self, state):
+        for guild, queue, current, text_channel in state:
+            self.get_player(guild).adopt(queue, current, text_channel)
+
+    # --- Restart snapshot (see shutdown.py) ---
+
+    def snapshot_state(self):
+        guilds = []
+        for player in self.players.values():
+            voice_client = player.guild.voice_client
+            if voice_client is None or (player.current is None and not player.queue):
+                continue
+            songs = [song.to_dict() for song in player.queue]
+            if player.current is not None:
+                songs.insert(0, player.current.to_dict(position=player.position()))
+            guilds.append({
+                "guild_id": player.guild.id,
+                "voice_channel_id": voice_client.channel.id,
+                "text_channel_id": player.text_channel.id if player.text_channel else None,
+                "songs": songs,
+            })
+        return guilds or None
+
+    def restore_state(self, data):
+        # Voice needs the gateway, so reconnecting waits for the bot to be ready
+        self.bot.loop.create_task(self.resume_players(data))
+
+    async def resume_players(self, guilds):
+        await self.bot.wait_until_ready()
+        for entry in guilds:
+            guild = self.bot.get_guild(entry["guild_id"])
+            # (In cluster mode the guild may be on another worker now)
+            channel = guild.get_channel(entry["voice_channel_id"]) if guild else None
+            if channel is None or guild.voice_client is not None:
+                continue
+            try:
+                await channel.connect(timeout=RESTORE_CONNECT_TIMEOUT)
+            except (discord.ClientException, asyncio.TimeoutError) as e:
+                logger.warning(f"Couldn't rejoin voice in guild {guild.id} after restart: {e}")
+                continue
+            text_channel = guild.get_channel(entry["text_channel_id"] or 0)
+            player = self.get_player(guild)
+            for data in entry["songs"]:
+                player.enqueue(Song.from_dict(data), text_channel)
+            logger.info(f"Resumed {len(entry['songs'])} track(s) in guild {guild.id} after restart")
 
     # --- Helper Functions ---
 
+    def get_player(self, guild: discord.Guild) -> GuildPlayer:
+        """Returns the player for a guild, creating it on first use."""
+        player = self.players.get(guild.id)
+        if player is None:
+            player = GuildPlayer(self, guild)
+            self.players[guild.id] = player
+        return player
+
+    def remove_player(self, guild_id):
+        """Stops and forgets a guild's player, e.g. once the bot has left its voice channel."""
+        player = self.players.pop(guild_id, None)
+        if player is not None:
+            player.stop()
+            paginator.invalidate("queue", guild_id)
+
+    def queue_page_source(self, guild_id):
+        """Feeds a guild's queue to the paginator."""
+        player = self.players.get(int(guild_id))
+        if player is None or not player.queue:
+            return None
+        return paginator.PageData(
+            title="🎶 Current Music Queue 🎶",
+            items=player.queue,
+            format_item=lambda number, song: f"**{number}.** {song.title} (Requested by {song.requester_name})",
+            color=discord.Color.blue())
+
     def get_voice_channel(self, ctx: commands.Context):
         """Returns the voice channel the command author is in, or None."""
         if not ctx.author.voice:
@@ -60,8 +340,9 @@ class MusicCog(commands.Cog):
 
         try:
             # Run the search synchronously in an executor thread
-            data = await loop.run_in_executor(
-                None, lambda: self.ydl.extract_info(item, download=False))
+            with metrics.YTDLP_EXTRACT.time():
+                data = await loop.run_in_executor(
+                    None, lambda: self.ydl.extract_info(item, download=False))
 
             if 'entries' in data:
                 # If it's a playlist or a generic search that returned multiple results
@@ -79,32 +360,6 @@ class MusicCog(commands.Cog):
         except Exception:
             return None, "Error processing source/link."
 
-    def play_next(self, ctx):
-        """Starts playing the next song in the queue."""
-        if self.music_queue:
-            self.is_playing = True
-
-            # Get the first Song object from the queue
-            current_song = self.music_queue.pop(0)
-
-            # Create an audio source from the stream URL
-            source = discord.FFmpegOpusAudio(current_song.source,
-                                             **FFMPEG_OPTIONS)
-
-            # Start playing the audio and set a callback for when it finishes
-            ctx.voice_client.play(source,
-                                  after=lambda e: self.bot.loop.
-                                  call_soon_threadsafe(self.play_next, ctx))
-
-            # Send notification (must be done in a separate task as this function is executed in a thread)
-            asyncio.run_coroutine_threadsafe(
-                ctx.send(
-                    f"🎶 Now playing: **{current_song.title}** (Requested by {current_song.requester.display_name})"
-                ), self.bot.loop)
-        else:
-            self.is_playing = False
-            # Can disconnect here if queue is empty, but we'll leave it simple for now.
-
     async def join_voice_channel(self, ctx: commands.Context,
                                  channel: discord.VoiceChannel):
         """Handles joining or moving the bot to a voice channel."""
@@ -117,9 +372,22 @@ class MusicCog(commands.Cog):
         else:
             await ctx.send("I'm already here! Ready to play some tunes.")
 
+    # --- Listeners ---
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        # The bot left voice (!leave, kicked, channel deleted): its player has nothing to play to
+        if member.id == self.bot.user.id and before.channel is not None and after.channel is None:
+            self.remove_player(member.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.remove_player(guild.id)
+
     # --- Commands ---
 
     @commands.command(name="join", aliases=["j"])
+    @commands.guild_only()
     async def join_command(self, ctx: commands.Context):
         """Makes the bot join the voice channel you are currently in."""
         channel = self.get_voice_channel(ctx)
@@ -130,23 +398,28 @@ class MusicCog(commands.Cog):
         await self.join_voice_channel(ctx, channel)
 
     @commands.command(name="leave", aliases=["l", "disconnect"])
+    @commands.guild_only()
     async def leave_command(self, ctx: commands.Context):
         """Disconnects the bot from the current voice channel, stopping playback and clearing the queue."""
         if ctx.voice_client:
             # Clear the queue and stop playing
-            self.music_queue.clear()
-            self.is_playing = False
+            player = self.players.get(ctx.guild.id)
+            if player:
+                player.clear()
 
             if ctx.voice_client.is_playing():
                 ctx.voice_client.stop()
 
             await ctx.voice_client.disconnect()
+            self.remove_player(ctx.guild.id)
             await ctx.send("Disconnected and queue cleared. Bye! 👋")
         else:
             await ctx.send("I am not currently connected to any voice channel."
                            )
 
     @commands.command(name="play", aliases=["p"])
+    @commands.guild_only()
+    @ratelimit.limit("play")
     async def play_command(self, ctx: commands.Context, *, search_query: str):
         """Searches for a song/link and adds it to the queue. Automatically joins if not connected."""
         await ctx.defer(
@@ -177,60 +450,66 @@ class MusicCog(commands.Cog):
             return await ctx.send(
                 f"Could not find or process audio for: `{search_query}`")
 
-        new_song = Song(stream_url, title, search_query, ctx.author)
-        self.music_queue.append(new_song)
+        player = self.get_player(ctx.guild)
+        is_busy = player.current is not None or bool(player.queue)
 
-        if not ctx.voice_client.is_playing() and not self.is_playing:
-            # If the bot is idle, start playing immediately
-            self.play_next(ctx)
-        else:
-            # Otherwise, add to the queue
+        # The player loop announces the song itself once it starts
+        player.enqueue(Song.requested_by(stream_url, title, search_query, ctx.author), ctx.channel)
+
+        if is_busy:
             await ctx.send(f"✅ Added to queue: **{title}**")
 
     @commands.command(name="queue", aliases=["q", "list"])
+    @commands.guild_only()
     async def queue_command(self, ctx: commands.Context):
         """Displays the current song queue."""
-        if not self.music_queue:
-            return await ctx.send("The music queue is currently empty!")
-
-        # Create a nicely formatted list
-        queue_list = "\n".join([
-            f"**{i+1}.** {song.title} (Requested by {song.requester.display_name})"
-            for i, song in enumerate(self.music_queue)
-        ])
-
-        # Use an Embed for a cleaner look
-        embed = discord.Embed(title="🎶 Current Music Queue 🎶",
-                              description=queue_list,
-                              color=discord.Color.blue())
-        await ctx.send(embed=embed)
+        # Only the first page is rendered; the buttons fetch the rest on demand
+        if not await paginator.send_page_ctx(ctx, "queue", str(ctx.guild.id)):
+            await ctx.send("The music queue is currently empty!")
 
     @commands.command(name="skip", aliases=["s"])
+    @commands.guild_only()
     async def skip_command(self, ctx: commands.Context):
         """Skips the currently playing song."""
         if ctx.voice_client is None or not ctx.voice_client.is_playing():
             return await ctx.send("I am not currently playing any music.")
 
-        # Stop the current playback, which triggers the 'after' callback, calling play_next()
+        # Stopping the voice client fires the 'after' callback, which wakes the player loop
         ctx.voice_client.stop()
         await ctx.send("⏭️ Skipped current song.")
 
     @commands.command(name="stop")
+    @commands.guild_only()
     async def stop_command(self, ctx: commands.Context):
         """Stops the music and clears the entire queue."""
+        player = self.players.get(ctx.guild.id)
         if ctx.voice_client and ctx.voice_client.is_playing():
+            if player:
+                player.clear()
             ctx.voice_client.stop()
-            self.music_queue.clear()
-            self.is_playing = False
             await ctx.send("⏹️ Music stopped and queue cleared.")
-        elif self.music_queue:
-            self.music_queue.clear()
+        elif player and player.queue:
+            player.clear()
             await ctx.send("Queue cleared, but no music was playing.")
         else:
             await ctx.send("No music is currently playing or queued.")
 
+    @commands.command(name="musicstats")
+    @commands.guild_only()
+    async def musicstats_command(self, ctx: commands.Context):
+        """Shows how long the bot takes to move from one track to the next."""
+        player = self.players.get(ctx.guild.id)
+        samples, average, worst = player.transition_stats() if player else (0, 0.0, 0.0)
+        if not samples:
+            return await ctx.send("No track transitions recorded yet.")
+
+        await ctx.send(
+            f"⏱️ Track transitions (last {samples}): avg **{average * 1000:.1f} ms**, worst **{worst * 1000:.1f} ms**"
+        )
+
 
 # Setup function is mandatory for Cogs
 async def setup(bot: commands.Bot):
     """Loads the MusicCog into the bot."""
+    paginator.setup_paginator(bot)
     await bot.add_cog(MusicCog(bot))
@@ -0,0 +1,197 @@
+import hashlib
+import discord
+from discord import ui
+from collections import OrderedDict, namedtuple
+from itertools import islice
+import urllib.parse
+
+# =========================================================================
+# PAGINATED EMBEDS
+# Any cog can register a "source" (a function that returns the items for a
+# key) and then send page 1 with send_page(). The Prev/Next buttons encode
+# the source, key and target page in their custom_id, so they keep working
+# after a restart without storing any view state. Keys too long for a
+# custom_id travel as a short token instead, which only this process can
+# map back (until the mapping falls out of MAX_LONG_KEYS or a restart).
+# =========================================================================
+
+PAGE_SIZE = 10
+# Discord caps embed descriptions at 4096 characters
+MAX_DESCRIPTION = 4096
+MAX_LINE = MAX_DESCRIPTION // PAGE_SIZE - 1
+MAX_CUSTOM_ID = 100
+# Keys with cached pages (e.g. every /jar search query); the least recently viewed go first
+MAX_CACHED_KEYS = 512
+# Long keys remembered behind their custom_id token
+MAX_LONG_KEYS = 1024
+# Starts a token in a custom_id; quote() always escapes it, so no real key looks like one
+TOKEN_PREFIX = "!"
+
+# title: embed title, items: list/deque of raw items,
+# format_item: (number, item) -> str, color: discord.Color
+PageData = namedtuple("PageData", ["title", "items", "format_item", "color"])
+
+# source name -> fetch(key) returning PageData (or None if there's nothing to show)
+_sources = {}
+# (source, key) -> (PageData, {page number: discord.Embed}), least recently viewed first
+_page_cache = OrderedDict()
+# token -> key, for keys too long for a custom_id
+_long_keys = OrderedDict()
+
+
+def register_source(name: str, fetch):
+    """Registers a function that returns the PageData for a given key."""
+    _sources[name] = fetch
+    # Pages cached from a previous registration (e.g. before a hot reload) came from the old source
+    invalidate(name)
+
+
+def invalidate(name: str, key=None, prefix=None):
+    """Drops cached pages for a key, for every key starting with prefix, or for every key of the source."""
+    if key is None:
+        for cache_key in [k for k in _page_cache if k[0] == name and k[1].startswith(prefix or "")]:
+            del _page_cache[cache_key]
+    else:
+        _page_cache.pop((name, str(key)), None)
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def render_page(name: str, key: str, page: int):
+    """
+    Returns (embed, page, total_pages) for the requested page, or None when the
+    source has nothing to show. The source's PageData and the rendered pages are
+    cached until the source invalidates the key (or it falls out of the
+    MAX_CACHED_KEYS most recently viewed), so turning pages doesn't fetch again.
+    """
+    cached = _page_cache.get((name, key))
+    if cached is None:
+        fetch = _sources.get(name)
+        data = fetch(key) if fetch else None
+        if data is None or not data.items:
+            return None
+        cached = _page_cache[(name, key)] = (data, {})
+        while len(_page_cache) > MAX_CACHED_KEYS:
+            _page_cache.popitem(last=False)
+    else:
+        _page_cache.move_to_end((name, key))
+    data, pages = cached
+    if not data.items:
+        # A live collection (like a music queue) that has emptied since
+        invalidate(name, key)
+        return None
+
+    total_pages = max(1, -(-len(data.items) // PAGE_SIZE))
+    page = min(max(page, 0), total_pages - 1)
+
+    embed = pages.get(page)
+    if embed is None:
+        start = page * PAGE_SIZE
+        lines = [
+            _truncate(data.format_item(number, item), MAX_LINE)
+            for number, item in enumerate(islice(data.items, start, start + PAGE_SIZE), start + 1)
+        ]
+        embed = discord.Embed(title=_truncate(data.title, 256), description="\n".join(lines), color=data.color)
+        embed.set_footer(text=f"Page {page + 1}/{total_pages} • {len(data.items)} items")
+        pages[page] = embed
+
+    return embed, page, total_pages
+
+
+def build_view(name: str, key: str, page: int, total_pages: int):
+    """Builds the Prev/Next buttons for a page (None if everything fits on one page)."""
+    if total_pages <= 1:
+        return None
+
+    prev_button = PageButton(name, key, page - 1, "prev", disabled=page <= 0)
+    next_button = PageButton(name, key, page + 1, "next", disabled=page >= total_pages - 1)
+
+    view = ui.View(timeout=None)
+    view.add_item(prev_button)
+    view.add_item(next_button)
+    return view
+
+
+async def send_page(interaction: discord.Interaction, name: str, key: str, page: int = 0, **kwargs):
+    """Responds to an interaction with one page. Returns False if the source is empty."""
+    rendered = render_page(name, key, page)
+    if rendered is None:
+        return False
+    embed, page, total_pages = rendered
+    view = build_view(name, key, page, total_pages)
+    await interaction.response.send_message(embed=embed, view=view or discord.utils.MISSING, **kwargs)
+    return True
+
+
+async def send_page_ctx(ctx, name: str, key: str, page: int = 0):
+    """Prefix-command twin of send_page()."""
+    rendered = render_page(name, key, page)
+    if rendered is None:
+        return False
+    embed, page, total_pages = rendered
+    view = build_view(name, key, page, total_pages)
+    await ctx.send(embed=embed, view=view)
+    return True
+
+
+def _encode_key(name: str, key: str, page: int):
+    """The key as it goes into a custom_id: quoted, or a token when that wouldn't fit."""
+    quoted = urllib.parse.quote(key, safe='')
+    if len(f"page:{name}:{quoted}:{page}:next") <= MAX_CUSTOM_ID:
+        return quoted
+    token = TOKEN_PREFIX + hashlib.sha1(f"{name}:{key}".encode()).hexdigest()[:16]
+    _long_keys[token] = key
+    _long_keys.move_to_end(token)
+    while len(_long_keys) > MAX_LONG_KEYS:
+        _long_keys.popitem(last=False)
+    return token
+
+
+def _decode_key(encoded: str):
+    """The key behind a custom_id's key part, or None for a token this process no longer knows."""
+    if encoded.startswith(TOKEN_PREFIX):
+        return _long_keys.get(encoded)
+    return urllib.parse.unquote(encoded)
+
+
+class PageButton(ui.DynamicItem[ui.Button], template=r"page:(?P<source>\w+):(?P<key>[^:]+):(?P<page>-?\d+):(?P<direction>prev|next)"):
+    """A Prev/Next button whose custom_id carries everything needed to render its page."""
+
+    def __init__(self, source: str, key: str, page: int, direction: str, disabled: bool = False, encoded_key=None):
+        self.source = source
+        self.key = key
+        self.page = page
+        self.direction = direction
+        super().__init__(
+            ui.Button(
+                label="◀ Prev" if direction == "prev" else "Next ▶",
+                style=discord.ButtonStyle.secondary,
+                custom_id=f"page:{source}:{encoded_key or _encode_key(source, key, page)}:{page}:{direction}",
+                disabled=disabled,
+            )
+        )
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        return cls(match["source"], _decode_key(match["key"]), int(match["page"]), match["direction"],
+                   encoded_key=match["key"])
+
+    async def callback(self, interaction: discord.Interaction):
+        if self.key is None:
+            await interaction.response.edit_message(
+                content="These pages have expired, run the command again to browse them.", view=None)
+            return
+        rendered = render_page(self.source, self.key, self.page)
+        if rendered is None:
+            await interaction.response.edit_message(content="This list is empty now.", embed=None, view=None)
+            return
+
+        embed, page, total_pages = rendered
+        await interaction.response.edit_message(embed=embed, view=build_view(self.source, self.key, page, total_pages))
+
+
+def setup_paginator(bot):
+    """Registers the persistent page buttons. Safe to call from several cogs."""
+    bot.add_dynamic_items(PageButton)
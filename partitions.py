@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+import discord
+import metrics
+
+logger = logging.getLogger('Partitions')
+
+# =========================================================================
+# PARTITIONED STATE
+# Per-scope data (a guild's lists, a couple's love jar, ...) is kept in its
+# own file under DATA_DIR/<kind>/<scope>.json(l). A PartitionCache loads a
+# scope's partition on first use, keeps the most recently used ones in
+# memory, and flushes + drops partitions that have been idle for a while,
+# so memory and per-write I/O follow the active scopes, not every scope
+# the bot has ever seen.
+#
+# Scopes:
+#   guild-<id>              anything used inside a server
+#   couple-<low>-<high>     a DM or group DM between exactly two people
+#   user-<id>               the user's own DM with the bot
+#   channel-<id>            any other private channel, and a channel's
+#                           own AI chat memories (see channel_scope())
+# =========================================================================
+
+DATA_DIR = os.getenv("DATA_DIR", "data")
+MAX_LOADED = int(os.getenv("PARTITIONS_MAX_LOADED", "256"))
+IDLE_SECONDS = float(os.getenv("PARTITIONS_IDLE_SECONDS", "900"))
+SWEEP_INTERVAL = 60
+
+_caches = []
+
+
+def scope_for(interaction: discord.Interaction):
+    """The partition an interaction's shared data belongs to."""
+    bot_id = interaction.client.user.id if interaction.client.user else None
+    return _scope(interaction.guild_id, interaction.channel, interaction.channel_id, interaction.user.id, bot_id)
+
+
+def scope_for_message(message: discord.Message, bot_user):
+    """scope_for() for a plain message (e.g. one the AI chat replies to)."""
+    guild_id = message.guild.id if message.guild else None
+    bot_id = bot_user.id if bot_user else None
+    return _scope(guild_id, message.channel, message.channel.id, message.author.id, bot_id)
+
+
+def channel_scope(channel_id):
+    """The scope for state that must stay in one channel, even inside a server."""
+    return f"channel-{channel_id}"
+
+
+def _scope(guild_id, channel, channel_id, user_id, bot_id):
+    if guild_id:
+        return f"guild-{guild_id}"
+
+    people = set()
+    recipient = getattr(channel, "recipient", None)
+    if recipient is not None:
+        people.add(recipient.id)
+    for user in getattr(channel, "recipients", None) or ():
+        people.add(user.id)
+    people.discard(bot_id)
+    people.add(user_id)
+
+    if len(people) == 2:
+        low, high = sorted(people)
+        return f"couple-{low}-{high}"
+    if len(people) == 1 and recipient is not None:
+        # The user's own DM with the bot
+        return f"user-{user_id}"
+    return channel_scope(channel_id)
+
+
+def partition_path(kind, scope, extension="json"):
+    directory = os.path.join(DATA_DIR, kind)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{scope}.{extension}")
+
+
+class PartitionCache:
+    """
+    LRU of loaded partitions for one kind of data.
+
+    factory(scope) builds a partition; a partition needs `async flush()`,
+    `release()` (drop its watches and handles, no I/O) and `close_sync()`
+    (both at once, for shutdown without a loop).
+    """
+
+    def __init__(self, kind, factory, max_loaded=MAX_LOADED, idle_seconds=IDLE_SECONDS):
+        self.kind = kind
+        self.factory = factory
+        self.max_loaded = max_loaded
+        self.idle_seconds = idle_seconds
+        # scope -> [partition, last used (monotonic)]
+        self._loaded = OrderedDict()
+        # scope -> (partition, eviction token) for evicted partitions whose final
+        # flush hasn't finished; reused if the scope comes back before then, so
+        # we never read a stale file (the pending close then skips the release)
+        self._closing = {}
+        self._sweeper = None
+        _caches.append(self)
+
+    def __len__(self):
+        return len(self._loaded)
+
+    def get(self, scope):
+        entry = self._loaded.get(scope)
+        if entry is None:
+            partition, _ = self._closing.pop(scope, (None, None))
+            if partition is None:
+                partition = self.factory(scope)
+                PARTITION_LOADS.inc(kind=self.kind)
+            entry = self._loaded[scope] = [partition, 0.0]
+            self._evict_overflow()
+            self._start_sweeper()
+        else:
+            self._loaded.move_to_end(scope)
+        entry[1] = time.monotonic()
+        return entry[0]
+
+    def peek(self, scope):
+        """The scope's partition if it's loaded or still closing, else None; never loads or reorders."""
+        entry = self._loaded.get(scope)
+        if entry is not None:
+            return entry[0]
+        return self._closing.get(scope, (None, None))[0]
+
+    def loaded(self):
+        """The currently loaded {scope: partition} (for inspection; doesn't touch LRU order)."""
+        return {scope: entry[0] for scope, entry in self._loaded.items()}
+
+    def _evict_overflow(self):
+        while len(self._loaded) > self.max_loaded:
+            scope, (partition, _) = self._loaded.popitem(last=False)
+            self._evict(scope, partition)
+
+    def _evict(self, scope, partition):
+        PARTITION_EVICTIONS.inc(kind=self.kind)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            partition.close_sync()
+            return
+        token = object()
+        self._closing[scope] = (partition, token)
+
+        async def close():
+            try:
+                await partition.flush()
+            finally:
+                # Only if nobody took the partition back (or evicted it again) meanwhile
+                if self._closing.get(scope, (None, None))[1] is token:
+                    del self._closing[scope]
+                    partition.release()
+
+        loop.create_task(close())
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        for scope in [scope for scope, (_, last_used) in self._loaded.items() if last_used < cutoff]:
+            partition, _ = self._loaded.pop(scope)
+            self._evict(scope, partition)
+
+    def _start_sweeper(self):
+        if self._sweeper is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._sweeper = loop.create_task(self._sweep())
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            self.evict_idle()
+
+    async def close(self):
+        """Flushes and drops every partition (call from cog_unload)."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        partitions = [entry[0] for entry in self._loaded.values()] + [partition for partition, _ in self._closing.values()]
+        self._loaded.clear()
+        # Their pending closes now leave the release to us
+        self._closing.clear()
+        for partition in partitions:
+            await partition.flush()
+            partition.release()
+        if self in _caches:
+            _caches.remove(self)
+
+
+def _loaded_counts():
+    return {(cache.kind,): len(cache) for cache in _caches}
+
+
+PARTITIONS_LOADED = metrics.Gauge(
+    "naekki_partitions_loaded",
+    "Partitions currently held in memory, per kind.",
+    ["kind"],
+    callback=_loaded_counts,
+)
+PARTITION_LOADS = metrics.Counter(
+    "naekki_partition_loads_total",
+    "Partitions loaded from storage, per kind.",
+    ["kind"],
+)
+PARTITION_EVICTIONS = metrics.Counter(
+    "naekki_partition_evictions_total",
+    "Partitions flushed and dropped from memory (idle or over the limit), per kind.",
+    ["kind"],
+)
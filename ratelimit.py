@@ -0,0 +1,194 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+import discord
+from discord import app_commands
+from discord.ext import commands
+import deadlines
+import metrics
+
+logger = logging.getLogger('RateLimit')
+
+# =========================================================================
+# PER-USER RATE LIMITS
+# One token bucket per (bucket, user): a bucket allows `count` uses in a
+# burst and refills at count/seconds, so steady use is never throttled but
+# spamming is. Buckets are named per feature, and commands that cost the
+# same thing share one (/chat and @mentions both spend "ai").
+#
+#   @ratelimit.limit("meme")      on an app or prefix command
+#   ratelimit.check_interaction() for buttons (DynamicItem.interaction_check)
+#   ratelimit.check_message()     for on_message listeners
+#
+# Limits can be overridden with RATE_LIMITS="ai=10/60,meme=off" (or
+# RATE_LIMITS=off for none at all, e.g. for benchmarks).
+# Only the MAX_TRACKED most recently active users are remembered; an
+# evicted user's bucket would have refilled anyway.
+# =========================================================================
+
+MAX_TRACKED = 50_000
+
+# bucket -> (uses, per seconds)
+DEFAULT_LIMITS = {
+    "ai": (6, 60),              # Gemini quota
+    "personality": (3, 300),
+    "meme": (10, 60),
+    "wakeup": (3, 300),         # Voice Monkey / Alexa
+    "play": (10, 60),           # yt-dlp executor threads
+    "hangman": (3, 60),
+    "hangman_guess": (8, 5),
+    "list": (20, 60),           # each change rewrites the scope's lists file
+    "lovenote": (10, 60),
+    "countdown": (10, 60),
+}
+
+
+def parse_limits(value):
+    """"ai=10/60,meme=off" -> {"ai": (10, 60.0), "meme": None}."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in (value or "").split(","))):
+        name, _, spec = item.partition("=")
+        if spec.strip().lower() == "off":
+            limits[name.strip()] = None
+            continue
+        try:
+            count, _, seconds = spec.partition("/")
+            limits[name.strip()] = (int(count), float(seconds))
+        except ValueError:
+            logger.error(f"Ignoring bad RATE_LIMITS entry {item!r} (expected name=count/seconds or name=off)")
+    return limits
+
+
+class RateLimited(app_commands.CheckFailure, commands.CheckFailure):
+    """Raised by the limit() checks; works as both kinds of check failure so one decorator serves both command types."""
+
+    def __init__(self, bucket, retry_after):
+        self.bucket = bucket
+        self.retry_after = retry_after
+        super().__init__(f"Rate limited on {bucket} for {retry_after:.1f}s")
+
+    def friendly(self):
+        return cooldown_message(self.retry_after)
+
+
+def cooldown_message(retry_after):
+    return f"⏳ Slow down a little! Try again in **{max(1, round(retry_after))}s**."
+
+
+class RateLimiter:
+    def __init__(self, limits, max_tracked=MAX_TRACKED):
+        self.limits = {name: limit for name, limit in limits.items() if limit is not None}
+        self.max_tracked = max_tracked
+        # (bucket, user id) -> [tokens, last refill (monotonic), already told], least recently used first
+        self._buckets = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def hit(self, bucket, user_id, now=None):
+        """Spends one use. Returns 0 if allowed, else the seconds until the next use is."""
+        limit = self.limits.get(bucket)
+        if limit is None:
+            return 0.0
+        count, per = limit
+        rate = count / per
+        now = time.monotonic() if now is None else now
+        key = (bucket, user_id)
+
+        state = self._buckets.get(key)
+        if state is None:
+            state = self._buckets[key] = [float(count), now, False]
+            while len(self._buckets) > self.max_tracked:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            state[0] = min(float(count), state[0] + (now - state[1]) * rate)
+            state[1] = now
+
+        if state[0] >= 1.0:
+            state[0] -= 1.0
+            state[2] = False
+            return 0.0
+        RATE_LIMITED.inc(bucket=bucket)
+        return (1.0 - state[0]) / rate
+
+    def first_refusal(self, bucket, user_id):
+        """True the first time a user is refused since they were last allowed (to answer spam only once)."""
+        state = self._buckets.get((bucket, user_id))
+        if state is None or state[2]:
+            return False
+        state[2] = True
+        return True
+
+
+_configured = os.getenv("RATE_LIMITS", "")
+limiter = RateLimiter({} if _configured.strip().lower() == "off" else {**DEFAULT_LIMITS, **parse_limits(_configured)})
+
+
+# --- Commands ---
+
+def limit(bucket):
+    """Rate-limits an app command or a prefix command (per user) on the named bucket."""
+
+    async def app_predicate(interaction: discord.Interaction):
+        retry_after = limiter.hit(bucket, interaction.user.id)
+        if retry_after:
+            raise RateLimited(bucket, retry_after)
+        return True
+
+    async def prefix_predicate(ctx: commands.Context):
+        retry_after = limiter.hit(bucket, ctx.author.id)
+        if retry_after:
+            raise RateLimited(bucket, retry_after)
+        return True
+
+    def decorator(func):
+        if isinstance(func, commands.Command):
+            return commands.check(prefix_predicate)(func)
+        if isinstance(func, (app_commands.Command, app_commands.ContextMenu)):
+            return app_commands.check(app_predicate)(func)
+        # Still the bare callback: mark it for whichever command decorator comes next
+        return commands.check(prefix_predicate)(app_commands.check(app_predicate)(func))
+
+    return decorator
+
+
+async def send_cooldown(interaction: discord.Interaction, retry_after):
+    await deadlines.respond(interaction, cooldown_message(retry_after), ephemeral=True)
+
+
+# --- Components and listeners ---
+
+async def check_interaction(bucket, interaction: discord.Interaction):
+    """For component interaction_checks: answers with a cooldown message and returns False when limited."""
+    retry_after = limiter.hit(bucket, interaction.user.id)
+    if not retry_after:
+        return True
+    await send_cooldown(interaction, retry_after)
+    return False
+
+
+async def check_message(bucket, message: discord.Message):
+    """For on_message listeners: reacts once per burst of spam and returns False when limited."""
+    retry_after = limiter.hit(bucket, message.author.id)
+    if not retry_after:
+        return True
+    if limiter.first_refusal(bucket, message.author.id):
+        try:
+            await message.add_reaction("⏳")
+        except discord.HTTPException:
+            pass
+    return False
+
+
+RATE_LIMITED = metrics.Counter(
+    "naekki_rate_limited_total",
+    "Commands, button presses and messages refused by the per-user rate limits, per bucket.",
+    ["bucket"],
+)
+RATE_LIMIT_TRACKED = metrics.Gauge(
+    "naekki_rate_limit_tracked",
+    "(bucket, user) pairs currently tracked by the rate limiter.",
+    callback=lambda: {(): len(limiter)},
+)
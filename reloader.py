@@ -0,0 +1,210 @@
+import asyncio
+import importlib
+import logging
+import os
+import sys
+from discord.ext import commands
+
+logger = logging.getLogger('Reloader')
+
+# =========================================================================
+# HOT RELOAD
+# Reloads extensions in place instead of restarting the bot (which means a
+# gateway reconnect, a command sync and losing in-memory state).
+#
+# A cog can hand its in-memory state to its replacement by defining
+#   export_state(self) -> anything     called on the old instance, before cog_unload
+#   import_state(self, state)          called on the new instance, after it's added
+#
+# With HOT_RELOAD=1 the source files are polled and anything that changed
+# is reloaded automatically; otherwise the owner runs `!reload`. Data files
+# a cog reads at startup (DATA_FILES) don't reload anything: the cog's
+#   reload_data(self)                  re-reads them in place
+# so a cog writing its own file (e.g. /setpersonality) costs nothing.
+#
+# Only modules without process-wide state can be reloaded along with the
+# cogs that use them (RELOADABLE_HELPERS); a change to anything else
+# (storage, metrics, http_client, ...) still needs a restart.
+# =========================================================================
+
+AUTO_RELOAD = os.getenv("HOT_RELOAD", "0") == "1"
+POLL_INTERVAL = float(os.getenv("HOT_RELOAD_POLL", "2"))
+
+RELOADABLE_HELPERS = ("chat_turns", "content", "countdowns", "hangman", "love_jar")
+# Data files a cog only reads when it starts -> the cog whose reload_data() re-reads them.
+# (fun_content.json needs no entry: content.py already re-reads it.)
+DATA_FILES = {"ai_config.json": "AIChat"}
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _uses(module, helper):
+    """Whether a module imported the helper module or something from it."""
+    for value in vars(module).values():
+        if value is helper or getattr(value, "__module__", None) == helper.__name__:
+            return True
+    return False
+
+
+class Reloader(commands.Cog):
+    """Owner-only hot reloading of extensions, keeping their in-memory state."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._lock = asyncio.Lock()
+        self._mtimes = self.scan()
+        self._task = None
+
+    async def cog_load(self):
+        if AUTO_RELOAD:
+            self._task = asyncio.create_task(self.watch())
+            logger.info(f"Watching source files for changes every {POLL_INTERVAL}s")
+
+    async def cog_unload(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    # --- Change detection ---
+
+    def watched_files(self):
+        """path -> ("extension" | "helper", module name) or ("data", cog name)."""
+        files = {}
+        for name in self.bot.extensions:
+            module = sys.modules.get(name)
+            if name != __name__ and getattr(module, "__file__", None):
+                files[module.__file__] = ("extension", name)
+        for name in RELOADABLE_HELPERS:
+            module = sys.modules.get(name)
+            if getattr(module, "__file__", None):
+                files[module.__file__] = ("helper", name)
+        for path, cog_name in DATA_FILES.items():
+            files[os.path.abspath(path)] = ("data", cog_name)
+        return files
+
+    def scan(self):
+        return {path: _mtime(path) for path in self.watched_files()}
+
+    def changed(self):
+        """The helpers, extensions and data-reading cogs whose files changed since the last scan (and re-scans)."""
+        mtimes = self.scan()
+        files = self.watched_files()
+        changed = {"helper": [], "extension": [], "data": []}
+        for path, mtime in mtimes.items():
+            if path in self._mtimes and mtime != self._mtimes[path]:
+                kind, name = files[path]
+                changed[kind].append(name)
+        self._mtimes = mtimes
+        return changed["helper"], changed["extension"], changed["data"]
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            try:
+                helpers, extensions, data = self.changed()
+                results = self.reload_data(data)
+                if helpers or extensions:
+                    results += await self.reload(extensions, helpers)
+                for name, error in results:
+                    if error:
+                        logger.error(f"Auto-reload of {name} failed: {error}")
+            except Exception:
+                logger.exception("Hot reload watcher failed")
+
+    # --- Reloading ---
+
+    async def reload(self, extensions=(), helpers=()):
+        """Reloads helpers, then every extension that changed or uses one. Returns [(name, error or None)]."""
+        async with self._lock:
+            results = []
+            targets = [name for name in extensions if name in self.bot.extensions and name != __name__]
+            for helper in helpers:
+                module = sys.modules.get(helper)
+                if module is None:
+                    continue
+                try:
+                    importlib.reload(module)
+                except Exception as e:
+                    results.append((helper, repr(e)))
+                    continue
+                results.append((helper, None))
+                for name in self.bot.extensions:
+                    if name != __name__ and name not in targets and _uses(sys.modules[name], module):
+                        targets.append(name)
+            for name in targets:
+                results.append((name, await self.reload_extension(name)))
+            self._mtimes = self.scan()
+            return results
+
+    def reload_data(self, cog_names):
+        """Has these cogs re-read their data files in place. Returns [(name, error or None)]."""
+        results = []
+        for cog_name in cog_names:
+            cog = self.bot.get_cog(cog_name)
+            if cog is None or not hasattr(cog, "reload_data"):
+                continue
+            try:
+                cog.reload_data()
+            except Exception as e:
+                logger.exception(f"{cog_name} couldn't re-read its data")
+                results.append((cog_name, repr(e)))
+                continue
+            logger.info(f"{cog_name} re-read its data")
+            results.append((cog_name, None))
+        return results
+
+    async def reload_extension(self, name):
+        """Reloads one extension, handing its cogs' state over. Returns an error message or None."""
+        states = {
+            cog.qualified_name: cog.export_state()
+            for cog in self.bot.cogs.values()
+            if cog.__module__ == name and hasattr(cog, "export_state")
+        }
+        error = None
+        try:
+            # On failure discord.py puts the previous version back, with fresh cogs
+            await self.bot.reload_extension(name)
+        except commands.ExtensionError as e:
+            error = f"{e}: {e.__cause__!r}" if e.__cause__ else str(e)
+
+        for cog_name, state in states.items():
+            cog = self.bot.get_cog(cog_name)
+            if cog is not None and hasattr(cog, "import_state"):
+                try:
+                    cog.import_state(state)
+                except Exception as e:
+                    logger.exception(f"{cog_name} couldn't take over the previous state")
+                    error = error or f"state handoff failed: {e!r}"
+        if error is None:
+            logger.info(f"Reloaded {name}" + (f" (kept state of {', '.join(states)})" if states else ""))
+        return error
+
+    # --- Owner commands ---
+
+    @commands.command(name="reload", hidden=True)
+    @commands.is_owner()
+    async def reload_command(self, ctx: commands.Context, *extensions: str):
+        """!reload (whatever changed on disk), !reload <ext> [ext...] or !reload all."""
+        if not extensions:
+            helpers, changed, data = self.changed()
+            results = self.reload_data(data) + await self.reload(changed, helpers)
+            if not results:
+                await ctx.send("Nothing changed on disk.")
+                return
+        else:
+            if extensions == ("all",):
+                extensions = [name for name in self.bot.extensions if name != __name__]
+            results = await self.reload(extensions)
+            unknown = [name for name in extensions if name not in self.bot.extensions]
+            results += [(name, "not loaded") for name in unknown]
+
+        lines = [f"{'⚠️' if error else '✅'} `{name}`" + (f": {error}" if error else "") for name, error in results]
+        await ctx.send("\n".join(lines)[:2000])
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Reloader(bot))
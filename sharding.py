@@ -0,0 +1,132 @@
+import logging
+import math
+import os
+from discord.ext import commands
+import metrics
+
+logger = logging.getLogger('Sharding')
+
+# =========================================================================
+# SHARDING
+# SHARD_COUNT switches main.py to an AutoShardedBot: one process, one event
+# loop, several gateway connections. Because every shard shares the loop,
+# per-guild state (music players, chat history keyed by channel) needs no
+# locking; it only has to be keyed by guild/channel rather than assumed
+# global. SHARD_IDS limits this process to some of the shards, so several
+# processes can split one bot between them.
+#
+#   SHARD_COUNT=auto           -> Discord's recommended count
+#   SHARD_COUNT=4              -> 4 shards, all in this process
+#   SHARD_COUNT=4 SHARD_IDS=0,1 -> shards 0 and 1 of 4
+# =========================================================================
+
+_bot = None
+
+
+def shard_config():
+    """Reads (enabled, shard_count, shard_ids) from the environment."""
+    raw_count = os.getenv("SHARD_COUNT", "").strip().lower()
+    if not raw_count:
+        return False, None, None
+    shard_count = None if raw_count == "auto" else int(raw_count)
+    raw_ids = os.getenv("SHARD_IDS", "").strip()
+    shard_ids = [int(part) for part in raw_ids.split(",") if part.strip()] if raw_ids else None
+    if shard_ids is not None and shard_count is None:
+        raise ValueError("SHARD_IDS needs an explicit SHARD_COUNT")
+    return True, shard_count, shard_ids
+
+
+def build_bot(**kwargs) -> commands.Bot:
+    """Builds a plain Bot, or an AutoShardedBot when SHARD_COUNT is set."""
+    enabled, shard_count, shard_ids = shard_config()
+    if not enabled:
+        return commands.Bot(**kwargs)
+    logger.info(f"Starting sharded: shard_count={shard_count or 'auto'} shard_ids={shard_ids or 'all'}")
+    return commands.AutoShardedBot(shard_count=shard_count, shard_ids=shard_ids, **kwargs)
+
+
+def shard_id_for(bot, guild_id):
+    """The shard a guild's events arrive on (DMs always go to shard 0)."""
+    if guild_id is None or not bot.shard_count:
+        return 0
+    return (int(guild_id) >> 22) % bot.shard_count
+
+
+def status():
+    """Readiness and per-shard latency/guilds, for health checks (safe to call from another thread)."""
+    if _bot is None:
+        return {"ready": False, "shards": {}}
+    latencies = _shard_latencies()
+    guilds = _shard_guilds()
+    return {
+        "ready": _bot.is_ready(),
+        "shards": {
+            key[0]: {"latency": latencies.get(key), "guilds": guilds.get(key, 0)}
+            for key in sorted(latencies.keys() | guilds.keys())
+        },
+    }
+
+
+# =========================================================================
+# PER-SHARD METRICS
+# =========================================================================
+
+def _shard_latencies():
+    if _bot is None or _bot.is_closed():
+        return {}
+    if isinstance(_bot, commands.AutoShardedBot):
+        return {(str(shard_id),): latency for shard_id, latency in _bot.latencies if not math.isnan(latency)}
+    latency = _bot.latency
+    return {} if math.isnan(latency) else {("0",): latency}
+
+
+def _shard_guilds():
+    if _bot is None:
+        return {}
+    counts = {}
+    for guild in _bot.guilds:
+        key = (str(guild.shard_id or 0),)
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+SHARD_LATENCY = metrics.Gauge(
+    "naekki_shard_latency_seconds",
+    "Gateway heartbeat latency per shard.",
+    ["shard"],
+    callback=_shard_latencies,
+)
+SHARD_GUILDS = metrics.Gauge(
+    "naekki_shard_guilds",
+    "Guilds served by each shard.",
+    ["shard"],
+    callback=_shard_guilds,
+)
+SHARD_EVENTS = metrics.Counter(
+    "naekki_shard_events_total",
+    "Gateway connection events per shard (connect, disconnect, resume, ready).",
+    ["shard", "event"],
+)
+
+
+def install_shard_metrics(bot: commands.Bot):
+    """Points the shard gauges at this bot and counts connection events per shard."""
+    global _bot
+    _bot = bot
+
+    def record(event):
+        async def listener(shard_id=None):
+            shard = str(shard_id or 0)
+            SHARD_EVENTS.inc(shard=shard, event=event)
+            logger.info(f"Shard {event}", extra={"shard": shard})
+        return listener
+
+    if isinstance(bot, commands.AutoShardedBot):
+        bot.add_listener(record("connect"), "on_shard_connect")
+        bot.add_listener(record("disconnect"), "on_shard_disconnect")
+        bot.add_listener(record("resume"), "on_shard_resumed")
+        bot.add_listener(record("ready"), "on_shard_ready")
+    else:
+        bot.add_listener(record("connect"), "on_connect")
+        bot.add_listener(record("disconnect"), "on_disconnect")
+        bot.add_listener(record("resume"), "on_resumed")
@@ -0,0 +1,229 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# =========================================================================
+# SHARED STATE STORE (cluster mode)
+# A SQLite database in WAL mode that every worker process opens. Each JSON
+# store becomes a namespace of rows: dict stores keep one row per key, list
+# stores one row per element (under a unique, insertion-ordered key), so
+# two workers touching different keys never overwrite each other.
+#
+# Every write stamps a global, commit-ordered `seq` and the writer's id.
+# Other processes notice new commits through PRAGMA data_version (which
+# only changes when *another* connection commits) and then pull just the
+# rows with a higher seq - that's the cross-process invalidation.
+# =========================================================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key       TEXT NOT NULL,
+    value     TEXT,              -- JSON; NULL marks a deleted row
+    seq       INTEGER NOT NULL,
+    writer    TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_seq ON entries (seq);
+"""
+
+
+class SharedStore:
+    """Namespaced JSON rows in SQLite, safe to share between processes."""
+
+    def __init__(self, path):
+        self.path = path
+        self.writer_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        # namespace -> {key: JSON text} as this process last saw it
+        self._known = {}
+        self._last_seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM entries").fetchone()[0]
+        self._data_version = self._pragma_data_version()
+        self._key_counter = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _pragma_data_version(self):
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # --- Reading ---
+
+    def _rows(self, namespace):
+        known = self._known.get(namespace)
+        if known is None:
+            rows = self._conn.execute(
+                "SELECT key, value FROM entries WHERE namespace = ? AND value IS NOT NULL ORDER BY key",
+                (namespace,)
+            ).fetchall()
+            known = self._known[namespace] = dict(rows)
+        return known
+
+    def forget(self, namespace):
+        """Drops the cached rows of a namespace; the next read goes back to the database."""
+        with self._lock:
+            self._known.pop(namespace, None)
+
+    def has(self, namespace):
+        with self._lock:
+            return bool(self._rows(namespace))
+
+    def load(self, namespace, default):
+        """The namespace as a dict (or, if default is a list, as a list in insertion order)."""
+        with self._lock:
+            rows = self._rows(namespace)
+            if isinstance(default, list):
+                return [json.loads(rows[key]) for key in sorted(rows)]
+            return {key: json.loads(value) for key, value in rows.items()}
+
+    # --- Writing ---
+
+    def _new_key(self):
+        # Sortable and unique across processes: time, then writer, then a counter
+        self._key_counter += 1
+        return f"{time.time_ns():020d}-{self.writer_id}-{self._key_counter:06d}"
+
+    def save(self, namespace, data):
+        """Writes only the rows that changed since this process last saw the namespace."""
+        return self.commit(namespace, self.prepare(namespace, data))
+
+    def prepare(self, namespace, data):
+        """Diffs data against what this process last saw; returns {key: JSON text or None}.
+
+        Call this where the data lives (the event loop), so the diff can't
+        race with apply(); commit() may then run in a worker thread.
+        """
+        with self._lock:
+            known = self._rows(namespace)
+            if isinstance(data, list):
+                return self._diff_list(known, data)
+            return self._diff_dict(known, data)
+
+    def prepare_entries(self, namespace, entries):
+        """Like prepare(), but only for the given keys of a dict store; other keys are left alone."""
+        with self._lock:
+            known = self._rows(namespace)
+            changes = {}
+            for key, value in entries.items():
+                text = None if value is None else json.dumps(value, sort_keys=True)
+                if known.get(str(key)) != text:
+                    changes[str(key)] = text
+            return changes
+
+    def commit(self, namespace, changes):
+        if not changes:
+            return 0
+        with self._lock:
+            self._write(namespace, changes)
+            known = self._rows(namespace)
+            for key, text in changes.items():
+                if text is None:
+                    known.pop(key, None)
+                else:
+                    known[key] = text
+        return len(changes)
+
+    def claim(self, namespace, key):
+        """Writes the row only if it has never existed; True for the one process whose write did."""
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM entries").fetchone()[0]
+                cursor = conn.execute(
+                    "INSERT INTO entries (namespace, key, value, seq, writer) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (namespace, key) DO NOTHING",
+                    (namespace, key, json.dumps(self.writer_id), seq + 1, self.writer_id)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return cursor.rowcount == 1
+
+    @staticmethod
+    def _diff_dict(known, data):
+        changes = {}
+        for key, value in data.items():
+            text = json.dumps(value, sort_keys=True)
+            if known.get(str(key)) != text:
+                changes[str(key)] = text
+        for key in known.keys() - {str(key) for key in data}:
+            changes[key] = None
+        return changes
+
+    def _diff_list(self, known, data):
+        # Match elements by content: existing rows are kept, new elements get
+        # fresh keys, and rows whose element is gone are deleted
+        unmatched = {}
+        for key in sorted(known):
+            unmatched.setdefault(known[key], []).append(key)
+        changes = {}
+        for item in data:
+            text = json.dumps(item, sort_keys=True)
+            keys = unmatched.get(text)
+            if keys:
+                keys.pop(0)
+            else:
+                changes[self._new_key()] = text
+        for keys in unmatched.values():
+            for key in keys:
+                changes[key] = None
+        return changes
+
+    def _write(self, namespace, changes):
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM entries").fetchone()[0]
+            conn.executemany(
+                "INSERT INTO entries (namespace, key, value, seq, writer) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, seq = excluded.seq, writer = excluded.writer",
+                [(namespace, key, text, seq + index + 1, self.writer_id) for index, (key, text) in enumerate(changes.items())]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- Invalidation ---
+
+    def poll(self):
+        """Rows written by other processes since the last poll (cheap when nothing changed).
+
+        Safe to run in a worker thread; pass the result to apply() on the loop.
+        """
+        with self._lock:
+            version = self._pragma_data_version()
+            if version == self._data_version:
+                return []
+            self._data_version = version
+            rows = self._conn.execute(
+                "SELECT namespace, key, value, seq, writer FROM entries WHERE seq > ? ORDER BY seq",
+                (self._last_seq,)
+            ).fetchall()
+            if rows:
+                self._last_seq = rows[-1][3]
+            return [(namespace, key, text) for namespace, key, text, _, writer in rows if writer != self.writer_id]
+
+    def apply(self, rows):
+        """Folds polled rows into this process's view; returns {namespace: {key: value or None}}."""
+        changed = {}
+        with self._lock:
+            for namespace, key, text in rows:
+                known = self._known.get(namespace)
+                if known is not None:
+                    if text is None:
+                        known.pop(key, None)
+                    else:
+                        known[key] = text
+                changed.setdefault(namespace, {})[key] = None if text is None else json.loads(text)
+        return changed
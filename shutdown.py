@@ -0,0 +1,181 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import signal
+import time
+import http_client
+import metrics
+import storage
+
+logger = logging.getLogger('Shutdown')
+
+# =========================================================================
+# GRACEFUL SHUTDOWN
+# On SIGTERM (a redeploy, or supervisor.py stopping a worker) the bot stops
+# taking new commands, waits up to DRAIN_TIMEOUT for the ones in flight
+# (including Gemini replies), writes a snapshot of its volatile state and
+# then closes, which unloads every cog so their stores get flushed.
+#
+# A cog takes part in the snapshot by defining
+#   snapshot_state(self) -> JSON-serialisable   called before the bot closes (None: nothing to keep)
+#   restore_state(self, data)                   called once at the next startup
+# The snapshot is only restored if it is younger than SNAPSHOT_MAX_AGE.
+# =========================================================================
+
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "20"))
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", "600"))
+# Cluster workers (see supervisor.py) each keep their own snapshot
+_worker = os.getenv("WORKER_ID")
+SNAPSHOT_FILE = f"shutdown_snapshot.{_worker}.json" if _worker else "shutdown_snapshot.json"
+
+RESTARTING_MESSAGE = "🔄 I'm restarting right now, try again in a few seconds!"
+
+
+class Lifecycle:
+    """Counts the requests in flight and refuses new ones once draining has started."""
+
+    def __init__(self):
+        self.draining = False
+        self.in_flight = 0
+        self._idle = None
+
+    def begin(self):
+        self.in_flight += 1
+
+    def end(self):
+        self.in_flight = max(0, self.in_flight - 1)
+        if not self.in_flight and self._idle is not None:
+            self._idle.set()
+
+    @contextlib.asynccontextmanager
+    async def tracking(self):
+        self.begin()
+        try:
+            yield
+        finally:
+            self.end()
+
+    async def wait_idle(self, timeout):
+        """Waits for the in-flight requests to finish. Returns False if some were still running at the deadline."""
+        if not self.in_flight:
+            return True
+        self._idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._idle = None
+
+
+lifecycle = Lifecycle()
+
+
+# --- Snapshot ---
+
+def write_snapshot(bot):
+    """Collects every cog's snapshot_state() into SNAPSHOT_FILE."""
+    cogs = {}
+    for name, cog in bot.cogs.items():
+        if not hasattr(cog, "snapshot_state"):
+            continue
+        try:
+            state = cog.snapshot_state()
+        except Exception:
+            logger.exception(f"{name} couldn't snapshot its state")
+            continue
+        if state is not None:
+            cogs[name] = state
+    if not cogs:
+        return
+    try:
+        storage.write_json_atomic(SNAPSHOT_FILE, {"saved_at": time.time(), "cogs": cogs})
+    except (OSError, TypeError, ValueError):
+        logger.exception("Couldn't write the shutdown snapshot")
+        return
+    logger.info(f"Saved state of {', '.join(cogs)} to {SNAPSHOT_FILE}")
+
+
+def restore_snapshot(bot):
+    """Hands the previous process's snapshot to the cogs, once (the file is removed)."""
+    try:
+        with open(SNAPSHOT_FILE, "r") as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        logger.error(f"Ignoring unreadable shutdown snapshot: {e}")
+        snapshot = None
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(SNAPSHOT_FILE)
+
+    if not snapshot:
+        return
+    age = time.time() - snapshot.get("saved_at", 0)
+    if age > SNAPSHOT_MAX_AGE:
+        logger.info(f"Ignoring shutdown snapshot from {age:.0f}s ago")
+        return
+    for name, data in snapshot.get("cogs", {}).items():
+        cog = bot.get_cog(name)
+        if cog is None or not hasattr(cog, "restore_state"):
+            continue
+        try:
+            cog.restore_state(data)
+        except Exception:
+            logger.exception(f"{name} couldn't restore its state")
+        else:
+            logger.info(f"Restored {name} state from {age:.0f}s ago")
+
+
+# --- Shutdown sequence ---
+
+async def graceful_shutdown(bot, reason="SIGTERM"):
+    """Drain -> snapshot -> close (cogs flush their stores on unload)."""
+    if lifecycle.draining:
+        return
+    lifecycle.draining = True
+    started_at = time.monotonic()
+    logger.warning(f"{reason} received, draining {lifecycle.in_flight} request(s) in flight")
+
+    if not await lifecycle.wait_idle(DRAIN_TIMEOUT):
+        logger.warning(f"Gave up on {lifecycle.in_flight} request(s) after {DRAIN_TIMEOUT}s")
+    write_snapshot(bot)
+    await bot.close()
+    await http_client.close_session()
+    logger.info(f"Shut down cleanly in {time.monotonic() - started_at:.1f}s")
+
+
+_shutdown_task = None
+
+
+def install(bot):
+    """Routes SIGTERM/SIGINT to graceful_shutdown() (call from setup_hook, on the bot's loop)."""
+    loop = asyncio.get_running_loop()
+
+    def handle(signame):
+        global _shutdown_task
+        if _shutdown_task is None:
+            _shutdown_task = loop.create_task(graceful_shutdown(bot, signame))
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, handle, sig.name)
+        except (NotImplementedError, RuntimeError):
+            # Windows, or not the main thread: keep the default behaviour
+            pass
+
+
+IN_FLIGHT = metrics.Gauge(
+    "naekki_requests_in_flight",
+    "Commands and AI replies currently being handled.",
+    callback=lambda: {(): lifecycle.in_flight},
+)
+DRAINING = metrics.Gauge(
+    "naekki_draining",
+    "1 while the bot is shutting down and refusing new commands.",
+    callback=lambda: {(): int(lifecycle.draining)},
+)
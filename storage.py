@@ -0,0 +1,303 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import metrics
+from shared_store import SharedStore
+
+logger = logging.getLogger('Storage')
+
+# =========================================================================
+# DEBOUNCED JSON PERSISTENCE
+# Hot paths (like a hangman button press) only mark their data as dirty.
+# The file is rewritten once after DEFAULT_DELAY seconds of quiet, with the
+# actual disk write done in a worker thread so the event loop never blocks.
+# =========================================================================
+
+DEFAULT_DELAY = 2.0
+
+
+def write_json_atomic(filename, data):
+    """Writes JSON to a temp file and swaps it in, so a crash can't leave half a file."""
+    started_at = time.perf_counter()
+    tmp_name = f"{filename}.tmp"
+    with open(tmp_name, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_name, filename)
+    name = _metric_name(filename)
+    metrics.PERSISTENCE_FLUSH.observe(time.perf_counter() - started_at, file=name)
+    metrics.PERSISTENCE_BYTES.inc(os.path.getsize(filename), file=name)
+
+
+def _metric_name(filename):
+    # Partition files (see partitions.py) share one series per kind, not one per scope
+    directory = os.path.basename(os.path.dirname(filename))
+    return f"{directory}/*" if directory else os.path.basename(filename)
+
+
+class DebouncedWriter:
+    """Coalesces many save requests for one file into a single delayed write."""
+
+    def __init__(self, filename, snapshot, delay=DEFAULT_DELAY):
+        # snapshot() must return a JSON-serialisable copy of the current state
+        self.filename = filename
+        self.snapshot = snapshot
+        self.delay = delay
+        self._handle = None
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def dirty(self):
+        return self._handle is not None
+
+    def mark_dirty(self):
+        """Schedules a write unless one is already pending."""
+        if self._handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (e.g. called from a script): just write now
+            self.flush_sync()
+            return
+        self._handle = loop.call_later(self.delay, lambda: loop.create_task(self.flush()))
+
+    async def flush(self):
+        """Writes the current state now (off the event loop)."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        # Take the snapshot on the loop so it's consistent, then write it in a thread
+        data = self.snapshot()
+        store = shared_store()
+        async with self._write_lock:
+            if store is None:
+                await asyncio.to_thread(write_json_atomic, self.filename, data)
+            else:
+                changes = store.prepare(_namespace(self.filename), data)
+                await asyncio.to_thread(_commit_shared, store, self.filename, changes)
+
+    def flush_sync(self):
+        """Blocking write, for shutdown paths where there is no loop left to use."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        save_json(self.filename, self.snapshot())
+
+
+
+class AppendLog:
+    """
+    An append-only JSON Lines file. Adding a record writes one line instead
+    of rewriting the whole store; lines added in the same loop iteration are
+    written together, in a worker thread.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._pending = []
+        self._flush_task = None
+        self._write_lock = asyncio.Lock()
+
+    def read(self):
+        records = []
+        if not os.path.exists(self.filename):
+            return records
+        with open(self.filename, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A crash mid-append can leave a torn last line
+                    logger.warning(f"Skipping unreadable line in {self.filename}")
+        return records
+
+    def append(self, record):
+        self._pending.append(json.dumps(record, ensure_ascii=False))
+        if self._flush_task is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()
+            return
+        self._flush_task = loop.create_task(self.flush())
+
+    async def flush(self):
+        async with self._write_lock:
+            self._flush_task = None
+            lines, self._pending = self._pending, []
+            if lines:
+                await asyncio.to_thread(self._write, lines)
+
+    def flush_sync(self):
+        lines, self._pending = self._pending, []
+        if lines:
+            self._write(lines)
+
+    def rewrite(self, records):
+        """Replaces the whole log (e.g. when migrating from an older format)."""
+        self._pending = []
+        started_at = time.perf_counter()
+        tmp_name = f"{self.filename}.tmp"
+        with open(tmp_name, "w") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_name, self.filename)
+        self._observe(started_at, os.path.getsize(self.filename))
+
+    def _write(self, lines):
+        started_at = time.perf_counter()
+        text = "\n".join(lines) + "\n"
+        with open(self.filename, "a") as f:
+            f.write(text)
+        self._observe(started_at, len(text.encode()))
+
+    def _observe(self, started_at, size):
+        name = _metric_name(self.filename)
+        metrics.PERSISTENCE_FLUSH.observe(time.perf_counter() - started_at, file=name)
+        metrics.PERSISTENCE_BYTES.inc(size, file=name)
+
+
+# =========================================================================
+# CLUSTER MODE
+# With SHARED_STORE_PATH set (the supervisor sets it for every worker), the
+# JSON stores live in one SQLite database shared by all worker processes
+# instead of in per-process files. load_json/save_json pick the backend, and
+# watch() tells a cog when another worker changed one of its stores.
+# =========================================================================
+
+SHARED_STORE_PATH = os.getenv("SHARED_STORE_PATH")
+POLL_INTERVAL = float(os.getenv("SHARED_STORE_POLL", "0.5"))
+
+_store = None
+_watchers = {}
+_poll_task = None
+
+
+def shared_store():
+    """The process's SharedStore in cluster mode, else None."""
+    global _store
+    if _store is None and SHARED_STORE_PATH:
+        _store = SharedStore(SHARED_STORE_PATH)
+        logger.info(f"Using shared store at {SHARED_STORE_PATH}")
+    return _store
+
+
+def _namespace(filename):
+    # Top-level stores keep their bare file name; partition files keep their
+    # directory too (e.g. "data/shared_lists/guild-1.json")
+    return os.path.normpath(filename).replace(os.sep, "/")
+
+
+def _read_file(filename, default):
+    if not os.path.exists(filename):
+        return default
+    try:
+        with open(filename, "r") as f:
+            return json.load(f)
+    except Exception:
+        return default
+
+
+def load_json(filename, default):
+    """Loads a store from the shared store in cluster mode, else from its JSON file."""
+    store = shared_store()
+    if store is None:
+        return _read_file(filename, default)
+    namespace = _namespace(filename)
+    if not store.has(namespace) and os.path.exists(filename):
+        # First start in cluster mode: seed the shared store from the old file
+        store.save(namespace, _read_file(filename, default))
+    return store.load(namespace, default)
+
+
+def save_json(filename, data):
+    """Saves a store to the shared store (changed keys only) or atomically to its file."""
+    store = shared_store()
+    if store is None:
+        write_json_atomic(filename, data)
+    else:
+        _commit_shared(store, filename, store.prepare(_namespace(filename), data))
+
+
+def save_json_entries(filename, entries):
+    """Cluster mode only: saves just these keys ({key: value or None}) of a dict store.
+
+    For state that is cheap to lose on a single process (like chat history)
+    but that every worker should see once the bot runs as several processes.
+    """
+    store = shared_store()
+    if store is not None:
+        _commit_shared(store, filename, store.prepare_entries(_namespace(filename), entries))
+
+
+def _commit_shared(store, filename, changes):
+    started_at = time.perf_counter()
+    if store.commit(_namespace(filename), changes):
+        name = _metric_name(filename)
+        metrics.PERSISTENCE_FLUSH.observe(time.perf_counter() - started_at, file=name)
+        metrics.PERSISTENCE_BYTES.inc(sum(len(text or "") for text in changes.values()), file=name)
+
+
+def claim_once(name):
+    """True for exactly one worker ever in cluster mode (e.g. for a one-off migration); always True otherwise."""
+    store = shared_store()
+    if store is None:
+        return True
+    return store.claim("claims", name)
+
+
+def release(filename):
+    """Cluster mode: forgets this process's cached view of a store that is no longer loaded."""
+    store = shared_store()
+    if store is not None:
+        store.forget(_namespace(filename))
+
+
+def watch(filename, callback):
+    """Calls callback({key: value or None}) on the loop when another worker changes this store.
+
+    No-op outside cluster mode. Call from the event loop (e.g. a cog's __init__).
+    """
+    global _poll_task
+    if shared_store() is None:
+        return
+    _watchers.setdefault(_namespace(filename), []).append(callback)
+    if _poll_task is None:
+        _poll_task = asyncio.get_running_loop().create_task(_poll_shared_store())
+
+
+def unwatch(filename, callback):
+    global _poll_task
+    callbacks = _watchers.get(_namespace(filename), [])
+    if callback in callbacks:
+        callbacks.remove(callback)
+    if not any(_watchers.values()) and _poll_task is not None:
+        _poll_task.cancel()
+        _poll_task = None
+
+
+async def _poll_shared_store():
+    store = shared_store()
+    while True:
+        await asyncio.sleep(POLL_INTERVAL)
+        try:
+            rows = await asyncio.to_thread(store.poll)
+        except Exception as e:
+            logger.error(f"Shared store poll failed: {e}")
+            continue
+        if not rows:
+            continue
+        # apply() and the callbacks run in the same loop step, so no save can
+        # diff against a half-updated view
+        for namespace, changes in store.apply(rows).items():
+            for callback in list(_watchers.get(namespace, ())):
+                try:
+                    callback(changes)
+                except Exception:
+                    logger.exception(f"Shared store watcher for {namespace} failed")
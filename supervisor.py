@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import math
+import os
+import signal
+import sys
+import time
+import aiohttp
+from aiohttp import web
+from logging_setup import configure_logging, stop_logging
+
+configure_logging()
+logger = logging.getLogger('Supervisor')
+
+# =========================================================================
+# CLUSTER SUPERVISOR
+# Runs the bot as WORKERS separate `main.py` processes so it can use more
+# than one core. Each worker owns a contiguous range of the SHARD_COUNT
+# shards (see sharding.py) and all of them share state through the SQLite
+# store at SHARED_STORE_PATH (see storage.py / shared_store.py).
+#
+# The supervisor restarts workers that exit, polls each worker's /healthz
+# and restarts any that stay unhealthy, and serves its own status page on
+# PORT (worker i serves on WORKER_PORT_BASE + i).
+#
+#   WORKERS=2 SHARD_COUNT=4 python supervisor.py
+#   WORKERS=4 SHARD_COUNT=auto python supervisor.py   (asks Discord for the count)
+# =========================================================================
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKERS = int(os.getenv("WORKERS", "2"))
+SHARED_STORE_PATH = os.getenv("SHARED_STORE_PATH", os.path.join(REPO_DIR, "naekki_state.db"))
+WORKER_PORT_BASE = int(os.getenv("WORKER_PORT_BASE", "8081"))
+
+# Workers get this long to log in and become ready before health checks count
+STARTUP_GRACE = float(os.getenv("WORKER_STARTUP_GRACE", "120"))
+HEALTH_INTERVAL = float(os.getenv("HEALTH_INTERVAL", "15"))
+HEALTH_TIMEOUT = 5
+HEALTH_FAILURES = 3
+# Discord allows one IDENTIFY per 5 seconds, so workers start staggered
+IDENTIFY_INTERVAL = 5
+MAX_RESTART_DELAY = 60
+STOP_TIMEOUT = 30
+
+
+def shard_ranges(shard_count, workers):
+    """Splits shard ids 0..shard_count-1 into `workers` contiguous ranges."""
+    per_worker = math.ceil(shard_count / workers)
+    return [
+        list(range(start, min(start + per_worker, shard_count)))
+        for start in range(0, shard_count, per_worker)
+    ]
+
+
+async def recommended_shard_count(token):
+    """Asks Discord how many shards the bot should use."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"}
+        ) as response:
+            response.raise_for_status()
+            data = await response.json()
+            return data["shards"]
+
+
+class Worker:
+    def __init__(self, index, shard_ids, shard_count):
+        self.index = index
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.port = WORKER_PORT_BASE + index
+        self.process = None
+        self.started_at = None
+        self.restarts = 0
+        self.health_failures = 0
+        self.last_health = None
+
+    def env(self):
+        env = dict(os.environ)
+        env.update({
+            "SHARD_COUNT": str(self.shard_count),
+            "SHARD_IDS": ",".join(map(str, self.shard_ids)),
+            "SHARED_STORE_PATH": SHARED_STORE_PATH,
+            "PORT": str(self.port),
+            "WORKER_ID": str(self.index),
+            # Syncing the command tree once is enough for the whole bot
+            "SYNC_COMMANDS": "1" if self.index == 0 else "0",
+        })
+        return env
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(REPO_DIR, "main.py"), env=self.env(), cwd=REPO_DIR
+        )
+        self.started_at = time.monotonic()
+        self.health_failures = 0
+        logger.info(f"Worker {self.index} started (pid {self.process.pid}, shards {self.shard_ids}, port {self.port})")
+
+    async def stop(self):
+        if self.process is None or self.process.returncode is not None:
+            return
+        self.process.terminate()
+        try:
+            await asyncio.wait_for(self.process.wait(), STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Worker {self.index} ignored SIGTERM, killing it")
+            self.process.kill()
+            await self.process.wait()
+
+    def status(self):
+        return {
+            "worker": self.index,
+            "pid": self.process.pid if self.process else None,
+            "running": self.process is not None and self.process.returncode is None,
+            "shards": self.shard_ids,
+            "port": self.port,
+            "restarts": self.restarts,
+            "health_failures": self.health_failures,
+            "last_health": self.last_health,
+        }
+
+
+class Supervisor:
+    def __init__(self, workers):
+        self.workers = workers
+        self.stopping = asyncio.Event()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stopping.set)
+
+        runner = await self.start_status_server()
+        tasks = [loop.create_task(self.keep_running(worker)) for worker in self.workers]
+        tasks.append(loop.create_task(self.check_health()))
+
+        await self.stopping.wait()
+        logger.info("Shutting down workers...")
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+        await runner.cleanup()
+
+    async def keep_running(self, worker):
+        """Starts a worker (staggered for IDENTIFY limits) and restarts it whenever it exits."""
+        shards_before = sum(len(other.shard_ids) for other in self.workers[:worker.index])
+        await asyncio.sleep(shards_before * IDENTIFY_INTERVAL)
+        while not self.stopping.is_set():
+            await worker.start()
+            code = await worker.process.wait()
+            if self.stopping.is_set():
+                return
+            delay = min(MAX_RESTART_DELAY, 2 ** worker.restarts)
+            worker.restarts += 1
+            logger.error(f"Worker {worker.index} exited with code {code}; restarting in {delay}s")
+            await asyncio.sleep(delay)
+
+    async def check_health(self):
+        timeout = aiohttp.ClientTimeout(total=HEALTH_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            while True:
+                await asyncio.sleep(HEALTH_INTERVAL)
+                await asyncio.gather(*(self.check_worker(session, worker) for worker in self.workers))
+
+    async def check_worker(self, session, worker):
+        if worker.process is None or worker.process.returncode is not None:
+            return
+        if time.monotonic() - worker.started_at < STARTUP_GRACE:
+            return
+        try:
+            async with session.get(f"http://127.0.0.1:{worker.port}/healthz") as response:
+                worker.last_health = await response.json()
+                healthy = response.status == 200
+        except Exception as e:
+            worker.last_health = {"error": str(e)}
+            healthy = False
+
+        if healthy:
+            worker.health_failures = 0
+            return
+        worker.health_failures += 1
+        logger.warning(f"Worker {worker.index} failed health check ({worker.health_failures}/{HEALTH_FAILURES})")
+        if worker.health_failures >= HEALTH_FAILURES:
+            logger.error(f"Worker {worker.index} is unhealthy, restarting it")
+            # keep_running() notices the exit and starts it again
+            await worker.stop()
+
+    # --- Status server ---
+
+    async def start_status_server(self):
+        async def index_handler(request):
+            running = sum(1 for worker in self.workers if worker.status()["running"])
+            return web.Response(text=f"Supervisor: {running}/{len(self.workers)} workers running.")
+
+        async def workers_handler(request):
+            return web.json_response([worker.status() for worker in self.workers])
+
+        app = web.Application()
+        app.router.add_get('/', index_handler)
+        app.router.add_get('/workers', workers_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        port = int(os.getenv("PORT", 8080))
+        await web.TCPSite(runner, '0.0.0.0', port).start()
+        logger.info(f"Supervisor status on port {port}")
+        return runner
+
+
+async def main():
+    raw_count = os.getenv("SHARD_COUNT", "auto").strip().lower()
+    if raw_count == "auto":
+        shard_count = max(WORKERS, await recommended_shard_count(os.environ["DISCORD_BOT_TOKEN"]))
+    else:
+        shard_count = int(raw_count)
+    ranges = shard_ranges(shard_count, WORKERS)
+    if len(ranges) < WORKERS:
+        logger.warning(f"Only {shard_count} shards, so running {len(ranges)} workers instead of {WORKERS}")
+
+    workers = [Worker(index, shard_ids, shard_count) for index, shard_ids in enumerate(ranges)]
+    logger.info(f"Running {shard_count} shards across {len(workers)} workers, shared store {SHARED_STORE_PATH}")
+    try:
+        await Supervisor(workers).run()
+    finally:
+        stop_logging()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
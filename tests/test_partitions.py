@@ -0,0 +1,103 @@
+import asyncio
+
+import partitions
+
+
+class SlowPartition:
+    """Records its lifecycle; scope "a"'s flush() waits until the test lets it finish."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.flushes = 0
+        self.released = False
+        self.flush_gate = asyncio.Event()
+        if scope != "a":
+            self.flush_gate.set()
+
+    async def flush(self):
+        self.flushes += 1
+        await self.flush_gate.wait()
+
+    def release(self):
+        self.released = True
+
+    def close_sync(self):
+        self.released = True
+
+
+def test_scope_reused_while_its_close_is_in_flight():
+    async def scenario():
+        cache = partitions.PartitionCache("test", SlowPartition, max_loaded=1)
+        first = cache.get("a")
+        cache.get("b")  # evicts "a"; its flush is now pending
+        await asyncio.sleep(0)
+        assert first.flushes == 1
+
+        # "a" comes back before the flush finishes: same partition, still open
+        assert cache.get("a") is first
+        first.flush_gate.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert not first.released
+        assert cache.get("a") is first
+
+        await cache.close()
+        assert first.released
+
+    asyncio.run(scenario())
+
+
+def test_evicted_partition_is_released_after_its_flush():
+    async def scenario():
+        cache = partitions.PartitionCache("test", SlowPartition, max_loaded=1)
+        first = cache.get("a")
+        first.flush_gate.set()
+        cache.get("b")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert first.released
+        second = cache.get("a")
+        assert second is not first
+        second.flush_gate.set()
+        await cache.close()
+
+    asyncio.run(scenario())
+
+
+def test_evicted_again_while_first_close_pending_releases_once():
+    async def scenario():
+        cache = partitions.PartitionCache("test", SlowPartition, max_loaded=1)
+        first = cache.get("a")
+        cache.get("b")
+        await asyncio.sleep(0)
+        assert cache.get("a") is first
+        cache.get("b")  # evicts "a" a second time, first close still pending
+        await asyncio.sleep(0)
+
+        released = []
+        first.release = lambda: released.append(True)
+        first.flush_gate.set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert released == [True]
+        await cache.close()
+
+    asyncio.run(scenario())
+
+
+def test_peek_neither_loads_nor_reorders():
+    async def scenario():
+        cache = partitions.PartitionCache("test", SlowPartition, max_loaded=2)
+        first = cache.get("a")
+        cache.get("b")
+        assert cache.peek("c") is None
+        assert cache.peek("a") is first
+        assert list(cache.loaded()) == ["a", "b"]
+
+        cache.get("c")  # evicts "a", whose flush is pending: still visible
+        await asyncio.sleep(0)
+        assert cache.peek("a") is first
+        first.flush_gate.set()
+        await cache.close()
+
+    asyncio.run(scenario())
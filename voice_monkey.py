@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import os
+import time
+import aiohttp
+from yarl import URL
+import http_client
+import metrics
+
+logger = logging.getLogger('VoiceMonkey')
+
+# =========================================================================
+# VOICE MONKEY CLIENT
+# The one way the bot talks to Voice Monkey (Alexa). Build a Trigger with
+#   Trigger.announce(text)        Alexa says something
+#   Trigger.play(song)            "play <song> on Spotify"
+#   Trigger.routine(monkey)       fires a Voice Monkey routine trigger
+#   Trigger.wakeup(user, song)    announcement + music in a single call
+# and `await client.send(trigger)`.
+#
+# The first trigger for a device goes out at once; the ones that follow
+# within COALESCE_WINDOW of it are merged into a single call at the end
+# of the window (announcements are read out together). Triggers asking
+# for different songs or routines aren't merged, they queue up. Every
+# caller in a batch gets the same result.
+#
+# The transport is pluggable: HttpTransport uses a pooled aiohttp session,
+# FakeTransport records calls for working offline.
+# =========================================================================
+
+# Trigger URL including the token (and default device), e.g.
+# https://api.voicemonkey.io/trigger?token=...&secret=...&monkey=...
+VOICE_MONKEY_BASE_URL = os.getenv("VOICE_MONKEY_BASE_URL") or os.getenv("VOICE_MONKEY_URL")
+COALESCE_WINDOW = float(os.getenv("VOICE_MONKEY_COALESCE", "0.25"))
+DEFAULT_VOLUME = 75
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+
+class VoiceMonkeyError(Exception):
+    """A trigger that didn't go through; the message is fit for the chat."""
+
+    def __init__(self, message, status=None):
+        self.status = status
+        super().__init__(message)
+
+
+class Trigger:
+    """One Voice Monkey call. Use the builders rather than the constructor."""
+
+    def __init__(self, device: str = None, announcement: str = None, command: str = None,
+                 routine: str = None, volume: int = None):
+        self.device = device
+        self.announcement = announcement
+        self.command = command
+        self.routine = routine
+        self.volume = volume
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={value!r}" for name, value in self.params().items())
+        return f"Trigger({fields})"
+
+    # --- Builders ---
+
+    @classmethod
+    def announce(cls, text: str, device: str = None, volume: int = DEFAULT_VOLUME):
+        return cls(device=device, announcement=text, volume=volume)
+
+    @classmethod
+    def play(cls, song: str, device: str = None):
+        return cls(device=device, command=f"play {song} on Spotify")
+
+    @classmethod
+    def routine(cls, monkey: str, device: str = None):
+        return cls(device=device, routine=monkey)
+
+    @classmethod
+    def wakeup(cls, user: str, song: str, device: str = None, volume: int = DEFAULT_VOLUME):
+        """Wakes someone up: Alexa announces it, then plays the song."""
+        return cls(device=device, announcement=f"Wake up {user}! Playing {song} now.",
+                   command=f"play {song} on Spotify", volume=volume)
+
+    # --- Batching ---
+
+    def can_merge(self, other: "Trigger"):
+        """False if the two would play different songs or run different routines."""
+        return (not (self.command and other.command and self.command != other.command)
+                and not (self.routine and other.routine and self.routine != other.routine))
+
+    def merge(self, other: "Trigger"):
+        """This trigger with a later, compatible one to the same device folded in."""
+        announcements = [text for text in (self.announcement, other.announcement) if text]
+        if len(announcements) == 2 and announcements[0] == announcements[1]:
+            announcements.pop()
+        volumes = [volume for volume in (self.volume, other.volume) if volume is not None]
+        return Trigger(
+            device=self.device,
+            announcement=" ".join(announcements) or None,
+            command=other.command or self.command,
+            routine=other.routine or self.routine,
+            volume=max(volumes) if volumes else None,
+        )
+
+    def params(self):
+        """Query parameters for the trigger URL."""
+        params = {}
+        if self.device:
+            params["monkey"] = self.device
+        if self.routine:
+            params["routine"] = self.routine
+        if self.announcement:
+            params["announcement"] = self.announcement
+        if self.command:
+            params["command"] = self.command
+        if self.volume is not None:
+            params["volume"] = str(self.volume)
+        return params
+
+
+# --- Transports ---
+
+class HttpTransport:
+    """Sends triggers over HTTP. get_session defaults to the bot's pooled session."""
+
+    def __init__(self, get_session=http_client.get_session):
+        self.get_session = get_session
+
+    async def send(self, url, params):
+        """Returns (status, body)."""
+        session = self.get_session()
+        async with session.get(URL(url).update_query(params), timeout=REQUEST_TIMEOUT) as response:
+            return response.status, await response.text()
+
+
+class FakeTransport:
+    """Records triggers instead of sending them; answers with a canned response."""
+
+    def __init__(self, status=200, body='{"success": true}', delay=0.0):
+        self.status = status
+        self.body = body
+        self.delay = delay
+        self.sent = []
+
+    async def send(self, url, params):
+        self.sent.append((url, dict(params)))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.status, self.body
+
+
+# --- Client ---
+
+class _Batch:
+    def __init__(self, trigger):
+        self.trigger = trigger
+        self.size = 1
+        # When the call goes out (monotonic)
+        self.due = None
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class VoiceMonkeyClient:
+    def __init__(self, base_url=VOICE_MONKEY_BASE_URL, transport=None, window=COALESCE_WINDOW, source="bot"):
+        self.base_url = base_url
+        self.transport = transport or HttpTransport()
+        self.window = window
+        self.source = source
+        # device -> batch collecting triggers for the next call
+        self._pending = {}
+        # device -> when the last call went out (monotonic)
+        self._last_call = {}
+        # Calls in flight, held so they can't be garbage-collected midway
+        self._deliveries = set()
+
+    async def send(self, trigger: Trigger):
+        """Sends (or joins) a trigger. Returns Voice Monkey's response text; raises VoiceMonkeyError."""
+        if not self.base_url:
+            raise VoiceMonkeyError("Voice Monkey isn't configured (VOICE_MONKEY_BASE_URL is not set).")
+        device = trigger.device
+        batch = self._pending.get(device)
+        if batch is not None and batch.trigger.can_merge(trigger):
+            batch.trigger = batch.trigger.merge(trigger)
+            batch.size += 1
+            VOICE_MONKEY_COALESCED.inc()
+        else:
+            queued_after = batch
+            batch = _Batch(trigger)
+            now = time.monotonic()
+            next_call = self._last_call.get(device, float("-inf")) + self.window
+            if queued_after is not None:
+                next_call = max(next_call, queued_after.due + self.window)
+            batch.due = max(now, next_call)
+            delay = batch.due - now
+            if delay <= 0:
+                self._start(device, batch)
+            else:
+                self._pending[device] = batch
+                asyncio.get_running_loop().call_later(delay, self._flush, device, batch)
+        # Shielded: one caller giving up mustn't cancel the call for the others
+        return await asyncio.shield(batch.future)
+
+    def _flush(self, device, batch):
+        if self._pending.get(device) is batch:
+            del self._pending[device]
+        self._start(device, batch)
+
+    def _start(self, device, batch):
+        self._last_call[device] = time.monotonic()
+        task = asyncio.ensure_future(self._deliver(batch))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, batch):
+        # Whatever happens, the batch's future is resolved: every caller in it is waiting on it
+        try:
+            result = await self._call(batch.trigger)
+        except asyncio.CancelledError:
+            batch.future.cancel()
+            raise
+        except Exception as e:
+            if not isinstance(e, VoiceMonkeyError):
+                logger.exception(f"Unexpected error delivering {batch.trigger!r}")
+            if not batch.future.done():
+                batch.future.set_exception(e)
+                # Retrieved here so nobody gets "exception was never retrieved" if every caller left
+                batch.future.exception()
+        else:
+            if not batch.future.done():
+                batch.future.set_result(result)
+        if batch.size > 1:
+            logger.info(f"Sent {batch.size} triggers as one: {batch.trigger!r}")
+
+    async def _call(self, trigger):
+        started_at = time.perf_counter()
+        status = "error"
+        try:
+            status_code, body = await self.transport.send(self.base_url, trigger.params())
+            status = str(status_code)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Network error during Voice Monkey call: {e}")
+            raise VoiceMonkeyError("Couldn't reach Voice Monkey.") from e
+        finally:
+            metrics.VOICE_MONKEY_REQUEST.observe(time.perf_counter() - started_at, source=self.source, status=status)
+
+        if status_code != 200:
+            logger.error(f"Voice Monkey API returned non-200 status: {status_code}. Response: {body[:200]}")
+            raise VoiceMonkeyError(f"Voice Monkey returned status {status_code}.", status=status_code)
+        if "success" not in body.lower():
+            # 200, but the command wasn't executed (e.g. bad syntax)
+            logger.warning(f"Voice Monkey 200 but execution likely failed. Response: {body[:200]}")
+            raise VoiceMonkeyError("Voice Monkey accepted the request but didn't run it.", status=status_code)
+        return body
+
+
+client = VoiceMonkeyClient()
+
+
+VOICE_MONKEY_COALESCED = metrics.Counter(
+    "naekki_voice_monkey_coalesced_total",
+    "Voice Monkey triggers merged into another trigger's call for the same device.",
+)
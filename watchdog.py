@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+import metrics
+
+# =========================================================================
+# EVENT-LOOP WATCHDOG
+# A heartbeat task on the bot's loop stamps the time every HEARTBEAT_INTERVAL.
+# A sampler thread checks that stamp; if the loop hasn't beaten for
+# STALL_THRESHOLD seconds, something is blocking it, so the thread grabs
+# the loop thread's current stack (which is the blocking code) and logs it.
+# =========================================================================
+
+logger = logging.getLogger('Watchdog')
+
+HEARTBEAT_INTERVAL = 0.1
+STALL_THRESHOLD = float(os.getenv("WATCHDOG_THRESHOLD_MS", "250")) / 1000
+SAMPLE_INTERVAL = 0.05
+MAX_RECORDED_STALLS = 50
+
+STALLS = metrics.Counter(
+    "naekki_event_loop_stalls_total",
+    "Times the event loop was blocked for longer than the watchdog threshold.",
+)
+STALL_DURATION = metrics.Histogram(
+    "naekki_event_loop_stall_seconds",
+    "How long each detected event-loop stall lasted.",
+    buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 30.0),
+)
+
+
+class LoopWatchdog:
+    """Measures loop scheduling delay and captures the stack of anything that blocks it."""
+
+    def __init__(self, threshold=STALL_THRESHOLD):
+        self.threshold = threshold
+        self.loop = None
+        self.loop_thread_id = None
+        self.last_beat = time.monotonic()
+        # Most recent stalls: {"started_at", "duration", "stack"}
+        self.recent_stalls = deque(maxlen=MAX_RECORDED_STALLS)
+        self._task = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def start(self, loop=None):
+        """Starts the heartbeat task and sampler thread (call from the bot's loop)."""
+        if self._task is not None:
+            return
+        self.loop = loop or asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self._task = self.loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._sample, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + HEARTBEAT_INTERVAL
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            now = time.monotonic()
+            metrics.LOOP_LAG.observe(max(0.0, now - expected))
+            self.last_beat = now
+
+    def _sample(self):
+        """Runs in its own thread; never touches the loop."""
+        stall = None
+        while not self._stopping.wait(SAMPLE_INTERVAL):
+            silent_for = time.monotonic() - self.last_beat
+            blocked = silent_for > self.threshold + HEARTBEAT_INTERVAL
+
+            if blocked and stall is None:
+                frame = sys._current_frames().get(self.loop_thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame else "<no frame>"
+                stall = {"started_at": time.time() - silent_for, "duration": silent_for, "stack": stack}
+                logger.warning(f"Event loop blocked for {silent_for * 1000:.0f} ms so far. Blocking stack:\n{stack}")
+            elif blocked:
+                stall["duration"] = silent_for
+            elif stall is not None:
+                # The loop is beating again: close out the stall
+                STALLS.inc()
+                STALL_DURATION.observe(stall["duration"])
+                self.recent_stalls.append(stall)
+                logger.warning(f"Event loop recovered after {stall['duration'] * 1000:.0f} ms.")
+                stall = None
+
+    def snapshot(self):
+        """Recent stalls, newest first (safe to call from any thread)."""
+        return list(reversed(self.recent_stalls))
+
+
+# One watchdog per process, shared by main.py and the web server
+watchdog = LoopWatchdog()
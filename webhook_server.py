@@ -1,18 +1,10 @@
-import os
-import requests
-import json
 import logging
-import asyncio
 from discord.ext import commands
 from discord.ext.commands import Cog
+import voice_monkey
 
 # Set up logging for the cog
 logger = logging.getLogger('WebhookServerCog')
-logger.setLevel(logging.INFO)
-
-# --- Configuration ---
-# Your unique Voice Monkey Trigger URL, loaded from environment variables
-VOICE_MONKEY_URL = os.getenv("VOICE_MONKEY_URL")
 
 # --- Web Server/Cog Setup ---
 
@@ -48,40 +40,19 @@ class WebhookServerCog(Cog):
 
     # --- Core Dynamic Song Trigger Function ---
     
-    def dynamic_song_trigger(self, song_name: str, user_name: str):
+    async def dynamic_song_trigger(self, song_name: str, user_name: str):
         """
-        Handles the request coming from the Discord bot and makes the API call 
-        to Voice Monkey.
+        Handles the request coming from the Discord bot: Alexa announces the
+        wake-up and plays the song, in one Voice Monkey call.
         """
-        if not VOICE_MONKEY_URL:
-            logger.error("VOICE_MONKEY_URL is not set in environment variables.")
-            return {"error": "Server not configured with Voice Monkey URL."}, 500
-
-        # Create a dynamic message for Alexa to say
-        announcement_text = f"Wake up {user_name}! Playing {song_name} now."
-        
-        # Data payload for Voice Monkey (adjust keys based on your specific setup)
-        payload = {
-            "monkey": announcement_text,
-            "announcement": "true",
-            "volume": 75 # Set an appropriate volume
-        }
-
-        # The Voice Monkey URL should already contain the correct trigger/device ID
         try:
-            # We use a POST request here as Voice Monkey typically expects a body payload
-            response = requests.post(VOICE_MONKEY_URL, data=json.dumps(payload), timeout=10)
-            
-            if response.status_code == 200:
-                logger.info(f"Successfully triggered Voice Monkey for song: {song_name}")
-                return {"status": "success", "message": "Voice Monkey triggered."}, 200
-            else:
-                logger.error(f"Voice Monkey API failed: Status {response.status_code}, Response: {response.text}")
-                return {"error": f"Voice Monkey returned status code {response.status_code}"}, 502
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Network error calling Voice Monkey: {e}")
-            return {"error": f"Network error during Voice Monkey call: {e}"}, 503
+            await voice_monkey.client.send(voice_monkey.Trigger.wakeup(user_name, song_name))
+        except voice_monkey.VoiceMonkeyError as e:
+            if e.status is None:
+                return {"error": str(e)}, 503
+            return {"error": str(e)}, 502
+        logger.info(f"Successfully triggered Voice Monkey for song: {song_name}")
+        return {"status": "success", "message": "Voice Monkey triggered."}, 200
 
 
 # --- Setup and Teardown Functions for the Bot's Extension System ---
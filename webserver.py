@@ -1,14 +1,26 @@
 import os
 import threading
+import logging
 import asyncio
-import urllib.parse
+import time
 import aiohttp
 from aiohttp import web
+import metrics
+import sharding
+import voice_monkey
+from shutdown import lifecycle
+from watchdog import watchdog
+
+logger = logging.getLogger('WebServer')
 
 # --- Configuration ---
-# Base URL for Voice Monkey API (Set this in your Environment Variables!)
-# Example Format: https://api.voicemonkey.io/trigger?token=...&secret=...&monkey=...
-VOICE_MONKEY_BASE_URL = os.getenv("VOICE_MONKEY_BASE_URL")
+# /healthz reports the bot as hung once its loop hasn't run for this long
+HEALTH_MAX_SILENCE = float(os.getenv("HEALTH_MAX_SILENCE", "10"))
+# How long stop_server() waits for open requests to finish
+STOP_TIMEOUT = 5
+
+# (thread, loop, runner) of the running server
+_server = None
 
 # --- Handlers ---
 
@@ -16,54 +28,57 @@ async def keep_awake_handler(request):
     """Responds with a simple status to keep the Render service awake."""
     return web.Response(text="Bot is running and awake.", status=200)
 
+async def metrics_handler(request):
+    """Exposes the bot's metrics in the Prometheus text format."""
+    return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+async def stalls_handler(request):
+    """Lists recent event-loop stalls caught by the watchdog, with their blocking stacks."""
+    return web.json_response(watchdog.snapshot())
+
+async def health_handler(request):
+    """200 once the bot is connected and its event loop is responsive, else 503 (used by supervisor.py). Also 503 while shutting down."""
+    silent_for = time.monotonic() - watchdog.last_beat if watchdog.loop is not None else None
+    loop_ok = silent_for is not None and silent_for < HEALTH_MAX_SILENCE
+    body = dict(sharding.status(), loop_ok=loop_ok, loop_silent_for=silent_for, draining=lifecycle.draining, pid=os.getpid())
+    healthy = loop_ok and body["ready"] and not lifecycle.draining
+    return web.json_response(body, status=200 if healthy else 503)
+
 async def dynamic_song_trigger(request):
     """
-    Handles the request from the Discord bot to play a specific song via Voice Monkey.
+    Plays a specific song via Voice Monkey, for callers outside the bot.
     Expects query parameters: ?song=SongName&user=UserName
     """
     song_name = request.query.get("song", "Default Alarm")
     user_name = request.query.get("user", "Someone")
 
-    if not VOICE_MONKEY_BASE_URL:
-        print("ERROR: VOICE_MONKEY_BASE_URL not configured.")
-        return web.Response(text="Error: VOICE_MONKEY_BASE_URL not configured.", status=500)
+    logger.info(f"Triggering Voice Monkey for '{song_name}' ({user_name})")
+    try:
+        await _voice_monkey.send(voice_monkey.Trigger.play(song_name))
+    except voice_monkey.VoiceMonkeyError as e:
+        # Upstream said no (502) vs. we couldn't get an answer at all (500)
+        status = 502 if e.status not in (None, 200) else 500
+        return web.Response(text=f"Voice Monkey Error: {e}", status=status)
+    return web.Response(text=f"Successfully requested '{song_name}' for {user_name}.", status=200)
 
-    # 1. Construct the Alexa command
-    # This is the exact phrase Alexa needs to hear to play music.
-    alexa_command = f"play {song_name} on Spotify"
-    
-    # 2. URL-encode the command (CRITICAL step for special characters like spaces)
-    encoded_command = urllib.parse.quote_plus(alexa_command)
-    
-    # 3. Construct final Voice Monkey URL
-    # We append the custom command parameter directly to the base URL
-    # NOTE: We use '&command=' assuming the BASE_URL already contains the initial '?' for query start.
-    final_vm_url = f"{VOICE_MONKEY_BASE_URL}&command={encoded_command}"
-    
-    print(f"Triggering Voice Monkey: {final_vm_url}")
 
-    try:
-        # Use aiohttp for asynchronous request handling
-        async with aiohttp.ClientSession() as session:
-            # Send the request to Voice Monkey
-            async with session.get(final_vm_url) as response:
-                if response.status == 200:
-                    # Check for "success" in the response text (Voice Monkey often returns JSON)
-                    response_text = await response.text()
-                    if "success" in response_text.lower():
-                        print(f"Voice Monkey success response: {response_text}")
-                        return web.Response(text=f"Successfully requested '{song_name}' for {user_name}.", status=200)
-                    else:
-                         # Voice Monkey responded 200, but execution failed (e.g., command syntax error)
-                        print(f"Voice Monkey 200 but execution likely failed. Response: {response_text}")
-                        return web.Response(text=f"VM 200 OK, but command execution failed. Alexa may need a moment or the command syntax is wrong.", status=500)
-                else:
-                    error_text = await response.text()
-                    print(f"Voice Monkey API returned non-200 status: {response.status}. Response: {error_text}")
-                    return web.Response(text=f"Voice Monkey Error: {error_text}", status=502)
-    except Exception as e:
-        print(f"Network error during Voice Monkey call: {e}")
-        return web.Response(text=f"Internal Error during network call: {str(e)}", status=500)
+# The server runs its own loop in its own thread, so it can't borrow the
+# bot's pooled session; it keeps one of its own.
+_session = None
+
+def _get_session():
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession()
+    return _session
+
+async def _close_session(app):
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+_voice_monkey = voice_monkey.VoiceMonkeyClient(transport=voice_monkey.HttpTransport(get_session=_get_session), source="webserver")
 
 # --- Server Logic (Unchanged) ---
 
@@ -74,11 +89,15 @@ def start_server():
     except (TypeError, ValueError):
         port = 8080 
         
-    print(f"Starting web server on port {port}...")
+    logger.info(f"Starting web server on port {port}...")
 
     app = web.Application()
     app.router.add_get('/', keep_awake_handler)
     app.router.add_get('/dynamic-song-trigger', dynamic_song_trigger)
+    app.router.add_get('/metrics', metrics_handler)
+    app.router.add_get('/debug/stalls', stalls_handler)
+    app.router.add_get('/healthz', health_handler)
+    app.on_cleanup.append(_close_session)
     
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
@@ -88,12 +107,31 @@ def start_server():
     site = web.TCPSite(runner, '0.0.0.0', port)
     
     loop.run_until_complete(site.start())
+    global _server
+    _server = (threading.current_thread(), loop, runner)
     loop.run_forever()
+    loop.close()
 
 def keep_alive():
     """Launches the web server in a separate daemon thread."""
     t = threading.Thread(target=start_server, daemon=True)
     t.start()
 
+def stop_server():
+    """Closes the listening socket, lets open requests finish and ends the server thread."""
+    global _server
+    if _server is None:
+        return
+    thread, loop, runner = _server
+    _server = None
+    future = asyncio.run_coroutine_threadsafe(runner.cleanup(), loop)
+    try:
+        future.result(STOP_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Web server didn't stop cleanly: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(STOP_TIMEOUT)
+    logger.info("Web server stopped.")
+
 if __name__ == "__main__":
     keep_alive()
\ No newline at end of file